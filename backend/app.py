@@ -1,21 +1,89 @@
-from flask import Flask, request, jsonify
+from startup import LAZY_INIT, startup_timer
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flasgger import Swagger, swag_from
 from flask import Flask
-from flask_socketio import SocketIO, emit
-import requests
+from flask_socketio import SocketIO, emit, join_room, leave_room, rooms
+import hmac
+import json
+import math
+import os
 import threading
 import time
-from main import check_model_status, format_eq, predict_aftershock
-import firebase_admin
-from firebase_admin import credentials, messaging
+from main import (
+    batch_predict_aftershocks,
+    check_model_status,
+    forecast_aftershocks,
+    format_eq,
+    predict_aftershock,
+    reload_models,
+    start_model_warmup,
+)
+from catalog_index import get_catalog_index
+from cluster import (
+    FileLeaderLock,
+    LeaderElection,
+    LocalSnapshotStore,
+    RedisLeaderLock,
+    RedisSnapshotStore,
+    redis_client,
+)
+from event_log import EVENT_LOG_PATH, EventLog
+from ingestion import (
+    KANDILLI_TZ,
+    CsvCatalogSource,
+    IngestionPipeline,
+    KandilliSource,
+    parse_event_time,
+)
+from notifier import LazyFirebaseMessaging, NotificationDispatcher
+from rooms import ALL_ROOM, event_rooms, subscription_rooms
+from sequence_tracker import SequenceEvent, SequenceTracker
+from snapshot import SnapshotCache, SnapshotJSON
+from state import LiveState
+from token_store import RedisTokenStore, TokenStore
+
+startup_timer.record_since_start("imports")
+
+# Multi-worker deployments set REDIS_URL (e.g. redis://localhost:6379/0): emits go
+# through it to every worker, one elected process runs the poller, and the other
+# workers serve its snapshot. Without it everything stays in this process.
+REDIS_URL = os.environ.get("REDIS_URL")
+LEADER_LOCK_PATH = "data/poller.lock"
+CATALOG_PAGE_SIZE = 500
+CATALOG_MAX_PAGE_SIZE = 5000
+# (name, swagger type) of the /catalog/query parameters.
+CATALOG_QUERY_PARAMETERS = [
+    ("min_lat", "number"),
+    ("max_lat", "number"),
+    ("min_lon", "number"),
+    ("max_lon", "number"),
+    ("latitude", "number"),
+    ("longitude", "number"),
+    ("radius_km", "number"),
+    ("start", "string"),
+    ("end", "string"),
+    ("min_magnitude", "number"),
+    ("max_magnitude", "number"),
+    ("order", "string"),
+    ("limit", "integer"),
+    ("offset", "integer"),
+]
+# Admin endpoints are disabled unless ADMIN_TOKEN is set; callers send it as X-Admin-Token.
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
 
 app = Flask(__name__)
-socketio = SocketIO(app, cors_allowed_origins="*")
+socketio = SocketIO(
+    app, cors_allowed_origins="*", json=SnapshotJSON, message_queue=REDIS_URL
+)
 
-cred = credentials.Certificate(
-    "earthquake-aftershock-firebase-adminsdk-fbsvc-703a825086.json"
+FIREBASE_CREDENTIALS = "earthquake-aftershock-firebase-adminsdk-fbsvc-703a825086.json"
+# Firebase is initialized on the first notification (or right away without LAZY_INIT).
+messaging = LazyFirebaseMessaging(
+    FIREBASE_CREDENTIALS,
+    on_initialized=lambda seconds: startup_timer.record("firebase", seconds),
 )
-firebase_admin.initialize_app(cred)
+if not LAZY_INIT:
+    messaging.initialize()
 
 swagger_template = {
     "swagger": "2.0",
@@ -30,136 +98,283 @@ swagger = Swagger(app, template=swagger_template)
 
 API_URL = "https://api.orhanaydogdu.com.tr/deprem/kandilli/live"
 FAKE_API_URL = "http://127.0.0.1:4000/deprem/kandilli/live"
-initial_data = []
-last_eq_id = None
-initial_data_sent = False  
-fcm_tokens = []
-recent_predictions = []  
+USGS_CSV_URL = "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/all_hour.csv"
+# Comma-separated source names from SOURCE_FACTORIES, e.g. INGEST_SOURCES=kandilli,usgs
+INGEST_SOURCES = os.environ.get("INGEST_SOURCES", "fakeapi")
+TOKEN_DB_PATH = "data/fcm_tokens.sqlite3"
+PREDICTION_MIN_MAGNITUDE = 5.5
+MAX_RECENT_ITEMS = 50
+SOURCE_FACTORIES = {
+    "kandilli": lambda: KandilliSource("kandilli", API_URL),
+    "fakeapi": lambda: KandilliSource("fakeapi", FAKE_API_URL),
+    "usgs": lambda: CsvCatalogSource("usgs", USGS_CSV_URL),
+}
+
+
+def ingest_sources(value):
+    """The sources named in value; an empty or unknown name stops startup with a clear message."""
+    names = list(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+    unknown = [name for name in names if name not in SOURCE_FACTORIES]
+    if not names or unknown:
+        raise SystemExit(
+            f"INGEST_SOURCES geçersiz: {value!r}; virgülle ayrılmış kaynaklar: "
+            f"{', '.join(SOURCE_FACTORIES)}"
+        )
+    return [SOURCE_FACTORIES[name]() for name in names]
+
+
+ingestion = IngestionPipeline(ingest_sources(INGEST_SOURCES))
+# Training data for retrain.py; written by the leader only.
+event_log = EventLog(EVENT_LOG_PATH)
+live_state = LiveState(MAX_RECENT_ITEMS)
+sequence_tracker = SequenceTracker()
+snapshot_cache = SnapshotCache()
+if REDIS_URL:
+    redis_connection = redis_client(REDIS_URL)
+    snapshot_store = RedisSnapshotStore(redis_connection, snapshot_cache)
+    leader_lock = RedisLeaderLock(redis_connection)
+    # Shared by every node, unlike the SQLite file.
+    token_store = RedisTokenStore(redis_connection)
+else:
+    token_store = TokenStore(TOKEN_DB_PATH)
+    snapshot_store = LocalSnapshotStore(snapshot_cache)
+    # Still keeps a second process on this node from polling and notifying twice.
+    leader_lock = FileLeaderLock(LEADER_LOCK_PATH)
+
+
+def prune_tokens(invalid_tokens):
+    removed = token_store.remove_many(invalid_tokens)
+    print(f"{removed} geçersiz FCM token silindi")
+
+
+notification_dispatcher = NotificationDispatcher(
+    messaging, on_invalid_tokens=prune_tokens
+)
+
+
+def predict_for_events(events):
+    """Runs one batched prediction for the events that qualify; returns {event_id: result}."""
+    candidates = [eq for eq in events if eq["mag"] >= PREDICTION_MIN_MAGNITUDE]
+    if not candidates:
+        return {}
 
+    batch_result = batch_predict_aftershocks(
+        [
+            {
+                "magnitude": eq["mag"],
+                "depth": eq["depth"],
+                "latitude": eq["geojson"]["coordinates"][1],
+                "longitude": eq["geojson"]["coordinates"][0],
+            }
+            for eq in candidates
+        ],
+        return_format="dict",
+    )
+    if not batch_result["success"]:
+        print(f"Error: {batch_result['error']}")
+        return {}
 
-def send_notification(token, title, body):
-    message = messaging.Message(
-        notification=messaging.Notification(title=title, body=body), token=token
+    predictions = {}
+    for eq, prediction_result in zip(candidates, batch_result["predictions"]):
+        prediction_result.pop("index", None)
+        prediction_result["id"] = eq["_id"]
+        prediction_result["timestamp"] = eq["date_time"]
+        predictions[eq["_id"]] = prediction_result
+    return predictions
+
+
+def track_sequences(events, updates):
+    """
+    Assigns events (oldest first) to aftershock sequences, sets each formatted
+    event's sequence_id and returns the sequence updates.
+    """
+    sequence_ids, sequence_updates = sequence_tracker.observe(
+        SequenceEvent(
+            eq["_id"],
+            parse_event_time(eq["date_time"], KANDILLI_TZ).timestamp(),
+            eq["mag"],
+            eq["geojson"]["coordinates"][1],
+            eq["geojson"]["coordinates"][0],
+            eq["depth"],
+            eq["location_properties"]["closestCity"]["name"],
+        )
+        for eq in events
     )
+    for formatted_eq, sequence_id in zip(updates, sequence_ids):
+        formatted_eq["sequence_id"] = sequence_id
+    return sequence_updates
+
 
-    response = messaging.send(message)
-    print("Successfully sent message:", response)
+def publish_snapshot(state, added_earthquakes, added_predictions=()):
+    snapshot = snapshot_cache.publish(
+        state.earthquakes, state.predictions, added_earthquakes, added_predictions
+    )
+    snapshot_store.publish(snapshot, ingestion.feed_state())
+    socketio.emit("snapshot_version", snapshot.version)
+
+
+def emit_to_rooms(updates):
+    """Sends each event only to the rooms interested in it, one emit per distinct room set."""
+    groups = {}
+    for formatted_eq in updates:
+        target_rooms = event_rooms(
+            formatted_eq["magnitude"],
+            formatted_eq["closest_city"],
+            formatted_eq["coordinates"][1],
+            formatted_eq["coordinates"][0],
+        )
+        groups.setdefault(tuple(target_rooms), []).append(formatted_eq)
+
+    for target_rooms, group in groups.items():
+        # A client in several of the rooms still receives the message once.
+        socketio.emit("earthquake_updates", group, to=list(target_rooms))
+        group_predictions = [
+            formatted_eq["prediction"]
+            for formatted_eq in group
+            if formatted_eq["prediction"] and formatted_eq["prediction"]["success"]
+        ]
+        if group_predictions:
+            socketio.emit("prediction_results", group_predictions, to=list(target_rooms))
+
+
+def emit_sequence_updates(sequence_updates):
+    """Sends sequence updates to the rooms of their mainshock."""
+    groups = {}
+    for sequence in sequence_updates:
+        mainshock = sequence["mainshock"]
+        target_rooms = event_rooms(
+            mainshock["magnitude"],
+            mainshock["closest_city"],
+            mainshock["latitude"],
+            mainshock["longitude"],
+        )
+        groups.setdefault(tuple(target_rooms), []).append(sequence)
+
+    for target_rooms, group in groups.items():
+        socketio.emit("sequence_updates", group, to=list(target_rooms))
+
+
+def log_events(events):
+    try:
+        event_log.append(events)
+    except OSError as e:
+        print(f"Olay günlüğüne yazılamadı: {e}")
+
+
+def process_new_earthquakes(new_events):
+    """Handles a poll's new events (oldest first) with one prediction batch and one emit."""
+    log_events(new_events)
+    predictions = predict_for_events(new_events)
+    updates = [format_eq(eq, predictions.get(eq["_id"])) for eq in new_events]
+    sequence_updates = track_sequences(new_events, updates)
+
+    new_predictions = [
+        predictions[eq["_id"]]
+        for eq in new_events
+        if eq["_id"] in predictions and predictions[eq["_id"]]["success"]
+    ]
+    state = live_state.push(updates, new_predictions)
+    publish_snapshot(state, updates[::-1], new_predictions[::-1])
+
+    print(f"Emitting {len(updates)} new earthquake(s):", [u["id"] for u in updates])
+    emit_to_rooms(updates)
+    if sequence_updates:
+        emit_sequence_updates(sequence_updates)
+
+    # Tokens may have been registered through another worker process or node.
+    token_store.reload_if_changed()
+    for formatted_eq in updates:
+        prediction_result = formatted_eq["prediction"]
+        if not prediction_result or not prediction_result["success"]:
+            continue
+        aftermagnitude = prediction_result["predictions"]["aftershock_magnitude"]["value"]
+        notification_dispatcher.dispatch(
+            token_store.tokens_for_event(
+                formatted_eq["magnitude"],
+                formatted_eq["closest_city"],
+                latitude=formatted_eq["coordinates"][1],
+                longitude=formatted_eq["coordinates"][0],
+            ),
+            "Deprem Uyarısı",
+            f"{formatted_eq['closest_city']} bölgesinde {formatted_eq['magnitude']} şiddetinde deprem!\n\nBeklenen ilk artçı şok şiddeti: {aftermagnitude}",
+        )
 
 
 def fetch_and_emit_earthquakes():
-    global last_eq_id, initial_data_sent, initial_data, fcm_tokens, recent_predictions
     while True:
+        if not leader_election.is_leader:
+            time.sleep(leader_election.retry_seconds)
+            continue
+
+        new_events = []
         try:
-            
-            response = requests.get(FAKE_API_URL)
-            data = response.json()
-
-            if data["status"] and data["result"]:
-                earthquakes = data["result"]
-
-                if not initial_data_sent:
-                    initial_data_sent = True
-                    initial_data = [
-                        {
-                            "id": eq["_id"],
-                            "title": eq["title"],
-                            "date": eq["date"],
-                            "datetime": eq["date_time"],
-                            "magnitude": eq["mag"],
-                            "depth": eq["depth"],
-                            "coordinates": eq["geojson"]["coordinates"],
-                            "closest_city": eq["location_properties"]["closestCity"]["name"],
-                            "airports": [
-                                {
-                                    "name": ap["name"],
-                                    "code": ap["code"],
-                                    "distance_km": round(ap["distance"] / 1000, 1),
-                                }
-                                for ap in eq["location_properties"].get("airports", [])
-                            ],
-                        }
-                        for eq in earthquakes[:50]
-                    ]
-                    print("Initial 20 data cached")
-
-                
-                latest_eq = earthquakes[0]
-                print("Latest earthquake ID:", latest_eq["_id"])
-                print("Last earthquake ID:", last_eq_id)
-                if latest_eq["_id"] != last_eq_id or last_eq_id is None:
-                    last_eq_id = latest_eq["_id"]
-                    
-                    formatted_eq = {
-                        "id": latest_eq["_id"],
-                        "title": latest_eq["title"],
-                        "date": latest_eq["date"],
-                        "datetime": latest_eq["date_time"],
-                        "magnitude": latest_eq["mag"],
-                        "depth": latest_eq["depth"],
-                        "coordinates": latest_eq["geojson"]["coordinates"],
-                        "closest_city": latest_eq["location_properties"]["closestCity"]["name"],
-                        "airports": [
-                            {
-                                "name": ap["name"],
-                                "code": ap["code"],
-                                "distance_km": round(ap["distance"] / 1000, 1),
-                            }
-                            for ap in latest_eq["location_properties"].get("airports", [])
-                        ],
-                    }
-                    
-                    initial_data.insert(0, formatted_eq)
-                    
-                    if len(initial_data) > 50:
-                        initial_data = initial_data[:50]
-
-                    prediction_result = None
-                    
-                    if latest_eq["mag"] >= 5.5:
-                        prediction_result = predict_aftershock(
-                            latest_eq["mag"],
-                            latest_eq["depth"],
-                            latest_eq["geojson"]["coordinates"][1],  
-                            latest_eq["geojson"]["coordinates"][0],  
-                            return_format="dict",
-                        )
-                        
-                        prediction_result["id"] = latest_eq["_id"]
-                        prediction_result["timestamp"] = latest_eq["date_time"]
-                        aftermagnitude = prediction_result["predictions"]["aftershock_magnitude"]["value"]
-
-                        
-                        recent_predictions.insert(0, prediction_result)
-                        if len(recent_predictions) > 50:
-                            recent_predictions = recent_predictions[:50]
-
-                        socketio.emit("prediction_result", prediction_result)
-                        for token in fcm_tokens:
-                            send_notification(
-                                token,
-                                "Deprem Uyarısı",
-                                f"{formatted_eq['closest_city']} bölgesinde {formatted_eq['magnitude']} şiddetinde deprem!\n\nBeklenen ilk artçı şok şiddeti: {aftermagnitude}",
-                            )
-                    print(
-                        "Emitting new earthquake:",
-                        format_eq(latest_eq, prediction_result),
-                    )
-                    socketio.emit(
-                        "earthquake_update", format_eq(latest_eq, prediction_result)
-                    )
+            result = ingestion.poll()
+
+            if result.initial:
+                initial_updates = [format_eq(eq) for eq in result.initial]
+                # Sequences still active in the feed window; nothing to push yet.
+                track_sequences(result.initial[::-1], initial_updates[::-1])
+                log_events(result.initial[::-1])
+                state = live_state.push(reversed(initial_updates))
+                publish_snapshot(state, initial_updates)
+                print(f"Initial {len(state.earthquakes)} data cached")
+
+            new_events = result.new
+            if new_events:
+                process_new_earthquakes(new_events)
         except Exception as e:
             print(f"Error: {e}")
 
-        time.sleep(15)
+        time.sleep(ingestion.record_poll(new_events))
 
 
 @socketio.on("connect")
-def on_connect():
+def on_connect(auth=None):
     print("New client connected")
-    if initial_data:
-        emit("initial_earthquakes", initial_data)
-    if recent_predictions:
-        emit("initial_predictions", recent_predictions)
+    join_room(ALL_ROOM)
+    # Clients may pass {"snapshot_version": n} to receive only what changed since n.
+    since_version = auth.get("snapshot_version") if isinstance(auth, dict) else None
+    snapshot = snapshot_store.current()
+    delta = snapshot_store.delta(since_version) if since_version is not None else None
+    # The client is connected to this worker; there is no need to go through Redis.
+    if delta is not None:
+        emit("snapshot_delta", delta, ignore_queue=True)
+    else:
+        if snapshot.earthquake_count:
+            emit("initial_earthquakes", snapshot.earthquakes, ignore_queue=True)
+        if snapshot.prediction_count:
+            emit("initial_predictions", snapshot.predictions, ignore_queue=True)
+    emit("snapshot_version", snapshot.version, ignore_queue=True)
+
+
+@socketio.on("subscribe")
+def on_subscribe(data):
+    """
+    Narrows the client's live updates to the given cities and/or location
+    ({"cities": [...], "latitude", "longitude", "min_magnitude"}). An empty
+    subscription goes back to receiving every event.
+    """
+    if not isinstance(data, dict):
+        return {"status": "error", "error": "Subscription must be an object"}
+    error = validate_subscription_fields(data)
+    if error:
+        return {"status": "error", "error": error}
+    cities = data.get("cities") or []
+    if not isinstance(cities, list) or not all(isinstance(c, str) for c in cities):
+        return {"status": "error", "error": "cities must be a list of names"}
+
+    target_rooms = subscription_rooms(
+        cities,
+        latitude=data.get("latitude"),
+        longitude=data.get("longitude"),
+        min_magnitude=data.get("min_magnitude"),
+    ) or [ALL_ROOM]
+    for room in rooms():
+        if room != request.sid and room not in target_rooms:
+            leave_room(room)
+    for room in target_rooms:
+        join_room(room)
+    return {"status": "ok", "rooms": target_rooms}
 
 
 @app.route("/ws")
@@ -186,9 +401,11 @@ def index():
             });
         });
 
-        // Yeni deprem geldikçe en üste ekle
-        socket.on('earthquake_update', function(data) {
-            container.innerHTML = renderEarthquake(data) + container.innerHTML;
+        // Yeni depremler (eskiden yeniye) geldikçe en üste ekle
+        socket.on('earthquake_updates', function(dataList) {
+            dataList.forEach(function(data) {
+                container.innerHTML = renderEarthquake(data) + container.innerHTML;
+            });
         });
 
 
@@ -218,17 +435,189 @@ def index():
 
 
 
-earthquake_thread = threading.Thread(target=fetch_and_emit_earthquakes, daemon=True)
-earthquake_thread.start()
+earthquake_thread = None
+
+
+def on_elected():
+    global earthquake_thread
+    shared = snapshot_store.current()
+    if shared.version != snapshot_cache.version:
+        # Taking over from another process: keep its predictions and continue its
+        # version numbers. Its last feed window counts as processed, so nothing it
+        # already notified is sent again; the earthquakes and sequences of that
+        # window come back with this process's first poll.
+        ingestion.restore(snapshot_store.feed_state() or {})
+        event_log.reload()
+        live_state.reset(json.loads(shared.predictions.text))
+        sequence_tracker.clear()
+        snapshot_cache.rebase(shared.version + 1)
+    if earthquake_thread is None:
+        earthquake_thread = threading.Thread(target=fetch_and_emit_earthquakes, daemon=True)
+        earthquake_thread.start()
+
+
+leader_election = LeaderElection(leader_lock, on_elected=on_elected)
+leader_election.start()
+
+
+def validate_subscription_fields(data):
+    """Returns an error message for invalid filter/location fields, else None."""
+    min_magnitude = data.get("min_magnitude")
+    latitude = data.get("latitude")
+    longitude = data.get("longitude")
+    radius_km = data.get("radius_km")
+    for name, value in (
+        ("min_magnitude", min_magnitude),
+        ("latitude", latitude),
+        ("longitude", longitude),
+        ("radius_km", radius_km),
+    ):
+        if value is not None and (
+            isinstance(value, bool) or not isinstance(value, (int, float))
+        ):
+            return f"{name} must be numeric"
+        if value is not None and not math.isfinite(value):
+            return f"{name} must be finite"
+    for name in ("region", "platform"):
+        if data.get(name) is not None and not isinstance(data[name], str):
+            return f"{name} must be a string"
+    if (latitude is None) != (longitude is None):
+        return "latitude and longitude must be given together"
+    if latitude is not None and not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return "Invalid coordinates"
+    if radius_km is not None and radius_km <= 0:
+        return "radius_km must be positive"
+    return None
+
+
+def parse_catalog_query(args):
+    """Returns (query keyword arguments, error message) for /catalog/query."""
+    numbers = {}
+    for name, kind in CATALOG_QUERY_PARAMETERS:
+        if kind != "number" or args.get(name) is None:
+            continue
+        try:
+            numbers[name] = float(args[name])
+        except ValueError:
+            return None, f"{name} must be numeric"
+        if not math.isfinite(numbers[name]):
+            return None, f"{name} must be finite"
+
+    bbox_fields = [numbers.get(name) for name in ("min_lat", "max_lat", "min_lon", "max_lon")]
+    circle_fields = [numbers.get(name) for name in ("latitude", "longitude", "radius_km")]
+    query = {
+        "min_magnitude": numbers.get("min_magnitude"),
+        "max_magnitude": numbers.get("max_magnitude"),
+    }
+    if any(value is not None for value in bbox_fields):
+        if any(value is not None for value in circle_fields):
+            return None, "Use either a bounding box or latitude/longitude/radius_km"
+        if any(value is None for value in bbox_fields):
+            return None, "min_lat, max_lat, min_lon and max_lon must be given together"
+        min_lat, max_lat, min_lon, max_lon = bbox_fields
+        if not (
+            -90 <= min_lat <= max_lat <= 90
+            and -180 <= min_lon <= 180
+            and -180 <= max_lon <= 180
+        ):
+            return None, "Invalid bounding box"
+        query["bbox"] = (min_lat, max_lat, min_lon, max_lon)
+    elif any(value is not None for value in circle_fields):
+        if any(value is None for value in circle_fields):
+            return None, "latitude, longitude and radius_km must be given together"
+        latitude, longitude, radius_km = circle_fields
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return None, "Invalid coordinates"
+        if radius_km <= 0:
+            return None, "radius_km must be positive"
+        query["center"] = (latitude, longitude)
+        query["radius_km"] = radius_km
+
+    for name in ("start", "end"):
+        if args.get(name):
+            try:
+                query[name] = parse_event_time(args[name])
+            except ValueError:
+                return None, f"{name} must be an ISO 8601 time"
+    if query.get("start") and query.get("end") and query["start"] > query["end"]:
+        return None, "start must not be after end"
+    return query, None
+
+
+def parse_catalog_paging(args):
+    """Returns ((limit, offset, descending), error message) for /catalog/query."""
+    try:
+        limit = int(args.get("limit", CATALOG_PAGE_SIZE))
+        offset = int(args.get("offset", 0))
+    except ValueError:
+        return None, "limit and offset must be integers"
+    if not (0 < limit <= CATALOG_MAX_PAGE_SIZE and offset >= 0):
+        return None, f"limit must be between 1 and {CATALOG_MAX_PAGE_SIZE}, offset non-negative"
+    order = args.get("order", "desc")
+    if order not in ("asc", "desc"):
+        return None, "order must be asc or desc"
+    return (limit, offset, order == "desc"), None
+
+
+@app.route("/catalog/query", methods=["GET"])
+@swag_from(
+    {
+        "parameters": [
+            {"name": name, "in": "query", "type": kind, "required": False}
+            for name, kind in CATALOG_QUERY_PARAMETERS
+        ],
+        "responses": {
+            200: {"description": "Historical catalog events, newest first by default"}
+        },
+    }
+)
+def api_catalog_query():
+    query, error = parse_catalog_query(request.args)
+    if error is None:
+        paging, error = parse_catalog_paging(request.args)
+    if error is not None:
+        return {"success": False, "error": error, "error_code": "INVALID_QUERY"}, 400
+
+    limit, offset, descending = paging
+    catalog_index = get_catalog_index()
+    page, total = catalog_index.query_page(offset, limit, descending, **query)
+    meta = {
+        "success": True,
+        "total": total,
+        "offset": offset,
+        "count": int(page.size),
+        "next_offset": offset + limit if offset + limit < total else None,
+    }
+    return Response(
+        stream_with_context(catalog_index.iter_json(page, meta, query.get("center"))),
+        mimetype="application/json",
+    )
 
 
 @app.route("/register-token", methods=["POST"])
 def register_token():
-    global fcm_tokens
     data = request.get_json()
+    if not isinstance(data, dict):
+        return {"status": "error", "error": "Body must be an object"}, 400
     token = data.get("token")
-    if token and token not in fcm_tokens:
-        fcm_tokens.append(token)
+    if not isinstance(token, str) or not token:
+        return {"status": "error", "error": "token must be a non-empty string"}, 400
+    min_magnitude = data.get("min_magnitude")
+    latitude = data.get("latitude")
+    longitude = data.get("longitude")
+    radius_km = data.get("radius_km")
+    error = validate_subscription_fields(data)
+    if error:
+        return {"status": "error", "error": error}, 400
+    if token_store.register(
+        token,
+        platform=data.get("platform"),
+        region=data.get("region"),
+        min_magnitude=min_magnitude,
+        latitude=latitude,
+        longitude=longitude,
+        radius_km=radius_km,
+    ):
         print("Yeni FCM token kaydedildi:", token)
     return {"status": "ok"}, 200
 
@@ -278,7 +667,7 @@ def api_predict():
     return jsonify(result)
 
 
-""" @app.route("/batch_predict", methods=["POST"])
+@app.route("/batch_predict", methods=["POST"])
 @swag_from(
     {
         "parameters": [
@@ -314,13 +703,57 @@ def api_predict():
         ],
         "responses": {200: {"description": "Batch aftershock predictions"}},
     }
-) """
+)
+def api_batch_predict():
+    data = request.json
+    result = batch_predict_aftershocks(data["earthquakes"], return_format="dict")
+    return jsonify(result)
 
 
-""" def api_batch_predict():
+@app.route("/forecast", methods=["POST"])
+@swag_from(
+    {
+        "parameters": [
+            {
+                "name": "body",
+                "in": "body",
+                "required": True,
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "magnitude": {"type": "number"},
+                        "hours_since_mainshock": {"type": "number"},
+                        "min_magnitude": {"type": "number"},
+                        "horizons_hours": {"type": "array", "items": {"type": "number"}},
+                    },
+                    "required": ["magnitude"],
+                },
+            }
+        ],
+        "responses": {
+            200: {
+                "description": "Expected aftershock counts (Omori-Utsu)",
+                "examples": {
+                    "application/json": {
+                        "forecast": [
+                            {"horizon_hours": 24, "expected_count": 3.4, "probability": 0.97}
+                        ]
+                    }
+                },
+            }
+        },
+    }
+)
+def api_forecast():
     data = request.json
-    result = batch_predict_aftershocks(data["earthquakes"], return_format="dict")
-    return jsonify(result) """
+    result = forecast_aftershocks(
+        data["magnitude"],
+        data.get("hours_since_mainshock", 0.0),
+        data.get("min_magnitude"),
+        data.get("horizons_hours"),
+        return_format="dict",
+    )
+    return jsonify(result)
 
 
 @app.route("/status", methods=["GET"])
@@ -328,14 +761,33 @@ def api_predict():
     {
         "responses": {
             200: {
-                "description": "Model status",
-                "examples": {"application/json": {"status": "ready"}},
+                "description": "Model status; model_state is loading during the warm-up",
+                "examples": {
+                    "application/json": {"model_state": "ready", "both_models_ready": True}
+                },
             }
         }
     }
 )
 def api_status():
-    return jsonify(check_model_status())
+    return jsonify({**check_model_status(), "startup": startup_timer.summary()})
+
+
+@app.route("/admin/reload-models", methods=["POST"])
+def api_reload_models():
+    if not ADMIN_TOKEN:
+        return {"success": False, "error": "Admin endpoints are disabled"}, 403
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN):
+        return {"success": False, "error": "Invalid admin token"}, 401
+    data = request.get_json(silent=True) or {}
+    result = reload_models(force=bool(data.get("force")))
+    return jsonify(result), 200 if result["success"] else 500
+
+
+if LAZY_INIT:
+    # The server accepts connections while the models load; early requests wait for them.
+    start_model_warmup()
+startup_timer.mark_ready()
 
 
 if __name__ == "__main__":
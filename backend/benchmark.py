@@ -0,0 +1,336 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+import numpy as np
+
+SECTIONS = ("single", "batch", "sequences", "end_to_end")
+BATCH_SIZES = [1, 10, 100, 1_000, 10_000, 100_000]
+QUICK_BATCH_SIZES = [1, 10, 100, 1_000]
+SINGLE_CALLS = 2_000
+END_TO_END_POLLS = 50
+SEQUENCE_FRACTIONS = [0.125, 0.25, 0.5, 1.0]
+# Share of end-to-end events large enough to be predicted (M >= 5.5).
+END_TO_END_LARGE_SHARE = 0.3
+RANDOM_SEED = 42
+
+
+def _percentiles(seconds: List[float]) -> Dict:
+    """Latency summary in microseconds."""
+    samples = np.asarray(seconds) * 1e6
+    return {
+        "calls": int(samples.size),
+        "mean_us": round(float(samples.mean()), 2),
+        "p50_us": round(float(np.percentile(samples, 50)), 2),
+        "p90_us": round(float(np.percentile(samples, 90)), 2),
+        "p99_us": round(float(np.percentile(samples, 99)), 2),
+        "max_us": round(float(samples.max()), 2),
+    }
+
+
+def _time_calls(calls: List[Callable]) -> Dict:
+    seconds = []
+    for call in calls:
+        started = time.perf_counter()
+        call()
+        seconds.append(time.perf_counter() - started)
+    return _percentiles(seconds)
+
+
+def _random_inputs(rng, n: int) -> np.ndarray:
+    """Mainshock inputs around Turkey at catalog precision."""
+    return np.column_stack(
+        [
+            np.round(rng.uniform(5.5, 7.8, n), 1),
+            np.round(rng.uniform(2.0, 40.0, n), 1),
+            np.round(rng.uniform(36.0, 42.0, n), 4),
+            np.round(rng.uniform(26.0, 45.0, n), 4),
+        ]
+    )
+
+
+def _feed_event(i: int, row) -> Dict:
+    magnitude, depth, latitude, longitude = (float(value) for value in row)
+    return {
+        "_id": f"benchmark-{i}",
+        "title": "Benchmark",
+        "date": "01.01.2025",
+        "date_time": "2025-01-01 12:00:00",
+        "mag": magnitude,
+        "depth": depth,
+        "geojson": {"coordinates": [longitude, latitude]},
+        "location_properties": {
+            "closestCity": {"name": "Malatya", "distance": 1.0},
+            "airports": [{"name": "Malatya", "code": "MLX", "distance": 25000}],
+        },
+    }
+
+
+def bench_single(calls: int) -> Dict:
+    import main
+
+    rng = np.random.default_rng(RANDOM_SEED)
+    inputs = _random_inputs(rng, calls).tolist()
+    if main.prediction_cache is not None:
+        main.prediction_cache.clear()
+    results = {
+        "predict_aftershock": _time_calls(
+            [lambda row=row: main.predict_aftershock(*row) for row in inputs]
+        ),
+        # The same inputs again: served from the prediction cache when it is enabled.
+        "predict_aftershock_repeated": _time_calls(
+            [lambda row=row: main.predict_aftershock(*row) for row in inputs]
+        ),
+        "format_eq": _time_calls(
+            [lambda eq=_feed_event(i, row): main.format_eq(eq) for i, row in enumerate(inputs)]
+        ),
+    }
+    if main._get_forecaster() is not None:
+        results["forecast_aftershocks"] = _time_calls(
+            [lambda row=row: main.forecast_aftershocks(row[0]) for row in inputs]
+        )
+    return results
+
+
+def bench_batch(sizes: List[int]) -> List[Dict]:
+    import main
+
+    rng = np.random.default_rng(RANDOM_SEED)
+    results = []
+    for size in sizes:
+        earthquakes = [
+            dict(zip(main.REQUIRED_FIELDS, row)) for row in _random_inputs(rng, size).tolist()
+        ]
+        if main.prediction_cache is not None:
+            main.prediction_cache.clear()
+        started = time.perf_counter()
+        result = main.batch_predict_aftershocks(earthquakes)
+        seconds = time.perf_counter() - started
+        if not result["success"]:
+            raise RuntimeError(result["error"])
+        results.append(
+            {
+                "size": size,
+                "seconds": round(seconds, 6),
+                "rows_per_second": round(size / seconds, 1),
+                "us_per_row": round(seconds / size * 1e6, 2),
+            }
+        )
+    return results
+
+
+def bench_sequences(fractions: List[float]) -> List[Dict]:
+    from catalog import load_catalog
+    from sequences import identify_mainshock_aftershock_sequences
+
+    catalog = load_catalog()
+    results = []
+    for fraction in fractions:
+        rows = max(1, int(len(catalog) * fraction))
+        subset = catalog.iloc[:rows]
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            feature_df = identify_mainshock_aftershock_sequences(subset)
+        seconds = time.perf_counter() - started
+        results.append(
+            {
+                "catalog_rows": rows,
+                "sequences": len(feature_df),
+                "seconds": round(seconds, 6),
+            }
+        )
+    return results
+
+
+def _serve_fakeapi():
+    """fakeapi.py's app on a free local port in a background thread."""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    import fakeapi
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server(
+        "127.0.0.1", 0, fakeapi.app, threaded=True, request_handler=QuietHandler
+    )
+    threading.Thread(target=server.serve_forever, daemon=True, name="fakeapi").start()
+    return server, f"http://127.0.0.1:{server.server_port}/deprem/kandilli"
+
+
+def bench_end_to_end(polls: int) -> Dict:
+    """
+    One new fakeapi event per poll, then the work process_new_earthquakes does
+    for it without the socket and FCM I/O: ingestion poll, batched prediction,
+    format_eq and serialization of the emitted payload.
+    """
+    import requests
+
+    import main
+    from ingestion import IngestionPipeline, KandilliSource
+    from snapshot import SnapshotJSON
+
+    server, base_url = _serve_fakeapi()
+    rng = np.random.default_rng(RANDOM_SEED)
+    ingestion = IngestionPipeline([KandilliSource("fakeapi", base_url + "/live")])
+    cycle_seconds = []
+    stage_seconds = {"poll": [], "predict": [], "format": [], "serialize": []}
+    predicted = 0
+    # fakeapi prints on every request; stdout may be the JSON report.
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            ingestion.poll()
+            for _ in range(polls):
+                magnitude = (
+                    round(float(rng.uniform(5.5, 7.5)), 1)
+                    if rng.random() < END_TO_END_LARGE_SHARE
+                    else round(float(rng.uniform(2.0, 5.4)), 1)
+                )
+                requests.post(
+                    base_url + "/add",
+                    json={
+                        "lat": round(float(rng.uniform(36.0, 42.0)), 4),
+                        "lng": round(float(rng.uniform(26.0, 45.0)), 4),
+                        "depth": round(float(rng.uniform(2.0, 40.0)), 1),
+                        "mag": magnitude,
+                        "closest_city": "Malatya",
+                    },
+                    timeout=5,
+                )
+
+                started = time.perf_counter()
+                new_events = ingestion.poll().new
+                polled = time.perf_counter()
+                candidates = [eq for eq in new_events if eq["mag"] >= 5.5]
+                predictions = {}
+                if candidates:
+                    batch = main.batch_predict_aftershocks(
+                        [
+                            {
+                                "magnitude": eq["mag"],
+                                "depth": eq["depth"],
+                                "latitude": eq["geojson"]["coordinates"][1],
+                                "longitude": eq["geojson"]["coordinates"][0],
+                            }
+                            for eq in candidates
+                        ]
+                    )
+                    predictions = {
+                        eq["_id"]: prediction
+                        for eq, prediction in zip(candidates, batch["predictions"])
+                    }
+                predicted_at = time.perf_counter()
+                updates = [main.format_eq(eq, predictions.get(eq["_id"])) for eq in new_events]
+                formatted = time.perf_counter()
+                SnapshotJSON.dumps(updates)
+                finished = time.perf_counter()
+
+                predicted += len(predictions)
+                cycle_seconds.append(finished - started)
+                stage_seconds["poll"].append(polled - started)
+                stage_seconds["predict"].append(predicted_at - polled)
+                stage_seconds["format"].append(formatted - predicted_at)
+                stage_seconds["serialize"].append(finished - formatted)
+        finally:
+            server.shutdown()
+
+    return {
+        "polls": polls,
+        "predicted_events": predicted,
+        "cycle": _percentiles(cycle_seconds),
+        "stages": {name: _percentiles(seconds) for name, seconds in stage_seconds.items()},
+    }
+
+
+def _environment() -> Dict:
+    import lightgbm
+    import sklearn
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "lightgbm": lightgbm.__version__,
+        "scikit_learn": sklearn.__version__,
+        "env": {
+            name: value for name, value in os.environ.items() if name.startswith("AFTERSHOCK_")
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Latency and throughput benchmarks; prints (or writes) one JSON document."
+    )
+    parser.add_argument("--only", nargs="+", choices=SECTIONS, default=list(SECTIONS))
+    parser.add_argument("--quick", action="store_true", help="smaller sizes for a fast check")
+    parser.add_argument("--output", help="write the JSON here instead of stdout")
+    args = parser.parse_args()
+
+    import main as service
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        bundle = service.model_registry.get()
+    if bundle is None:
+        sys.exit("Model dosyaları yüklenemedi; benchmark çalıştırılamıyor.")
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": _environment(),
+        "model": {
+            "version": bundle.version,
+            "inference_mode": bundle.inference_mode,
+            "prediction_cache": service.prediction_cache is not None,
+        },
+        "results": {},
+    }
+    runs = {
+        "single": lambda: bench_single(SINGLE_CALLS // 10 if args.quick else SINGLE_CALLS),
+        "batch": lambda: bench_batch(QUICK_BATCH_SIZES if args.quick else BATCH_SIZES),
+        "sequences": lambda: bench_sequences(
+            SEQUENCE_FRACTIONS[-2:] if args.quick else SEQUENCE_FRACTIONS
+        ),
+        "end_to_end": lambda: bench_end_to_end(
+            END_TO_END_POLLS // 5 if args.quick else END_TO_END_POLLS
+        ),
+    }
+    for section in SECTIONS:
+        if section in args.only:
+            print(f"{section}...", file=sys.stderr)
+            report["results"][section] = runs[section]()
+    report["seconds"] = round(time.perf_counter() - started, 3)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"{args.output} yazıldı", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+CATALOG_FILES = [
+    os.path.join(DATA_DIR, "1990-2000.csv"),
+    os.path.join(DATA_DIR, "2000-2025.csv"),
+]
+CATALOG_COLUMNS = ["time", "latitude", "longitude", "depth", "mag"]
+CACHE_DIR_NAME = ".cache"
+CACHE_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+
+def default_cache_dir(paths: List[str]) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(paths[0])), CACHE_DIR_NAME)
+
+
+def _file_stat(path: str) -> Dict:
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _file_sha1(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_and_clean_csv(paths: List[str]) -> pd.DataFrame:
+    df = pd.concat([pd.read_csv(path) for path in paths], ignore_index=True)
+
+    df["time"] = pd.to_datetime(df["time"], errors="coerce")
+    df.dropna(subset=["time"], inplace=True)
+
+    required_cols = ["latitude", "longitude", "depth", "mag"]
+    df.dropna(subset=required_cols, inplace=True)
+
+    df["mag"] = pd.to_numeric(df["mag"], errors="coerce")
+    df.dropna(subset=["mag"], inplace=True)
+
+    df = df.sort_values(by="time").reset_index(drop=True)
+    return df[CATALOG_COLUMNS]
+
+
+def _save_array(cache_dir: str, name: str, values: np.ndarray) -> None:
+    tmp_path = os.path.join(cache_dir, f"{name}.npy.tmp")
+    with open(tmp_path, "wb") as f:
+        np.save(f, values)
+    os.replace(tmp_path, os.path.join(cache_dir, f"{name}.npy"))
+
+
+def _write_manifest(cache_dir: str, manifest: Dict) -> None:
+    tmp_path = os.path.join(cache_dir, MANIFEST_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(cache_dir, MANIFEST_FILE))
+
+
+def build_catalog_cache(paths: List[str], cache_dir: str) -> Dict:
+    """CSV kataloğunu okur ve sütun bazlı .npy önbelleğine yazar."""
+    df = _read_and_clean_csv(paths)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    times = pd.DatetimeIndex(df["time"])
+    _save_array(cache_dir, "time", times.asi8)
+    for column in CATALOG_COLUMNS[1:]:
+        # float64 is kept so that cached catalogs produce the same features as the CSVs.
+        _save_array(cache_dir, column, df[column].to_numpy(dtype=np.float64))
+
+    manifest = {
+        "format_version": CACHE_FORMAT_VERSION,
+        "rows": len(df),
+        "time_unit": times.unit,
+        "time_tz": str(times.tz) if times.tz is not None else None,
+        "sources": [
+            {"path": os.path.abspath(path), "sha1": _file_sha1(path), **_file_stat(path)}
+            for path in paths
+        ],
+    }
+    _write_manifest(cache_dir, manifest)
+    print(f"Katalog önbelleği oluşturuldu: {cache_dir} ({len(df)} kayıt)")
+    return manifest
+
+
+def _manifest_is_current(manifest: Optional[Dict], paths: List[str], cache_dir: str) -> bool:
+    if not manifest or manifest.get("format_version") != CACHE_FORMAT_VERSION:
+        return False
+    sources = manifest.get("sources", [])
+    if [source["path"] for source in sources] != [os.path.abspath(p) for p in paths]:
+        return False
+
+    touched = False
+    for source, path in zip(sources, paths):
+        stat = _file_stat(path)
+        if stat["size"] == source["size"] and stat["mtime_ns"] == source["mtime_ns"]:
+            continue
+        # mtime changed (e.g. a fresh checkout): only the content hash decides.
+        if stat["size"] != source["size"] or _file_sha1(path) != source["sha1"]:
+            return False
+        source.update(stat)
+        touched = True
+
+    if touched:
+        _write_manifest(cache_dir, manifest)
+    return True
+
+
+def _read_manifest(cache_dir: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_catalog_arrays(
+    paths: Optional[List[str]] = None, cache_dir: Optional[str] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Katalog sütunlarını salt okunur bellek eşlemeli dizi olarak döndürür.
+    'time' UTC epoch (int64, birimi 'time_unit'), diğerleri float64'tür. Kaynak CSV'ler
+    değiştiyse önbellek yeniden oluşturulur.
+    """
+    paths = paths or CATALOG_FILES
+    cache_dir = cache_dir or default_cache_dir(paths)
+
+    manifest = _read_manifest(cache_dir)
+    if not _manifest_is_current(manifest, paths, cache_dir):
+        manifest = build_catalog_cache(paths, cache_dir)
+
+    arrays = {
+        column: np.load(os.path.join(cache_dir, f"{column}.npy"), mmap_mode="r")
+        for column in CATALOG_COLUMNS
+    }
+    arrays["time_unit"] = manifest["time_unit"]
+    arrays["time_tz"] = manifest["time_tz"]
+    return arrays
+
+
+def load_catalog(
+    paths: Optional[List[str]] = None, cache_dir: Optional[str] = None
+) -> pd.DataFrame:
+    arrays = load_catalog_arrays(paths, cache_dir)
+    times = pd.DatetimeIndex(arrays["time"].view(f"datetime64[{arrays['time_unit']}]"))
+    if arrays["time_tz"] is not None:
+        times = times.tz_localize("UTC").tz_convert(arrays["time_tz"])
+
+    columns = {"time": times}
+    # np.asarray drops the memmap subclass but keeps the mapped buffer (no copy).
+    columns.update({column: np.asarray(arrays[column]) for column in CATALOG_COLUMNS[1:]})
+    return pd.DataFrame(columns, copy=False)
+
+
+def load_and_preprocess_data(file1_path, file2_path, use_cache=True):
+    """Veriyi yükler, birleştirir ve temel ön işlemeleri yapar."""
+    paths = [file1_path, file2_path]
+    try:
+        df = load_catalog(paths) if use_cache else _read_and_clean_csv(paths)
+    except FileNotFoundError:
+        print(
+            f"HATA: Veri dosyaları bulunamadı. Lütfen dosya yollarını kontrol edin: {file1_path}, {file2_path}"
+        )
+        return None
+
+    print(f"Toplam {len(df)} deprem verisi yüklendi ve işlendi.")
+    print("İlk 5 satır:\n", df.head())
+    print("\nVeri tipleri:\n", df.dtypes)
+    print(f"\nMinimum Tarih: {df['time'].min()}, Maksimum Tarih: {df['time'].max()}")
+    return df
@@ -0,0 +1,224 @@
+import json
+import threading
+from datetime import datetime
+from math import cos, radians
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from geo import KM_PER_DEGREE_LAT, haversine_np
+
+CELL_DEGREES = 1.0
+LAT_CELLS = int(180 / CELL_DEGREES)
+LON_CELLS = int(360 / CELL_DEGREES)
+UNITS_PER_SECOND = {"s": 1, "ms": 1_000, "us": 1_000_000, "ns": 1_000_000_000}
+JSON_CHUNK_ROWS = 1000
+
+# (min_lat, max_lat, min_lon, max_lon); min_lon > max_lon crosses the antimeridian.
+BBox = Tuple[float, float, float, float]
+
+
+def _lat_rows(min_lat: float, max_lat: float) -> np.ndarray:
+    first = min(int((min_lat + 90) // CELL_DEGREES), LAT_CELLS - 1)
+    last = min(int((max_lat + 90) // CELL_DEGREES), LAT_CELLS - 1)
+    return np.arange(first, last + 1)
+
+
+def _lon_cols(min_lon: float, max_lon: float) -> np.ndarray:
+    first = min(int((min_lon + 180) // CELL_DEGREES), LON_CELLS - 1)
+    last = min(int((max_lon + 180) // CELL_DEGREES), LON_CELLS - 1)
+    if first <= last:
+        return np.arange(first, last + 1)
+    return np.concatenate([np.arange(first, LON_CELLS), np.arange(0, last + 1)])
+
+
+def radius_bbox(latitude: float, longitude: float, radius_km: float) -> BBox:
+    """Smallest lat/lon box around the circle (the whole longitude range near the poles)."""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    min_lat = max(-90.0, latitude - dlat)
+    max_lat = min(90.0, latitude + dlat)
+    cos_lat = cos(radians(max(abs(min_lat), abs(max_lat))))
+    if cos_lat <= 1e-9 or radius_km / (KM_PER_DEGREE_LAT * cos_lat) >= 180:
+        return min_lat, max_lat, -180.0, 180.0
+    dlon = radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+    min_lon = (longitude - dlon + 180) % 360 - 180
+    max_lon = (longitude + dlon + 180) % 360 - 180
+    return min_lat, max_lat, min_lon, max_lon
+
+
+class CatalogIndex:
+    """
+    The catalog as time-sorted columns plus a 1-degree grid: row numbers are
+    sorted by (cell, time), so a query binary-searches its time range in every
+    cell the box covers (all cells at once) and only the rows in those ranges
+    are filtered exactly. Rows are positions in the time-sorted columns, so
+    sorting them again restores time order.
+    """
+
+    def __init__(self, arrays: Dict):
+        self.time = np.asarray(arrays["time"])
+        self.time_unit = arrays["time_unit"]
+        self.latitude = np.asarray(arrays["latitude"])
+        self.longitude = np.asarray(arrays["longitude"])
+        self.depth = np.asarray(arrays["depth"])
+        self.mag = np.asarray(arrays["mag"])
+        self._units_per_second = UNITS_PER_SECOND[self.time_unit]
+
+        if self.time.size and np.any(np.diff(self.time) < 0):
+            raise ValueError("catalog columns must be sorted by time")
+        # Whole seconds since the first event; the key only narrows the search.
+        seconds = self.time // self._units_per_second
+        self._first_second = int(seconds[0]) if seconds.size else 0
+        self._span = int(seconds[-1]) - self._first_second + 1 if seconds.size else 1
+        cells = self._cells(self.latitude, self.longitude)
+        keys = cells * self._span + (seconds - self._first_second)
+        self._order = np.argsort(keys, kind="stable")
+        self._keys = keys[self._order]
+
+    def __len__(self) -> int:
+        return self.time.size
+
+    @staticmethod
+    def _cells(latitude, longitude) -> np.ndarray:
+        rows = np.clip(((latitude + 90) // CELL_DEGREES).astype(np.int64), 0, LAT_CELLS - 1)
+        cols = np.clip(((longitude + 180) // CELL_DEGREES).astype(np.int64), 0, LON_CELLS - 1)
+        return rows * LON_CELLS + cols
+
+    def _to_units(self, value: datetime) -> int:
+        return int(round(value.timestamp() * self._units_per_second))
+
+    def _second_offset(self, value: Optional[int], default: int) -> int:
+        if value is None:
+            return default
+        offset = value // self._units_per_second - self._first_second
+        # Offsets stay inside the cell's key range [0, span); one past it is the next cell.
+        return int(min(max(offset, 0), self._span - 1))
+
+    def query(self, **filters) -> np.ndarray:
+        """Rows (oldest first) matching the filters of _matching_rows."""
+        return np.sort(self._matching_rows(**filters))
+
+    def query_page(
+        self, offset: int, limit: int, descending: bool = False, **filters
+    ) -> Tuple[np.ndarray, int]:
+        """
+        Rows offset to offset + limit of the query in time order (newest first
+        if descending) and the total number of matching rows. Only the page is
+        sorted; the rows before it are found with a partial sort.
+        """
+        rows = self._matching_rows(**filters)
+        total = int(rows.size)
+        stop = min(offset + limit, total)
+        if offset >= stop:
+            return np.array([], dtype=np.int64), total
+        # Rows are unique, so ranking -rows gives newest first.
+        keys = -rows if descending else rows
+        if stop < total:
+            keys = np.partition(keys, stop - 1)[:stop]
+        if offset:
+            keys = np.partition(keys, offset)[offset:]
+        keys = np.sort(keys)
+        return (-keys if descending else keys), total
+
+    def _matching_rows(
+        self,
+        bbox: Optional[BBox] = None,
+        center: Optional[Tuple[float, float]] = None,
+        radius_km: Optional[float] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        min_magnitude: Optional[float] = None,
+        max_magnitude: Optional[float] = None,
+    ) -> np.ndarray:
+        """Unsorted rows inside bbox or the circle, in [start, end] and the magnitude range."""
+        if center is not None:
+            bbox = radius_bbox(center[0], center[1], radius_km)
+        if bbox is None:
+            bbox = (-90.0, 90.0, -180.0, 180.0)
+        min_lat, max_lat, min_lon, max_lon = bbox
+
+        start_units = self._to_units(start) if start is not None else None
+        end_units = self._to_units(end) if end is not None else None
+        cells = (
+            _lat_rows(min_lat, max_lat)[:, None] * LON_CELLS + _lon_cols(min_lon, max_lon)
+        ).ravel()
+        base = cells * self._span
+        lo = np.searchsorted(self._keys, base + self._second_offset(start_units, 0))
+        hi = np.searchsorted(
+            self._keys, base + self._second_offset(end_units, self._span - 1) + 1
+        )
+
+        lengths = hi - lo
+        total = int(lengths.sum())
+        if total == 0:
+            return np.array([], dtype=np.int64)
+        # Concatenates the ranges [lo, hi) without a Python loop over the cells.
+        positions = np.repeat(lo - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        rows = self._order[positions]
+
+        lat = self.latitude[rows]
+        lon = self.longitude[rows]
+        keep = (lat >= min_lat) & (lat <= max_lat)
+        if min_lon <= max_lon:
+            keep &= (lon >= min_lon) & (lon <= max_lon)
+        else:
+            keep &= (lon >= min_lon) | (lon <= max_lon)
+        if center is not None:
+            keep &= haversine_np(center[0], center[1], lat, lon) <= radius_km
+        if start_units is not None:
+            keep &= self.time[rows] >= start_units
+        if end_units is not None:
+            keep &= self.time[rows] <= end_units
+        if min_magnitude is not None:
+            keep &= self.mag[rows] >= min_magnitude
+        if max_magnitude is not None:
+            keep &= self.mag[rows] <= max_magnitude
+        return rows[keep]
+
+    def records(self, rows: np.ndarray, center: Optional[Tuple[float, float]] = None) -> List[Dict]:
+        times = np.datetime_as_string(
+            self.time[rows].view(f"datetime64[{self.time_unit}]"), unit="s", timezone="UTC"
+        )
+        columns = {
+            "time": times.tolist(),
+            "latitude": self.latitude[rows].tolist(),
+            "longitude": self.longitude[rows].tolist(),
+            "depth": self.depth[rows].tolist(),
+            "magnitude": self.mag[rows].tolist(),
+        }
+        if center is not None:
+            columns["distance_km"] = np.round(
+                haversine_np(center[0], center[1], self.latitude[rows], self.longitude[rows]), 1
+            ).tolist()
+        names = list(columns)
+        return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+    def iter_json(
+        self,
+        rows: np.ndarray,
+        meta: Dict,
+        center: Optional[Tuple[float, float]] = None,
+        chunk_rows: int = JSON_CHUNK_ROWS,
+    ) -> Iterator[str]:
+        """``{**meta, "events": [...]}`` as text chunks, so large pages are never built in full."""
+        yield json.dumps(meta)[:-1] + ', "events": ['
+        for chunk_start in range(0, rows.size, chunk_rows):
+            chunk = json.dumps(self.records(rows[chunk_start : chunk_start + chunk_rows], center))
+            yield ("," if chunk_start else "") + chunk[1:-1]
+        yield "]}"
+
+
+_catalog_index: Optional[CatalogIndex] = None
+_catalog_index_lock = threading.Lock()
+
+
+def get_catalog_index() -> CatalogIndex:
+    """The index over data/*.csv, built on first use from the catalog cache."""
+    global _catalog_index
+    if _catalog_index is None:
+        with _catalog_index_lock:
+            if _catalog_index is None:
+                from catalog import load_catalog_arrays
+
+                _catalog_index = CatalogIndex(load_catalog_arrays())
+    return _catalog_index
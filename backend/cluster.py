@@ -0,0 +1,222 @@
+import fcntl
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from snapshot import RawJSON, Snapshot, SnapshotCache
+
+LEADER_KEY = "aftershock:poller-leader"
+SNAPSHOT_KEY = "aftershock:snapshot"
+LEASE_SECONDS = 15
+RETRY_SECONDS = 5
+
+
+def redis_client(url: str):
+    # redis is only needed for multi-worker deployments.
+    import redis
+
+    return redis.Redis.from_url(url)
+
+
+class FileLeaderLock:
+    """
+    Leader among the processes of one node: an exclusive flock on a file, held
+    until the process exits (the kernel releases it if the process dies).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def renew(self) -> bool:
+        return self._fd is not None
+
+    def release(self) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+class RedisLeaderLock:
+    """
+    Leader across nodes: a Redis key set with NX and a TTL. The holder renews the
+    lease; if it dies, the key expires and another process takes over.
+    """
+
+    def __init__(self, client, key: str = LEADER_KEY, lease_seconds: float = LEASE_SECONDS):
+        self.client = client
+        self.key = key
+        self.lease_ms = int(lease_seconds * 1000)
+        self.identity = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+
+    def try_acquire(self) -> bool:
+        return bool(self.client.set(self.key, self.identity, nx=True, px=self.lease_ms))
+
+    def _if_holder(self, action) -> bool:
+        # WATCH makes the check-and-act atomic without a server-side script.
+        import redis
+
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(self.key)
+                holder = pipe.get(self.key)
+                if holder is None or holder.decode() != self.identity:
+                    pipe.unwatch()
+                    return False
+                pipe.multi()
+                action(pipe)
+                pipe.execute()
+                return True
+            except redis.WatchError:
+                return False
+
+    def renew(self) -> bool:
+        return self._if_holder(lambda pipe: pipe.pexpire(self.key, self.lease_ms))
+
+    def release(self) -> None:
+        self._if_holder(lambda pipe: pipe.delete(self.key))
+
+
+class LeaderElection:
+    """
+    Keeps trying to become leader in the background and renews the lock while it
+    is held. on_elected runs every time this process becomes leader; is_leader
+    drops as soon as a renewal fails, so work loops can check it before acting.
+    """
+
+    def __init__(
+        self,
+        lock,
+        on_elected: Optional[Callable[[], None]] = None,
+        retry_seconds: float = RETRY_SECONDS,
+        renew_seconds: Optional[float] = None,
+    ):
+        self.lock = lock
+        self.on_elected = on_elected
+        self.retry_seconds = retry_seconds
+        lease_seconds = getattr(lock, "lease_ms", LEASE_SECONDS * 1000) / 1000
+        self.renew_seconds = renew_seconds or lease_seconds / 3
+        self.is_leader = False
+        self._thread = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, daemon=True, name="leader-election")
+        self._thread.start()
+
+    def step(self) -> bool:
+        """One election round; returns whether this process is leader afterwards."""
+        try:
+            if self.is_leader:
+                if not self.lock.renew():
+                    self.is_leader = False
+                    print("Poller liderliği kaybedildi")
+            elif self.lock.try_acquire():
+                self.is_leader = True
+                print(f"Poller lideri bu süreç (pid {os.getpid()})")
+                if self.on_elected is not None:
+                    self.on_elected()
+        except Exception as e:
+            # Without a confirmed lease another process may take over; stop acting as leader.
+            self.is_leader = False
+            print(f"Lider seçimi hatası: {e}")
+        return self.is_leader
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.renew_seconds if self.step() else self.retry_seconds)
+
+
+class LocalSnapshotStore:
+    """Single-process stand-in: readers are served straight from the local SnapshotCache."""
+
+    def __init__(self, cache: SnapshotCache):
+        self.cache = cache
+
+    def publish(self, snapshot: Snapshot, feed_state: Optional[Dict] = None) -> None:
+        pass
+
+    def current(self) -> Snapshot:
+        return self.cache.current()
+
+    def feed_state(self) -> Optional[Dict[str, List[str]]]:
+        return None
+
+    def delta(self, since_version) -> Optional[RawJSON]:
+        return self.cache.delta(since_version)
+
+
+class RedisSnapshotStore:
+    """
+    The leader's latest snapshot in a Redis hash, so that every socket worker can
+    serve it. Workers re-read the serialized lists only when the version changes.
+    """
+
+    def __init__(self, client, cache: SnapshotCache, key: str = SNAPSHOT_KEY):
+        self.client = client
+        self.cache = cache
+        self.key = key
+        self._current = None
+
+    def publish(self, snapshot: Snapshot, feed_state: Optional[Dict] = None) -> None:
+        """Stores the snapshot and, in the same write, the feed position it reflects."""
+        mapping = {
+            "version": snapshot.version,
+            "earthquake_count": snapshot.earthquake_count,
+            "prediction_count": snapshot.prediction_count,
+            "earthquakes": snapshot.earthquakes.text,
+            "predictions": snapshot.predictions.text,
+        }
+        if feed_state is not None:
+            mapping["feed_state"] = json.dumps(feed_state)
+        self.client.hset(self.key, mapping=mapping)
+
+    def feed_state(self) -> Optional[Dict[str, List[str]]]:
+        """The leader's IngestionPipeline.feed_state() as of its last published snapshot."""
+        value = self.client.hget(self.key, "feed_state")
+        return json.loads(value) if value is not None else None
+
+    def current(self) -> Snapshot:
+        version = self.client.hget(self.key, "version")
+        if version is None:
+            return self.cache.current()
+        cached = self._current
+        if cached is not None and cached.version == int(version):
+            return cached
+
+        values = {
+            field.decode(): value.decode()
+            for field, value in self.client.hgetall(self.key).items()
+        }
+        self._current = Snapshot(
+            int(values["version"]),
+            int(values["earthquake_count"]),
+            int(values["prediction_count"]),
+            RawJSON(values["earthquakes"]),
+            RawJSON(values["predictions"]),
+        )
+        return self._current
+
+    def delta(self, since_version) -> Optional[RawJSON]:
+        # Only the leader keeps the change history; other workers send full snapshots.
+        if self.cache.version != self.current().version:
+            return None
+        return self.cache.delta(since_version)
@@ -0,0 +1,79 @@
+import csv
+import os
+import threading
+from datetime import timezone
+from typing import Dict, Iterable, Sequence
+
+from ingestion import KANDILLI_TZ, parse_event_time
+
+EVENT_LOG_PATH = "data/events.csv"
+# The catalog CSV columns first, so the log can be read like data/*.csv.
+LOG_COLUMNS = ["time", "latitude", "longitude", "depth", "mag", "id", "source", "place"]
+# The log is training data: only real feeds, never fakeapi's random, manual or replayed events.
+LOGGED_SOURCES = ("kandilli", "usgs")
+
+
+def _catalog_time(eq: Dict) -> str:
+    """Feed time as UTC in the catalog's format, e.g. 2025-05-22T03:19:35.000Z."""
+    event_time = parse_event_time(eq["date_time"], KANDILLI_TZ).astimezone(timezone.utc)
+    return event_time.strftime("%Y-%m-%dT%H:%M:%S.") + f"{event_time.microsecond // 1000:03d}Z"
+
+
+class EventLog:
+    """
+    Append-only CSV of the events the poller accepted from the given sources.
+    Ids already in the log are skipped, so the feed window seen again after a
+    restart is not duplicated.
+    """
+
+    def __init__(self, path: str, sources: Sequence[str] = LOGGED_SOURCES):
+        self.path = path
+        self.sources = frozenset(sources)
+        self._lock = threading.Lock()
+        self._ids = set()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.reload()
+
+    def reload(self) -> None:
+        """Re-reads the logged ids, e.g. after another process appended while it was leader."""
+        ids = set()
+        if os.path.exists(self.path):
+            with open(self.path, newline="", encoding="utf-8") as f:
+                ids = {row["id"] for row in csv.DictReader(f)}
+        with self._lock:
+            self._ids = ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def append(self, events: Iterable[Dict]) -> int:
+        """Appends the events (raw feed dicts) not logged yet; returns how many were written."""
+        with self._lock:
+            rows = []
+            for eq in events:
+                if eq.get("source") not in self.sources or eq["_id"] in self._ids:
+                    continue
+                self._ids.add(eq["_id"])
+                rows.append(
+                    [
+                        _catalog_time(eq),
+                        eq["geojson"]["coordinates"][1],
+                        eq["geojson"]["coordinates"][0],
+                        eq["depth"],
+                        eq["mag"],
+                        eq["_id"],
+                        eq.get("source", ""),
+                        eq.get("title", ""),
+                    ]
+                )
+            if not rows:
+                return 0
+            write_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                if write_header:
+                    writer.writerow(LOG_COLUMNS)
+                writer.writerows(rows)
+            return len(rows)
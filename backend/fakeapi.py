@@ -1,11 +1,30 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
+import argparse
+import json
+import math
 import random
+import threading
+import time
 import uuid
 from datetime import datetime, timezone, timedelta
 from flasgger import Swagger, swag_from
 
+import numpy as np
+
+from geo import KM_PER_DEGREE_LAT, haversine_np
+from ingestion import parse_event_time
+
 app = Flask(__name__)
 
+KANDILLI_TZ = timezone(timedelta(hours=3))  # Turkey is UTC+3
+# Catalog windows that can be replayed by name: (start, end) in UTC.
+REPLAY_WINDOWS = {
+    "izmit-1999": ("1999-08-17T00:00:00Z", "1999-09-17T00:00:00Z"),
+    "kahramanmaras-2023": ("2023-02-06T01:00:00Z", "2023-03-08T00:00:00Z"),
+}
+REPLAY_FEED_SIZE = 500
+MAX_BURST = 100_000
+
 swagger_template = {
     "swagger": "2.0",
     "info": {
@@ -19,6 +38,35 @@ swagger = Swagger(app, template=swagger_template)
 
 # Global fake earthquake list
 earthquakes = []
+# Bumped whenever the list changes; used for ETag / Last-Modified.
+feed_version = 0
+feed_modified_at = datetime.now(timezone.utc)
+# Guards the list and the cached response; the server is threaded.
+feed_lock = threading.Lock()
+# The /live body of feed_version, serialized once and shared by every poller.
+feed_body = None
+feed_body_version = -1
+# Set by --replay; None serves random events.
+replay = None
+# Replay mode keeps only the newest feed_size events, like the real feed.
+feed_size = None
+
+
+def mark_feed_changed():
+    global feed_version, feed_modified_at
+    feed_version += 1
+    feed_modified_at = datetime.now(timezone.utc)
+
+
+def add_events(events):
+    """Puts events (oldest first) at the top of the feed; call with feed_lock held."""
+    global earthquakes
+    if not events:
+        return
+    earthquakes[:0] = events[::-1]
+    if feed_size is not None:
+        del earthquakes[feed_size:]
+    mark_feed_changed()
 
 city_coords = {
     "Adana": (37.0017, 35.3289),
@@ -139,6 +187,175 @@ def generate_random_earthquake():
         }
     }
 
+CITY_NAMES = list(city_coords)
+CITY_LATS = np.array([lat for lat, _ in city_coords.values()])
+CITY_LNGS = np.array([lng for _, lng in city_coords.values()])
+
+
+def closest_cities(lats, lngs):
+    """(name, distance km) of the nearest province centre for every point."""
+    distances = haversine_np(
+        np.asarray(lats)[:, None], np.asarray(lngs)[:, None], CITY_LATS, CITY_LNGS
+    )
+    nearest = distances.argmin(axis=1)
+    return [
+        (CITY_NAMES[city], round(float(distance), 2))
+        for city, distance in zip(nearest, distances[np.arange(len(nearest)), nearest])
+    ]
+
+
+def make_events(ids, times, lats, lngs, depths, mags, title):
+    """Feed dicts with Kandilli's local, timezone-less date_time."""
+    events = []
+    for event_id, event_time, lat, lng, depth, mag, (city, distance) in zip(
+        ids, times, lats, lngs, depths, mags, closest_cities(lats, lngs)
+    ):
+        local = event_time.astimezone(KANDILLI_TZ)
+        lat = round(float(lat), 4)
+        lng = round(float(lng), 4)
+        events.append({
+            "_id": event_id,
+            "title": title,
+            "date": local.strftime("%d.%m.%Y"),
+            "date_time": local.strftime("%Y-%m-%d %H:%M:%S"),
+            "lat": lat,
+            "lng": lng,
+            "depth": round(float(depth), 1),
+            "mag": round(float(mag), 1),
+            "location_properties": {
+                "closestCity": {"name": city, "distance": distance},
+                "airports": []
+            },
+            "geojson": {
+                "coordinates": [lng, lat]
+            }
+        })
+    return events
+
+
+class CatalogReplay:
+    """
+    Releases the catalog events between start and end into the feed when a
+    clock running `speed` times faster than real time reaches them. The clock
+    starts with the first poll. Events keep their catalog time, or with
+    live_times the (compressed) wall-clock time they were released at.
+    """
+
+    def __init__(self, arrays, start, end, speed=60.0, live_times=False):
+        from catalog_index import UNITS_PER_SECOND
+
+        self.arrays = arrays
+        self.seconds = np.asarray(arrays["time"]) / UNITS_PER_SECOND[arrays["time_unit"]]
+        self.start = start
+        self.end = end
+        self.speed = speed
+        self.live_times = live_times
+        self.first, self.stop = (
+            int(i) for i in np.searchsorted(self.seconds, [start.timestamp(), end.timestamp()])
+        )
+        self.next = self.first
+        self.started_at = None
+        self.wall_started_at = None
+
+    def __len__(self):
+        return self.stop - self.first
+
+    def _events(self, rows):
+        if self.live_times and self.wall_started_at is not None:
+            offsets = (self.seconds[rows] - self.start.timestamp()) / self.speed
+            times = [self.wall_started_at + timedelta(seconds=float(o)) for o in offsets]
+        else:
+            times = [datetime.fromtimestamp(float(t), timezone.utc) for t in self.seconds[rows]]
+        return make_events(
+            [f"catalog-{row}" for row in rows],
+            times,
+            self.arrays["latitude"][rows],
+            self.arrays["longitude"][rows],
+            self.arrays["depth"][rows],
+            self.arrays["mag"][rows],
+            "Kandilli Rasathanesi Deprem Verisi (tekrar)",
+        )
+
+    def history(self, count):
+        """The count catalog events before start (oldest first), as the feed looked then."""
+        return self._events(np.arange(max(0, self.first - count), self.first))
+
+    def replay_time(self, now):
+        if self.started_at is None:
+            return self.start.timestamp()
+        return self.start.timestamp() + (now - self.started_at) * self.speed
+
+    def due(self, now):
+        """Events (oldest first) the clock passed since the last call."""
+        if self.started_at is None:
+            self.started_at = now
+            self.wall_started_at = datetime.now(timezone.utc)
+        until = np.searchsorted(self.seconds, self.replay_time(now), side="right")
+        until = min(int(until), self.stop)
+        rows = np.arange(self.next, until)
+        self.next = max(self.next, until)
+        return self._events(rows)
+
+    def status(self, now):
+        replay_time = min(self.replay_time(now), self.end.timestamp())
+        return {
+            "start": self.start.isoformat(),
+            "end": self.end.isoformat(),
+            "speed": self.speed,
+            "replay_time": datetime.fromtimestamp(replay_time, timezone.utc).isoformat(),
+            "released": self.next - self.first,
+            "total": len(self),
+            "finished": self.next >= self.stop,
+        }
+
+
+def burst_events(count, lat, lng, radius_km=30.0, min_mag=2.0, max_mag=7.0,
+                 mainshock_mag=None, b_value=1.0):
+    """
+    count events at the current time, uniform within radius_km of (lat, lng),
+    with Gutenberg-Richter magnitudes. A mainshock_mag event comes first.
+    """
+    rng = np.random.default_rng()
+    mags = np.minimum(min_mag - np.log10(1 - rng.random(count)) / b_value, max_mag)
+    if mainshock_mag is not None and count:
+        mags[0] = mainshock_mag
+    distances = radius_km * np.sqrt(rng.random(count))
+    bearings = rng.uniform(0, 2 * np.pi, count)
+    lats = lat + distances * np.cos(bearings) / KM_PER_DEGREE_LAT
+    lngs = lng + distances * np.sin(bearings) / (
+        KM_PER_DEGREE_LAT * math.cos(math.radians(lat))
+    )
+    now = datetime.now(timezone.utc)
+    return make_events(
+        [str(uuid.uuid4()) for _ in range(count)],
+        [now] * count,
+        lats,
+        lngs,
+        rng.uniform(1.0, 30.0, count),
+        mags,
+        "Kandilli Rasathanesi Deprem Verisi (yük testi)",
+    )
+
+
+def live_body():
+    """The /live body, serialized again only after the feed changed."""
+    global earthquakes, feed_body, feed_body_version
+    with feed_lock:
+        if replay is not None:
+            add_events(replay.due(time.monotonic()))
+        elif len(earthquakes) < 50:
+            earthquakes = [generate_random_earthquake() for _ in range(50)]
+            mark_feed_changed()
+        if feed_body_version != feed_version:
+            feed_body = json.dumps({
+                "status": True,
+                "desc": "Fake earthquake data",
+                "result": earthquakes
+            }).encode()
+            feed_body_version = feed_version
+        return feed_body, feed_version, feed_modified_at
+
+
 @app.route("/deprem/kandilli/live", methods=["GET"])
 @swag_from({
     'tags': ['Earthquake'],
@@ -159,15 +376,11 @@ def generate_random_earthquake():
     }
 })
 def get_fake_earthquakes():
-    global earthquakes
-    print(len(earthquakes))
-    if len(earthquakes) < 50:
-        earthquakes = [generate_random_earthquake() for _ in range(50)]
-    return jsonify({
-        "status": True,
-        "desc": "Fake earthquake data",
-        "result": earthquakes
-    })
+    body, version, modified_at = live_body()
+    response = Response(body, mimetype="application/json")
+    response.set_etag(f"feed-{version}")
+    response.last_modified = modified_at
+    return response.make_conditional(request)
 
 @app.route("/deprem/kandilli/add", methods=["POST"])
 @swag_from({
@@ -261,11 +474,145 @@ def add_fake_earthquake():
         }
     }
 
-    earthquakes.insert(0, new_eq)
-    # earthquakes = earthquakes[:50]
+    with feed_lock:
+        add_events([new_eq])
 
     return jsonify({"message": "Earthquake added", "earthquake": new_eq}), 201
 
 
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+@app.route("/deprem/kandilli/burst", methods=["POST"])
+@swag_from({
+    'tags': ['Earthquake'],
+    'summary': 'Add many fake earthquakes around a point at once (load test)',
+    'parameters': [
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'count': {'type': 'integer', 'example': 200},
+                    'lat': {'type': 'number', 'example': 37.58},
+                    'lng': {'type': 'number', 'example': 36.94},
+                    'radius_km': {'type': 'number', 'example': 30},
+                    'min_mag': {'type': 'number', 'example': 2.0},
+                    'max_mag': {'type': 'number', 'example': 7.0},
+                    'mainshock_mag': {'type': 'number', 'example': 7.2}
+                },
+                'required': ['count']
+            }
+        }
+    ],
+    'responses': {
+        201: {'description': 'Earthquakes added'},
+        400: {'description': 'Invalid count'}
+    }
+})
+def add_fake_burst():
+    data = request.json or {}
+    count = data.get("count")
+    if isinstance(count, bool) or not isinstance(count, int) or not 1 <= count <= MAX_BURST:
+        return jsonify({"message": f"count must be an integer between 1 and {MAX_BURST}"}), 400
+    for field in ("lat", "lng", "radius_km", "min_mag", "max_mag", "mainshock_mag"):
+        value = data.get(field)
+        if value is not None and not _is_number(value):
+            return jsonify({"message": f"{field} must be a number"}), 400
+    if data.get("lat") is not None and data.get("lng") is not None:
+        lat, lng = data["lat"], data["lng"]
+        if not -90 < lat < 90 or not -180 <= lng <= 180:
+            return jsonify({"message": "lat/lng out of range"}), 400
+    else:
+        lat, lng = city_coords[random.choice(CITY_NAMES)]
+    radius_km = data.get("radius_km", 30.0)
+    min_mag = data.get("min_mag", 2.0)
+    max_mag = data.get("max_mag", 7.0)
+    if radius_km < 0 or min_mag > max_mag:
+        return jsonify({"message": "radius_km must be >= 0 and min_mag <= max_mag"}), 400
+
+    events = burst_events(
+        count,
+        lat,
+        lng,
+        radius_km=radius_km,
+        min_mag=min_mag,
+        max_mag=max_mag,
+        mainshock_mag=data.get("mainshock_mag"),
+    )
+    with feed_lock:
+        add_events(events)
+
+    return jsonify({"message": "Earthquakes added", "count": count, "lat": lat, "lng": lng}), 201
+
+
+@app.route("/deprem/kandilli/replay", methods=["GET"])
+@swag_from({
+    'tags': ['Earthquake'],
+    'summary': 'Progress of the catalog replay (--replay)',
+    'responses': {
+        200: {'description': 'Replay clock and released event count'},
+        404: {'description': 'Not started with --replay'}
+    }
+})
+def get_replay_status():
+    if replay is None:
+        return jsonify({"message": "Replay mode is off"}), 404
+    with feed_lock:
+        return jsonify(replay.status(time.monotonic()))
+
+
+def parse_replay_window(value):
+    """A REPLAY_WINDOWS name or 'START/END' in ISO 8601 (UTC unless an offset is given)."""
+    start, end = REPLAY_WINDOWS.get(value) or value.split("/", 1)
+    return parse_event_time(start), parse_event_time(end)
+
+
+def start_replay(window, speed, live_times=False, size=REPLAY_FEED_SIZE):
+    """Switches the feed to replaying the catalog window, showing the events before it first."""
+    global replay, feed_size, earthquakes
+    from catalog import load_catalog_arrays
+
+    start, end = parse_replay_window(window)
+    with feed_lock:
+        replay = CatalogReplay(load_catalog_arrays(), start, end, speed, live_times)
+        feed_size = size
+        earthquakes = []
+        add_events(replay.history(size))
+    return replay
+
+
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", debug=True, port=4000)
+    parser = argparse.ArgumentParser(
+        description="Fake Kandilli API for local development and load tests."
+    )
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument(
+        "--replay",
+        metavar="WINDOW",
+        help=f"replay data/*.csv: {', '.join(REPLAY_WINDOWS)} or START/END (ISO 8601)",
+    )
+    parser.add_argument(
+        "--speed", type=float, default=60.0, help="replay seconds per real second (default 60)"
+    )
+    parser.add_argument(
+        "--live-times",
+        action="store_true",
+        help="stamp replayed events with the time they are released instead of the catalog time",
+    )
+    parser.add_argument("--feed-size", type=int, default=REPLAY_FEED_SIZE)
+    args = parser.parse_args()
+
+    if args.replay:
+        start_replay(args.replay, args.speed, args.live_times, args.feed_size)
+        print(
+            f"{len(replay)} deprem {args.speed:g}x hızla tekrar oynatılacak "
+            f"({replay.start:%Y-%m-%d} – {replay.end:%Y-%m-%d})"
+        )
+        # No reloader or debugger: the replay clock and the cached feed live in this process.
+        app.run(host="0.0.0.0", port=args.port, threaded=True)
+    else:
+        app.run(host="0.0.0.0", debug=True, port=args.port)
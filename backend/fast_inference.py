@@ -0,0 +1,125 @@
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Probe inputs used for the startup parity check: (magnitude, depth, latitude, longitude).
+PARITY_PROBE_SEED = 42
+PARITY_PROBE_SIZE = 64
+PARITY_TOLERANCE = 1e-9
+
+
+class CompiledPipeline:
+    """StandardScaler + LightGBM pipeline flattened to its scaler vectors and booster."""
+
+    def __init__(self, pipeline):
+        scaler = pipeline.named_steps["scaler"]
+        regressor = pipeline.named_steps["regressor"]
+        n_features = len(scaler.scale_) if scaler.with_std else len(scaler.mean_)
+
+        self.mean = (
+            np.asarray(scaler.mean_, dtype=np.float64)
+            if scaler.with_mean
+            else np.zeros(n_features, dtype=np.float64)
+        )
+        self.scale = (
+            np.asarray(scaler.scale_, dtype=np.float64)
+            if scaler.with_std
+            else np.ones(n_features, dtype=np.float64)
+        )
+        self.booster = regressor.booster_
+
+    def predict_scaled(self, scaled_rows: np.ndarray) -> np.ndarray:
+        return self.booster.predict(scaled_rows)
+
+    def predict(self, rows: np.ndarray) -> np.ndarray:
+        scaled = np.array(rows, dtype=np.float64, copy=True)
+        scaled -= self.mean
+        scaled /= self.scale
+        return self.predict_scaled(scaled)
+
+
+class CompiledModels:
+    """Scores one mainshock at a time into a preallocated float64 row."""
+
+    def __init__(self, mag_pipe, time_pipe):
+        self.mag = CompiledPipeline(mag_pipe)
+        self.time = CompiledPipeline(time_pipe)
+        self._raw_row = np.empty((1, len(self.mag.mean)), dtype=np.float64)
+        self._mag_row = np.empty_like(self._raw_row)
+        self._time_row = np.empty_like(self._raw_row)
+        self._lock = threading.Lock()
+
+    def predict_rows(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return self.mag.predict(rows), self.time.predict(rows)
+
+    def predict(
+        self,
+        mainshock_magnitude: float,
+        mainshock_depth: float,
+        mainshock_latitude: float,
+        mainshock_longitude: float,
+    ) -> Tuple[float, float]:
+        with self._lock:
+            raw = self._raw_row[0]
+            raw[0] = mainshock_magnitude
+            raw[1] = mainshock_depth
+            raw[2] = mainshock_latitude
+            raw[3] = mainshock_longitude
+
+            np.subtract(self._raw_row, self.mag.mean, out=self._mag_row)
+            np.divide(self._mag_row, self.mag.scale, out=self._mag_row)
+            np.subtract(self._raw_row, self.time.mean, out=self._time_row)
+            np.divide(self._time_row, self.time.scale, out=self._time_row)
+
+            predicted_magnitude = self.mag.predict_scaled(self._mag_row)[0]
+            predicted_time_log = self.time.predict_scaled(self._time_row)[0]
+        return predicted_magnitude, predicted_time_log
+
+
+def parity_probe() -> np.ndarray:
+    rng = np.random.default_rng(PARITY_PROBE_SEED)
+    return np.column_stack(
+        [
+            rng.uniform(5.5, 8.0, PARITY_PROBE_SIZE),
+            rng.uniform(0, 100, PARITY_PROBE_SIZE),
+            rng.uniform(34, 43, PARITY_PROBE_SIZE),
+            rng.uniform(25, 45, PARITY_PROBE_SIZE),
+        ]
+    )
+
+
+def check_parity(compiled: CompiledModels, mag_pipe, time_pipe, feature_columns) -> float:
+    """Returns the largest absolute difference between compiled and pipeline outputs."""
+    import pandas as pd
+
+    probe = parity_probe()
+    probe_df = pd.DataFrame(probe, columns=feature_columns)
+    expected_mag = mag_pipe.predict(probe_df)
+    expected_time = time_pipe.predict(probe_df)
+
+    max_diff = 0.0
+    for row, (mag, depth, lat, lon) in enumerate(probe):
+        predicted_mag, predicted_time = compiled.predict(mag, depth, lat, lon)
+        max_diff = max(
+            max_diff,
+            abs(predicted_mag - expected_mag[row]),
+            abs(predicted_time - expected_time[row]),
+        )
+    return max_diff
+
+
+def compile_pipelines(mag_pipe, time_pipe, feature_columns) -> Optional[CompiledModels]:
+    try:
+        compiled = CompiledModels(mag_pipe, time_pipe)
+        max_diff = check_parity(compiled, mag_pipe, time_pipe, feature_columns)
+    except Exception as e:
+        print(f"Derlenmiş tahmin modu devre dışı: {e}")
+        return None
+
+    if not max_diff <= PARITY_TOLERANCE:
+        print(
+            f"Derlenmiş tahmin modu devre dışı: pipeline ile fark {max_diff:.3g} > {PARITY_TOLERANCE}"
+        )
+        return None
+    return compiled
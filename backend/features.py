@@ -0,0 +1,10 @@
+# Model inputs, in the column order the pipelines were trained on (see sequences.py).
+FEATURE_COLUMNS = [
+    "mainshock_mag",
+    "mainshock_depth",
+    "mainshock_lat",
+    "mainshock_lon",
+]
+
+# Request fields of /predict and /batch_predict, in FEATURE_COLUMNS order.
+REQUIRED_FIELDS = ["magnitude", "depth", "latitude", "longitude"]
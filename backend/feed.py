@@ -0,0 +1,50 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+DEFAULT_SEEN_CAPACITY = 5000
+
+
+class FeedDiffer:
+    """
+    Tracks which feed events were already processed.
+
+    The Kandilli feed lists events newest-first, so a poll's new events are the
+    prefix before the first already-seen ID. Seen IDs are kept in a bounded
+    insertion-ordered set; the oldest ones are evicted past ``capacity``.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_SEEN_CAPACITY):
+        self.capacity = capacity
+        self._seen = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def __contains__(self, event_id) -> bool:
+        return event_id in self._seen
+
+    @property
+    def primed(self) -> bool:
+        return bool(self._seen)
+
+    def mark_seen(self, event_ids: Iterable) -> None:
+        for event_id in event_ids:
+            self._seen[event_id] = None
+            self._seen.move_to_end(event_id)
+        while len(self._seen) > self.capacity:
+            self._seen.popitem(last=False)
+
+    def prime(self, earthquakes: List[Dict]) -> None:
+        """Marks a feed snapshot as seen without reporting it as new."""
+        self.mark_seen(eq["_id"] for eq in reversed(earthquakes))
+
+    def diff(self, earthquakes: List[Dict]) -> List[Dict]:
+        """Returns the events not seen before, oldest first, and marks them seen."""
+        new_events = []
+        for eq in earthquakes:
+            if eq["_id"] in self._seen:
+                break
+            new_events.append(eq)
+        new_events.reverse()
+        self.mark_seen(eq["_id"] for eq in new_events)
+        return new_events
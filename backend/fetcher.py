@@ -0,0 +1,127 @@
+import hashlib
+import json
+import time
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+
+BASE_INTERVAL = 15.0
+MIN_INTERVAL = 5.0
+MAX_INTERVAL = 60.0
+# How long polling stays at MIN_INTERVAL after a large event (seconds).
+ALERT_HOLD_SECONDS = 600
+ALERT_MAGNITUDE = 5.5
+QUIET_POLLS_BEFORE_RELAX = 4
+RELAX_FACTOR = 1.5
+
+
+def build_session(pool_maxsize: int = 4) -> requests.Session:
+    session = requests.Session()
+    retry = Retry(
+        total=2,
+        backoff_factor=0.5,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=("GET",),
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class FeedFetcher:
+    """
+    Polls a Kandilli-style feed over a pooled session with conditional requests
+    (ETag / Last-Modified) and an adaptive poll interval.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        session: Optional[requests.Session] = None,
+        timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+    ):
+        self.url = url
+        self.session = session or build_session()
+        self.timeout = timeout
+        self.interval = BASE_INTERVAL
+        self._etag = None
+        self._last_modified = None
+        self._body_digest = None
+        self._quiet_polls = 0
+        self._failed_polls = 0
+        self._alert_until = 0.0
+        self.stats = {"requests": 0, "not_modified": 0, "unchanged_body": 0, "bytes": 0}
+
+    def fetch_body(self) -> Optional[bytes]:
+        """Returns the raw response body, or None when nothing changed since the last poll."""
+        headers = {}
+        if self._etag:
+            headers["If-None-Match"] = self._etag
+        if self._last_modified:
+            headers["If-Modified-Since"] = self._last_modified
+
+        response = self.session.get(self.url, headers=headers, timeout=self.timeout)
+        self.stats["requests"] += 1
+        if response.status_code == 304:
+            self.stats["not_modified"] += 1
+            return None
+        response.raise_for_status()
+
+        self._etag = response.headers.get("ETag")
+        self._last_modified = response.headers.get("Last-Modified")
+        body = response.content
+        self.stats["bytes"] += len(body)
+
+        # Servers without validators still send identical bodies; skip parsing those.
+        digest = hashlib.sha1(body).digest()
+        if digest == self._body_digest:
+            self.stats["unchanged_body"] += 1
+            return None
+        self._body_digest = digest
+        return body
+
+    def fetch(self) -> Optional[List[Dict]]:
+        """Returns the feed's events, or None when nothing changed since the last poll."""
+        body = self.fetch_body()
+        if body is None:
+            return None
+
+        data = json.loads(body)
+        if not (data["status"] and data["result"]):
+            return None
+        return data["result"]
+
+    def record_poll(self, new_events: List[Dict], failed: bool = False) -> float:
+        """
+        Adapts the poll interval to the poll's new events and returns it. A failed
+        poll says nothing about the feed being quiet: it backs off on its own,
+        except during an alert hold, and does not count towards relaxing.
+        """
+        now = time.monotonic()
+        if any(eq["mag"] >= ALERT_MAGNITUDE for eq in new_events):
+            self._alert_until = now + ALERT_HOLD_SECONDS
+
+        if now < self._alert_until:
+            self._quiet_polls = 0
+            self._failed_polls = 0
+            self.interval = MIN_INTERVAL
+        elif failed:
+            self._failed_polls += 1
+            self.interval = min(MAX_INTERVAL, BASE_INTERVAL * RELAX_FACTOR ** self._failed_polls)
+        elif new_events or self._failed_polls:
+            # The first poll that gets through after failures starts over at the base interval.
+            self._quiet_polls = 0
+            self._failed_polls = 0
+            self.interval = BASE_INTERVAL
+        else:
+            self._quiet_polls += 1
+            self.interval = max(self.interval, BASE_INTERVAL)
+            if self._quiet_polls >= QUIET_POLLS_BEFORE_RELAX:
+                self.interval = min(MAX_INTERVAL, self.interval * RELAX_FACTOR)
+        return self.interval
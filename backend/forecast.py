@@ -0,0 +1,286 @@
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from geo import haversine_np
+from sequences import MAINSHOCK_MIN_MAG, RADIUS_KM, TIME_WINDOW_DAYS
+
+PARAMS_FILE = "omori_params.json"
+PARAMS_FORMAT_VERSION = 1
+# The magnitude counts of the catalog follow Gutenberg-Richter (b close to 1) only
+# from M4.0 on; below that, coverage differs between the two files.
+COMPLETENESS_MAGNITUDE = 4.0
+MAGNITUDE_BIN = 0.1
+DEFAULT_HORIZONS_HOURS = (1, 6, 24, 72, 168, 720)
+
+SECONDS_PER_DAY = 86_400
+UNITS_PER_SECOND = {"s": 1, "ms": 1_000, "us": 1_000_000, "ns": 1_000_000_000}
+
+# Search bounds of the Omori-Utsu fit: (log10 c [days], p, alpha).
+FIT_BOUNDS = [(-5.0, 0.5), (0.3, 2.5), (0.2, 2.0)]
+FIT_START = (-1.5, 1.1, 1.0)
+
+
+class OmoriParams(NamedTuple):
+    """
+    Omori-Utsu rate of M >= m aftershocks t days after an M_main mainshock:
+    10 ** (a + alpha * (M_main - mc) - b * (m - mc)) * (t + c) ** -p
+    """
+
+    a: float
+    alpha: float
+    b: float
+    c: float
+    p: float
+    mc: float
+
+
+class CatalogSequences(NamedTuple):
+    mainshock_mags: np.ndarray
+    # Observed length of each sequence in days (shorter at the end of the catalog).
+    durations: np.ndarray
+    # Aftershocks of all sequences: index of their mainshock, days since it, magnitude.
+    sequence_index: np.ndarray
+    aftershock_days: np.ndarray
+    aftershock_mags: np.ndarray
+
+
+def collect_sequences(
+    arrays: Dict,
+    mainshock_min_mag: float = MAINSHOCK_MIN_MAG,
+    radius_km: float = RADIUS_KM,
+    window_days: float = TIME_WINDOW_DAYS,
+    completeness: float = COMPLETENESS_MAGNITUDE,
+) -> CatalogSequences:
+    """
+    Mainshock sequences of a catalog sorted by time (as load_catalog_arrays returns
+    it). A mainshock is dropped if an event at least as large occurs within the
+    radius up to window_days before or after it, so that foreshocks and large
+    aftershocks do not start sequences of their own.
+    """
+    days = np.asarray(arrays["time"], dtype=np.float64) / (
+        UNITS_PER_SECOND[arrays["time_unit"]] * SECONDS_PER_DAY
+    )
+    lats = np.asarray(arrays["latitude"])
+    lons = np.asarray(arrays["longitude"])
+    mags = np.asarray(arrays["mag"])
+    catalog_end = days[-1]
+
+    mainshock_mags = []
+    durations = []
+    sequence_index = []
+    aftershock_days = []
+    aftershock_mags = []
+    for row in np.flatnonzero(mags >= mainshock_min_mag):
+        start = np.searchsorted(days, days[row] - window_days, side="left")
+        end = np.searchsorted(days, days[row] + window_days, side="right")
+        distances = haversine_np(lats[row], lons[row], lats[start:end], lons[start:end])
+        nearby = distances <= radius_km
+        nearby[row - start] = False
+        if np.any(nearby & (mags[start:end] >= mags[row])):
+            continue
+
+        after = nearby & (days[start:end] > days[row]) & (mags[start:end] >= completeness)
+        selected = start + np.flatnonzero(after)
+        sequence_index.append(np.full(selected.size, len(mainshock_mags)))
+        aftershock_days.append(days[selected] - days[row])
+        aftershock_mags.append(mags[selected])
+        mainshock_mags.append(mags[row])
+        durations.append(min(window_days, catalog_end - days[row]))
+
+    return CatalogSequences(
+        np.array(mainshock_mags),
+        np.array(durations),
+        np.concatenate(sequence_index) if sequence_index else np.array([], dtype=np.int64),
+        np.concatenate(aftershock_days) if aftershock_days else np.array([]),
+        np.concatenate(aftershock_mags) if aftershock_mags else np.array([]),
+    )
+
+
+def _omori_integral(t, c, p):
+    """Integral of (s + c) ** -p from 0 to t."""
+    if abs(p - 1.0) < 1e-9:
+        return np.log((t + c) / c)
+    return ((t + c) ** (1.0 - p) - c ** (1.0 - p)) / (1.0 - p)
+
+
+def fit_b_value(mags: np.ndarray, mc: float, bin_width: float = MAGNITUDE_BIN) -> float:
+    """Aki-Utsu maximum likelihood b-value of the magnitudes at or above mc."""
+    mags = mags[mags >= mc - 1e-9]
+    return float(np.log10(np.e) / (mags.mean() - (mc - bin_width / 2)))
+
+
+def omori_negative_log_likelihood(theta, sequences: CatalogSequences, mc: float):
+    """
+    Negative log likelihood of the aftershock times over all sequences for
+    theta = (log10 c, p, alpha), with the productivity a at its closed-form optimum.
+    Returns (value, a).
+    """
+    log_c, p, alpha = theta
+    c = 10.0**log_c
+    weights = 10.0 ** (alpha * (sequences.mainshock_mags - mc))
+    expected_per_k = np.sum(weights * _omori_integral(sequences.durations, c, p))
+    count = sequences.aftershock_days.size
+    k = count / expected_per_k
+    log_rates = (
+        np.log(k)
+        + np.log(weights)[sequences.sequence_index]
+        - p * np.log(sequences.aftershock_days + c)
+    )
+    # The expected count equals the observed count at the optimal k.
+    return count - np.sum(log_rates), float(np.log10(k))
+
+
+def fit_omori_utsu(sequences: CatalogSequences, mc: float = COMPLETENESS_MAGNITUDE) -> Dict:
+    """Maximum likelihood Omori-Utsu parameters; a is profiled out, so 3 parameters are searched."""
+    from scipy.optimize import minimize
+
+    if sequences.aftershock_days.size == 0:
+        raise ValueError("no aftershocks above the completeness magnitude")
+
+    result = minimize(
+        lambda theta: omori_negative_log_likelihood(theta, sequences, mc)[0],
+        FIT_START,
+        method="L-BFGS-B",
+        bounds=FIT_BOUNDS,
+    )
+    neg_log_likelihood, a = omori_negative_log_likelihood(result.x, sequences, mc)
+    log_c, p, alpha = (float(value) for value in result.x)
+    return {
+        "params": OmoriParams(
+            a, alpha, fit_b_value(sequences.aftershock_mags, mc), 10.0**log_c, p, mc
+        ),
+        "log_likelihood": float(-neg_log_likelihood),
+        "converged": bool(result.success),
+    }
+
+
+class OmoriForecaster:
+    """Expected aftershock counts from fitted OmoriParams; closed form, no catalog access."""
+
+    def __init__(self, params: OmoriParams, metadata: Optional[Dict] = None):
+        self.params = params
+        self.metadata = metadata or {}
+
+    def expected_counts(
+        self,
+        mainshock_magnitude: float,
+        start_days,
+        end_days,
+        min_magnitude: Optional[float] = None,
+    ) -> np.ndarray:
+        """Expected number of M >= min_magnitude aftershocks in each [start, end) window (days)."""
+        params = self.params
+        min_magnitude = params.mc if min_magnitude is None else min_magnitude
+        productivity = 10.0 ** (
+            params.a
+            + params.alpha * (mainshock_magnitude - params.mc)
+            - params.b * (min_magnitude - params.mc)
+        )
+        start_days = np.asarray(start_days, dtype=np.float64)
+        end_days = np.asarray(end_days, dtype=np.float64)
+        return productivity * (
+            _omori_integral(end_days, params.c, params.p)
+            - _omori_integral(start_days, params.c, params.p)
+        )
+
+    def forecast(
+        self,
+        mainshock_magnitude: float,
+        hours_since_mainshock: float = 0.0,
+        horizons_hours: Sequence[float] = DEFAULT_HORIZONS_HOURS,
+        min_magnitude: Optional[float] = None,
+    ) -> List[Dict]:
+        """Expected counts and the probability of at least one event for the next horizons."""
+        horizons = np.asarray(horizons_hours, dtype=np.float64)
+        start = hours_since_mainshock / 24.0
+        counts = self.expected_counts(
+            mainshock_magnitude, start, start + horizons / 24.0, min_magnitude
+        )
+        probabilities = -np.expm1(-counts)
+        return [
+            {
+                "horizon_hours": float(horizon),
+                "expected_count": round(float(count), 3),
+                "probability": round(float(probability), 4),
+            }
+            for horizon, count, probability in zip(horizons, counts, probabilities)
+        ]
+
+    @classmethod
+    def load(cls, path: str) -> "OmoriForecaster":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("format_version") != PARAMS_FORMAT_VERSION:
+            raise ValueError(f"unsupported forecast parameter format: {data.get('format_version')}")
+        return cls(OmoriParams(**data["params"]), data)
+
+
+def write_params(path: str, fit: Dict, sequences: CatalogSequences, settings: Dict) -> Dict:
+    data = {
+        "format_version": PARAMS_FORMAT_VERSION,
+        "model": "omori-utsu",
+        "params": fit["params"]._asdict(),
+        "log_likelihood": fit["log_likelihood"],
+        "converged": fit["converged"],
+        "sequences": int(sequences.mainshock_mags.size),
+        "aftershocks": int(sequences.aftershock_days.size),
+        "fitted_at": datetime.now(timezone.utc).isoformat(),
+        **settings,
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+    return data
+
+
+def main():
+    from catalog import load_catalog_arrays
+    from model_registry import MODEL_DIR
+
+    parser = argparse.ArgumentParser(
+        description="Fit Omori-Utsu aftershock rate parameters on the catalog in data/."
+    )
+    parser.add_argument("--output", default=os.path.join(MODEL_DIR, PARAMS_FILE))
+    parser.add_argument("--mainshock-min-mag", type=float, default=MAINSHOCK_MIN_MAG)
+    parser.add_argument("--radius-km", type=float, default=RADIUS_KM)
+    parser.add_argument("--window-days", type=float, default=TIME_WINDOW_DAYS)
+    parser.add_argument("--completeness", type=float, default=COMPLETENESS_MAGNITUDE)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    sequences = collect_sequences(
+        load_catalog_arrays(),
+        args.mainshock_min_mag,
+        args.radius_km,
+        args.window_days,
+        args.completeness,
+    )
+    fit = fit_omori_utsu(sequences, args.completeness)
+    write_params(
+        args.output,
+        fit,
+        sequences,
+        {
+            "mainshock_min_mag": args.mainshock_min_mag,
+            "radius_km": args.radius_km,
+            "window_days": args.window_days,
+        },
+    )
+    params = fit["params"]
+    print(
+        f"{sequences.mainshock_mags.size} dizi, {sequences.aftershock_days.size} artçı: "
+        f"a={params.a:.3f} alpha={params.alpha:.3f} b={params.b:.3f} "
+        f"c={params.c:.4f} gün p={params.p:.3f} ({time.perf_counter() - started:.2f} sn)"
+    )
+    print(f"{args.output} yazıldı")
+
+
+if __name__ == "__main__":
+    main()
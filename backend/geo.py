@@ -0,0 +1,175 @@
+import threading
+from math import radians, sin, cos, sqrt, atan2
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    R = EARTH_RADIUS_KM
+    dLat = radians(lat2 - lat1)
+    dLon = radians(lon2 - lon1)
+    lat1_rad = radians(lat1)
+    lat2_rad = radians(lat2)
+    a = sin(dLat / 2) ** 2 + cos(lat1_rad) * cos(lat2_rad) * sin(dLon / 2) ** 2
+    c = 2 * atan2(sqrt(a), sqrt(1 - a))
+    distance = R * c
+    return distance
+
+
+def haversine_np(lat1, lon1, lat2, lon2):
+    """Vectorized haversine (km); same formula and operation order as haversine."""
+    lat1 = np.asarray(lat1, dtype=np.float64)
+    lon1 = np.asarray(lon1, dtype=np.float64)
+    lat2 = np.asarray(lat2, dtype=np.float64)
+    lon2 = np.asarray(lon2, dtype=np.float64)
+
+    dLat = np.radians(lat2 - lat1)
+    dLon = np.radians(lon2 - lon1)
+    lat1_rad = np.radians(lat1)
+    lat2_rad = np.radians(lat2)
+    a = np.sin(dLat / 2) ** 2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(dLon / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
+
+
+KM_PER_DEGREE_LAT = 2 * np.pi * EARTH_RADIUS_KM / 360
+
+
+class GridIndex:
+    """
+    Lat/lon grid of circles (center + radius). Each circle is stored in every
+    cell it overlaps, so a point query is one dict lookup plus an exact
+    distance check on the few circles in that cell.
+    """
+
+    def __init__(self, cell_degrees: float = 1.0):
+        self.cell_degrees = cell_degrees
+        self._lon_cells = int(np.ceil(360 / cell_degrees))
+        self._cells = {}
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def _cell(self, lat: float, lon: float):
+        row = int(np.floor(lat / self.cell_degrees))
+        col = int(np.floor((lon + 180) / self.cell_degrees)) % self._lon_cells
+        return row, col
+
+    def _covered_cells(self, lat: float, lon: float, radius_km: float):
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        lat_min = max(-90.0, lat - dlat)
+        lat_max = min(90.0, lat + dlat)
+        max_abs_lat = max(abs(lat_min), abs(lat_max))
+
+        cos_lat = cos(radians(max_abs_lat))
+        dlon = 180.0 if cos_lat <= 1e-9 else radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+
+        row_min, _ = self._cell(lat_min, lon)
+        row_max, _ = self._cell(lat_max, lon)
+        if dlon >= 180.0:
+            cols = range(self._lon_cells)
+        else:
+            _, col_min = self._cell(lat, lon - dlon)
+            span = int(np.floor((lon + dlon + 180) / self.cell_degrees)) - int(
+                np.floor((lon - dlon + 180) / self.cell_degrees)
+            )
+            cols = [(col_min + step) % self._lon_cells for step in range(span + 1)]
+        return [(row, col) for row in range(row_min, row_max + 1) for col in cols]
+
+    def insert(self, key, lat: float, lon: float, radius_km: float) -> None:
+        cells = self._covered_cells(lat, lon, radius_km)
+        with self._lock:
+            self._remove_locked(key)
+            for cell in cells:
+                self._cells.setdefault(cell, set()).add(key)
+            self._entries[key] = (lat, lon, radius_km, cells)
+
+    def remove(self, key) -> None:
+        with self._lock:
+            self._remove_locked(key)
+
+    def _remove_locked(self, key) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for cell in entry[3]:
+            members = self._cells.get(cell)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._cells[cell]
+
+    def query(self, lat: float, lon: float) -> list:
+        """Keys of all circles that contain the point (lat, lon)."""
+        with self._lock:
+            candidates = [
+                (key, self._entries[key]) for key in self._cells.get(self._cell(lat, lon), ())
+            ]
+        if not candidates:
+            return []
+
+        center_lat = np.fromiter((entry[0] for _, entry in candidates), np.float64, len(candidates))
+        center_lon = np.fromiter((entry[1] for _, entry in candidates), np.float64, len(candidates))
+        radius = np.fromiter((entry[2] for _, entry in candidates), np.float64, len(candidates))
+        inside = haversine_np(center_lat, center_lon, lat, lon) <= radius
+        return [candidates[i][0] for i in np.flatnonzero(inside)]
+
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(lat, lon, precision=5):
+    """Standard base32 geohash of a point."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        coord_range, coord = (lon_range, lon) if even else (lat_range, lat)
+        mid = (coord_range[0] + coord_range[1]) / 2
+        value <<= 1
+        if coord >= mid:
+            value |= 1
+            coord_range[0] = mid
+        else:
+            coord_range[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def geohash_cell_size(precision):
+    """(lat, lon) size in degrees of a geohash cell at the given precision."""
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def geohash_neighbourhood(lat, lon, precision=5):
+    """The point's geohash cell and its (up to) eight neighbours."""
+    lat_step, lon_step = geohash_cell_size(precision)
+    cells = []
+    for dlat in (-lat_step, 0.0, lat_step):
+        cell_lat = lat + dlat
+        if not -90 <= cell_lat <= 90:
+            continue
+        for dlon in (-lon_step, 0.0, lon_step):
+            cell_lon = (lon + dlon + 180) % 360 - 180
+            cell = geohash_encode(cell_lat, cell_lon, precision)
+            if cell not in cells:
+                cells.append(cell)
+    return cells
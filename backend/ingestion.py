@@ -0,0 +1,305 @@
+import csv
+import io
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional
+
+from feed import FeedDiffer
+from fetcher import BASE_INTERVAL, FeedFetcher
+from geo import haversine
+
+KANDILLI_TZ = timezone(timedelta(hours=3))
+
+# Reports from different sources this close in time, space and magnitude are one event.
+DEDUP_TIME_SECONDS = 30
+DEDUP_DISTANCE_KM = 50
+DEDUP_MAGNITUDE_DIFF = 1.0
+DEDUP_RETENTION_SECONDS = 2 * 24 * 3600
+
+FEED_WINDOW = 50
+
+
+def parse_event_time(value: str, naive_tz=timezone.utc) -> datetime:
+    """Parses feed timestamps such as '2025-05-23 12:00:00', '...Z' or '...+03:00Z'."""
+    value = value.strip().replace(" ", "T", 1)
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        parsed = datetime.fromisoformat(value[:-1] if value.endswith("Z") else value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=naive_tz)
+    return parsed
+
+
+class KandilliSource:
+    """Kandilli-style JSON feed (the live API or the local fakeapi.py)."""
+
+    def __init__(self, name: str, url: str, naive_tz=KANDILLI_TZ):
+        self.name = name
+        self.fetcher = FeedFetcher(url)
+        self.naive_tz = naive_tz
+
+    def poll(self) -> Optional[List[Dict]]:
+        earthquakes = self.fetcher.fetch()
+        if earthquakes is None:
+            return None
+        for eq in earthquakes:
+            eq.setdefault("source", self.name)
+        return earthquakes
+
+    def event_time(self, eq: Dict) -> datetime:
+        return parse_event_time(eq["date_time"], self.naive_tz)
+
+    def record_poll(self, new_events: List[Dict], failed: bool = False) -> float:
+        return self.fetcher.record_poll(new_events, failed)
+
+
+def _closest_place(place: str) -> str:
+    # USGS places look like "14 km WNW of Konya, Turkey".
+    place = place or "Unknown"
+    if " of " in place:
+        place = place.split(" of ", 1)[1]
+    return place.split(",")[0].strip() or "Unknown"
+
+
+class CsvCatalogSource:
+    """USGS-style CSV (the columns of data/*.csv) from a URL or a local file."""
+
+    def __init__(self, name: str, location: str, window: int = FEED_WINDOW):
+        self.name = name
+        self.location = location
+        self.window = window
+        self.fetcher = FeedFetcher(location) if "://" in location else None
+        self._file_mtime = None
+
+    def _read(self) -> Optional[str]:
+        if self.fetcher is not None:
+            body = self.fetcher.fetch_body()
+            return body.decode("utf-8") if body is not None else None
+
+        mtime = os.stat(self.location).st_mtime_ns
+        if mtime == self._file_mtime:
+            return None
+        self._file_mtime = mtime
+        with open(self.location, encoding="utf-8") as f:
+            return f.read()
+
+    def poll(self) -> Optional[List[Dict]]:
+        text = self._read()
+        if text is None:
+            return None
+
+        rows = []
+        for row in csv.DictReader(io.StringIO(text)):
+            try:
+                rows.append(
+                    (
+                        parse_event_time(row["time"]),
+                        float(row["latitude"]),
+                        float(row["longitude"]),
+                        float(row["depth"]),
+                        float(row["mag"]),
+                        row,
+                    )
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+        rows.sort(key=lambda item: item[0], reverse=True)
+        return [self._normalize(*item) for item in rows[: self.window]]
+
+    def _normalize(self, event_time, lat, lon, depth, mag, row) -> Dict:
+        local_time = event_time.astimezone(KANDILLI_TZ)
+        return {
+            "_id": f"{self.name}:{row.get('id') or event_time.isoformat()}",
+            "title": row.get("place") or "Unknown",
+            "date": local_time.strftime("%d.%m.%Y"),
+            "date_time": event_time.isoformat(),
+            "lat": lat,
+            "lng": lon,
+            "depth": depth,
+            "mag": mag,
+            "location_properties": {
+                "closestCity": {"name": _closest_place(row.get("place")), "distance": None},
+                "airports": [],
+            },
+            "geojson": {"coordinates": [lon, lat]},
+            "source": self.name,
+        }
+
+    def event_time(self, eq: Dict) -> datetime:
+        return parse_event_time(eq["date_time"])
+
+    def record_poll(self, new_events: List[Dict], failed: bool = False) -> float:
+        if self.fetcher is None:
+            return BASE_INTERVAL
+        return self.fetcher.record_poll(new_events, failed)
+
+
+class _DedupEntry(NamedTuple):
+    timestamp: float
+    latitude: float
+    longitude: float
+    magnitude: float
+    source: str
+    event_id: str
+
+
+class EventDeduplicator:
+    """
+    Space-time proximity index: events are bucketed by time, and a new event is
+    compared only against the entries in its own and the neighbouring buckets.
+    Events from the same source are never merged, since a burst of aftershocks
+    reported by one agency is a burst of distinct events.
+    """
+
+    def __init__(
+        self,
+        time_seconds: float = DEDUP_TIME_SECONDS,
+        distance_km: float = DEDUP_DISTANCE_KM,
+        magnitude_diff: float = DEDUP_MAGNITUDE_DIFF,
+        retention_seconds: float = DEDUP_RETENTION_SECONDS,
+    ):
+        self.time_seconds = time_seconds
+        self.distance_km = distance_km
+        self.magnitude_diff = magnitude_diff
+        self.retention_seconds = retention_seconds
+        self._buckets: "OrderedDict[int, List[_DedupEntry]]" = OrderedDict()
+        self._newest = float("-inf")
+
+    def find_duplicate(
+        self, timestamp: float, lat: float, lon: float, mag: float, source: str
+    ) -> Optional[str]:
+        bucket = int(timestamp // self.time_seconds)
+        for key in (bucket - 1, bucket, bucket + 1):
+            for entry in self._buckets.get(key, ()):
+                if (
+                    entry.source != source
+                    and abs(entry.timestamp - timestamp) <= self.time_seconds
+                    and abs(entry.magnitude - mag) <= self.magnitude_diff
+                    and haversine(entry.latitude, entry.longitude, lat, lon) <= self.distance_km
+                ):
+                    return entry.event_id
+        return None
+
+    def add(
+        self, timestamp: float, lat: float, lon: float, mag: float, source: str, event_id: str
+    ) -> None:
+        bucket = int(timestamp // self.time_seconds)
+        if bucket not in self._buckets:
+            late = bool(self._buckets) and bucket < next(reversed(self._buckets))
+            self._buckets[bucket] = []
+            if late:
+                # Keep buckets ordered by time so eviction can stop at the first young one.
+                self._buckets = OrderedDict(sorted(self._buckets.items()))
+        self._buckets[bucket].append(_DedupEntry(timestamp, lat, lon, mag, source, event_id))
+
+        self._newest = max(self._newest, timestamp)
+        oldest_kept = int((self._newest - self.retention_seconds) // self.time_seconds)
+        while self._buckets and next(iter(self._buckets)) < oldest_kept:
+            self._buckets.popitem(last=False)
+
+
+class PollResult(NamedTuple):
+    # Events from a source's first poll (used to seed the recent list), newest first.
+    initial: List[Dict]
+    # Events seen for the first time across all sources, oldest first.
+    new: List[Dict]
+
+
+class IngestionPipeline:
+    """Polls all sources concurrently and merges their new events into one deduplicated stream."""
+
+    def __init__(self, sources: List):
+        if not sources:
+            raise ValueError("IngestionPipeline needs at least one source")
+        self.sources = sources
+        self._differs = {source.name: FeedDiffer() for source in sources}
+        self._dedup = EventDeduplicator()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, len(sources)), thread_name_prefix="ingest"
+        )
+        self.stats = {
+            source.name: {"polls": 0, "new": 0, "duplicates": 0, "errors": 0}
+            for source in sources
+        }
+        # Sources whose feed window was already reported as PollResult.initial.
+        self._seeded = set()
+        # IDs of every source's last feed window, newest first (see feed_state).
+        self._window_ids = {source.name: [] for source in sources}
+        # Sources whose last poll raised.
+        self._failed = set()
+
+    def _accept(self, source, eq: Dict) -> bool:
+        event_time = source.event_time(eq).timestamp()
+        lat = eq["geojson"]["coordinates"][1]
+        lon = eq["geojson"]["coordinates"][0]
+        if self._dedup.find_duplicate(event_time, lat, lon, eq["mag"], source.name) is not None:
+            self.stats[source.name]["duplicates"] += 1
+            return False
+        self._dedup.add(event_time, lat, lon, eq["mag"], source.name, eq["_id"])
+        return True
+
+    def poll(self) -> PollResult:
+        futures = {source.name: self._executor.submit(source.poll) for source in self.sources}
+
+        initial = []
+        candidates = []
+        self._failed.clear()
+        for source in self.sources:
+            stats = self.stats[source.name]
+            stats["polls"] += 1
+            try:
+                earthquakes = futures[source.name].result()
+            except Exception as e:
+                stats["errors"] += 1
+                self._failed.add(source.name)
+                print(f"Kaynak {source.name} okunamadı: {e}")
+                continue
+            if not earthquakes:
+                continue
+
+            differ = self._differs[source.name]
+            if source.name not in self._seeded:
+                self._seeded.add(source.name)
+                if not differ.primed:
+                    # The newest event is still processed on startup, as before.
+                    differ.prime(earthquakes[1:])
+                for eq in earthquakes:
+                    if eq["_id"] in differ and self._accept(source, eq):
+                        initial.append((source.event_time(eq), eq))
+
+            for eq in differ.diff(earthquakes):
+                candidates.append((source.event_time(eq), source, eq))
+            self._window_ids[source.name] = [eq["_id"] for eq in earthquakes]
+
+        new_events = []
+        for _, source, eq in sorted(candidates, key=lambda item: item[0]):
+            if self._accept(source, eq):
+                self.stats[source.name]["new"] += 1
+                new_events.append(eq)
+
+        initial.sort(key=lambda item: item[0], reverse=True)
+        return PollResult([eq for _, eq in initial], new_events)
+
+    def feed_state(self) -> Dict[str, List[str]]:
+        """The IDs of every source's last feed window, for the process that takes over polling."""
+        return {name: list(ids) for name, ids in self._window_ids.items()}
+
+    def restore(self, feed_state: Dict[str, List[str]]) -> None:
+        """
+        Continues from another process's feed_state: those events count as
+        processed, so the next poll reports them as initial (including the
+        newest one) and only what arrived after them as new.
+        """
+        for source in self.sources:
+            ids = feed_state.get(source.name) or []
+            self._differs[source.name].mark_seen(reversed(ids))
+        self._seeded.clear()
+
+    def record_poll(self, new_events: List[Dict]) -> float:
+        """Updates every source's adaptive interval and returns the shortest one."""
+        return min(
+            source.record_poll(new_events, source.name in self._failed) for source in self.sources
+        )
@@ -0,0 +1,333 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from fast_inference import PARITY_TOLERANCE, CompiledPipeline, parity_probe
+
+ARTIFACT_FILE = "aftershock_model.bin"
+MAGIC = b"AFTSHMDL"
+FORMAT_VERSION = 1
+# Every array starts on a 64-byte boundary of the file.
+ALIGNMENT = 64
+HEADER = struct.Struct("<8sIQ")
+
+# Objectives whose raw score is the prediction (no output transform).
+IDENTITY_OBJECTIVES = {"regression", "regression_l1", "huber", "fair", "quantile", "mape"}
+
+# LightGBM's MissingType and kZeroThreshold.
+MISSING_NONE = 0
+MISSING_ZERO = 1
+MISSING_NAN = 2
+MISSING_TYPES = {"None": MISSING_NONE, "Zero": MISSING_ZERO, "NaN": MISSING_NAN}
+ZERO_THRESHOLD = 1e-35
+
+PIPELINES = ("mag", "time")
+# Rows scored per traversal; keeps the (trees x rows) work arrays cache-sized.
+CHUNK_ROWS = 2048
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _flatten_trees(booster) -> Dict[str, np.ndarray]:
+    """
+    Node arrays of all trees the booster predicts with. Leaves are nodes whose
+    children point back to themselves, so that every row can take exactly
+    max_depth steps; internal nodes have a value of 0.
+    """
+    num_iteration = booster.best_iteration if booster.best_iteration > 0 else -1
+    model = booster.dump_model(num_iteration=num_iteration)
+    objective = model["objective"].split()
+    if objective[0] not in IDENTITY_OBJECTIVES or len(objective) > 1:
+        raise ValueError(f"unsupported objective: {model['objective']}")
+    if model["num_tree_per_iteration"] != 1 or model["average_output"]:
+        raise ValueError("only single-output boosted regressors are supported")
+
+    split_feature: List[int] = []
+    threshold: List[float] = []
+    missing_type: List[int] = []
+    default_left: List[bool] = []
+    left_child: List[int] = []
+    right_child: List[int] = []
+    value: List[float] = []
+    max_depth = 0
+
+    def add(node, depth) -> int:
+        nonlocal max_depth
+        index = len(split_feature)
+        split_feature.append(0)
+        left_child.append(index)
+        right_child.append(index)
+        if "split_index" not in node:
+            threshold.append(np.inf)
+            missing_type.append(MISSING_NONE)
+            default_left.append(True)
+            value.append(node["leaf_value"])
+            max_depth = max(max_depth, depth)
+            return index
+        if node["decision_type"] != "<=":
+            raise ValueError("categorical splits are not supported")
+
+        split_feature[index] = node["split_feature"]
+        threshold.append(node["threshold"])
+        missing_type.append(MISSING_TYPES[node["missing_type"]])
+        default_left.append(node["default_left"])
+        value.append(0.0)
+        left_child[index] = add(node["left_child"], depth + 1)
+        right_child[index] = add(node["right_child"], depth + 1)
+        return index
+
+    roots = [add(tree["tree_structure"], 0) for tree in model["tree_info"]]
+    return {
+        "roots": np.array(roots, dtype=np.int32),
+        "split_feature": np.array(split_feature, dtype=np.int32),
+        "threshold": np.array(threshold, dtype=np.float64),
+        "missing_type": np.array(missing_type, dtype=np.uint8),
+        "default_left": np.array(default_left, dtype=np.bool_),
+        "left_child": np.array(left_child, dtype=np.int32),
+        "right_child": np.array(right_child, dtype=np.int32),
+        "value": np.array(value, dtype=np.float64),
+        "max_depth": np.array([max_depth], dtype=np.int32),
+    }
+
+
+class ArtifactPipeline:
+    """One scaler + tree ensemble scored straight from (memory-mapped) arrays."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], prefix: str):
+        for name in (
+            "mean",
+            "scale",
+            "roots",
+            "split_feature",
+            "threshold",
+            "missing_type",
+            "default_left",
+            "left_child",
+            "right_child",
+            "value",
+        ):
+            setattr(self, name, arrays[f"{prefix}.{name}"])
+        self.max_depth = int(arrays[f"{prefix}.max_depth"][0])
+        self.has_zero_missing = bool(np.any(self.missing_type == MISSING_ZERO))
+
+    def predict(self, rows: np.ndarray) -> np.ndarray:
+        scaled = np.array(rows, dtype=np.float64, copy=True)
+        scaled -= self.mean
+        scaled /= self.scale
+        if len(scaled) <= CHUNK_ROWS:
+            return self._predict_scaled(scaled)
+        return np.concatenate(
+            [
+                self._predict_scaled(scaled[start : start + CHUNK_ROWS])
+                for start in range(0, len(scaled), CHUNK_ROWS)
+            ]
+        )
+
+    def _predict_scaled(self, scaled: np.ndarray) -> np.ndarray:
+        """Moves every row down every tree at once, one tree level per step."""
+        columns = np.ascontiguousarray(scaled.T)
+        has_nan = bool(np.isnan(columns).any())
+
+        n_rows = len(scaled)
+        row = np.arange(n_rows)
+        node = np.repeat(self.roots[:, None], n_rows, axis=1)
+        for _ in range(self.max_depth):
+            fval = columns[self.split_feature[node], row]
+            if has_nan or self.has_zero_missing:
+                go_left = self._decide_with_missing(node, fval)
+            else:
+                go_left = fval <= self.threshold[node]
+            node = np.where(go_left, self.left_child[node], self.right_child[node])
+
+        values = self.value[node]
+        if len(values) == 0:
+            return np.zeros(n_rows, dtype=np.float64)
+        # Trees are added one after another, as LightGBM does.
+        return np.cumsum(values, axis=0)[-1]
+
+    def _decide_with_missing(self, node: np.ndarray, fval: np.ndarray) -> np.ndarray:
+        # Same order as LightGBM's NumericalDecision.
+        missing_type = self.missing_type[node]
+        is_nan = np.isnan(fval)
+        fval = np.where(is_nan & (missing_type != MISSING_NAN), 0.0, fval)
+        use_default = (
+            (missing_type == MISSING_ZERO) & (np.abs(fval) <= ZERO_THRESHOLD)
+        ) | ((missing_type == MISSING_NAN) & is_nan)
+        return np.where(use_default, self.default_left[node], fval <= self.threshold[node])
+
+
+class ArtifactModels:
+    """Both pipelines of an exported artifact; same interface as CompiledModels."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], metadata: Dict, buffer=None):
+        self.mag = ArtifactPipeline(arrays, "mag")
+        self.time = ArtifactPipeline(arrays, "time")
+        self.metadata = metadata
+        self.source_version = metadata["source_version"]
+        # Keeps the mapping alive for as long as the arrays are used.
+        self._buffer = buffer
+
+    def predict_rows(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return self.mag.predict(rows), self.time.predict(rows)
+
+    def predict(
+        self,
+        mainshock_magnitude: float,
+        mainshock_depth: float,
+        mainshock_latitude: float,
+        mainshock_longitude: float,
+    ) -> Tuple[float, float]:
+        row = np.array(
+            [[mainshock_magnitude, mainshock_depth, mainshock_latitude, mainshock_longitude]],
+            dtype=np.float64,
+        )
+        predicted_magnitudes, predicted_time_logs = self.predict_rows(row)
+        return predicted_magnitudes[0], predicted_time_logs[0]
+
+
+def pipeline_arrays(mag_pipe, time_pipe) -> Dict[str, np.ndarray]:
+    arrays = {}
+    for prefix, pipe in zip(PIPELINES, (mag_pipe, time_pipe)):
+        compiled = CompiledPipeline(pipe)
+        arrays[f"{prefix}.mean"] = compiled.mean
+        arrays[f"{prefix}.scale"] = compiled.scale
+        for name, values in _flatten_trees(compiled.booster).items():
+            arrays[f"{prefix}.{name}"] = values
+    return arrays
+
+
+def check_artifact_parity(models: ArtifactModels, mag_pipe, time_pipe, feature_columns) -> float:
+    """Largest absolute difference to the pipelines, on the parity probe plus missing values."""
+    import pandas as pd
+
+    probe = parity_probe()
+    with_missing = probe[:8].copy()
+    with_missing[np.arange(8), np.arange(8) % probe.shape[1]] = np.nan
+    rows = np.vstack([probe, with_missing])
+
+    rows_df = pd.DataFrame(rows, columns=feature_columns)
+    predicted_mag, predicted_time = models.predict_rows(rows)
+    return float(
+        max(
+            np.max(np.abs(predicted_mag - mag_pipe.predict(rows_df))),
+            np.max(np.abs(predicted_time - time_pipe.predict(rows_df))),
+        )
+    )
+
+
+def write_artifact(path: str, arrays: Dict[str, np.ndarray], metadata: Dict) -> None:
+    layout = {}
+    offset = 0
+    for name, values in arrays.items():
+        offset = _align(offset)
+        layout[name] = {
+            "dtype": values.dtype.str,
+            "shape": list(values.shape),
+            "offset": offset,
+        }
+        offset += values.nbytes
+    header_json = json.dumps({**metadata, "arrays": layout}).encode("utf-8")
+    data_start = _align(HEADER.size + len(header_json))
+
+    # Written next to the target and renamed, so processes that have the old
+    # file mapped keep reading the old version.
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(header_json)))
+        f.write(header_json)
+        for name, values in arrays.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(np.ascontiguousarray(values).tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+def _read_header(f) -> Tuple[Dict, int]:
+    magic, format_version, header_length = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{f.name} is not a model artifact")
+    if format_version != FORMAT_VERSION:
+        raise ValueError(f"unsupported model artifact version {format_version}")
+    metadata = json.loads(f.read(header_length))
+    return metadata, _align(HEADER.size + header_length)
+
+
+def read_artifact_metadata(path: str) -> Dict:
+    with open(path, "rb") as f:
+        return _read_header(f)[0]
+
+
+def load_artifact(path: str) -> ArtifactModels:
+    """Maps the artifact read-only; every process that loads it shares the same pages."""
+    with open(path, "rb") as f:
+        metadata, data_start = _read_header(f)
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    arrays = {}
+    for name, spec in metadata["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        arrays[name] = np.frombuffer(
+            buffer, dtype=dtype, count=count, offset=data_start + spec["offset"]
+        ).reshape(spec["shape"])
+    return ArtifactModels(arrays, metadata, buffer)
+
+
+def export_artifact(
+    mag_pipe, time_pipe, path: str, source_version: str, feature_columns: List[str]
+) -> float:
+    """Writes the artifact after checking it against the pipelines; returns the max difference."""
+    arrays = pipeline_arrays(mag_pipe, time_pipe)
+    metadata = {
+        "source_version": source_version,
+        "feature_columns": list(feature_columns),
+    }
+    max_diff = check_artifact_parity(
+        ArtifactModels(arrays, metadata), mag_pipe, time_pipe, feature_columns
+    )
+    if not max_diff <= PARITY_TOLERANCE:
+        raise ValueError(f"artifact differs from the pipelines by {max_diff:.3g}")
+    write_artifact(path, arrays, metadata)
+    return max_diff
+
+
+def main():
+    import joblib
+
+    from features import FEATURE_COLUMNS
+    from model_registry import MAG_MODEL_FILE, MODEL_DIR, TIME_MODEL_FILE, files_version
+
+    parser = argparse.ArgumentParser(
+        description="Export the LightGBM pipelines to a memory-mappable model artifact."
+    )
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--output", default=None, help=f"default: <model-dir>/{ARTIFACT_FILE}")
+    args = parser.parse_args()
+
+    paths = [
+        os.path.join(args.model_dir, MAG_MODEL_FILE),
+        os.path.join(args.model_dir, TIME_MODEL_FILE),
+    ]
+    output = args.output or os.path.join(args.model_dir, ARTIFACT_FILE)
+    max_diff = export_artifact(
+        joblib.load(paths[0]),
+        joblib.load(paths[1]),
+        output,
+        files_version(paths),
+        FEATURE_COLUMNS,
+    )
+    print(
+        f"{output} yazıldı ({os.path.getsize(output)} bayt, "
+        f"pipeline ile en büyük fark {max_diff:.3g}); "
+        "sunucu AFTERSHOCK_MODEL_ARTIFACT=1 ile kullanır"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from fast_inference import compile_pipelines, parity_probe
+from model_artifact import ARTIFACT_FILE, load_artifact, read_artifact_metadata
+
+MODEL_DIR = "models"
+MAG_MODEL_FILE = "lgbm_mag_pipeline.pkl"
+TIME_MODEL_FILE = "lgbm_time_pipeline.pkl"
+WATCH_INTERVAL_SECONDS = 10
+
+
+def files_version(paths: List[str]) -> str:
+    """First 12 hex digits of the sha1 over the given files."""
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+class ModelBundle(NamedTuple):
+    # files_version() of the pickles, also when scoring from an artifact exported from them.
+    version: str
+    # None when the bundle was loaded from an artifact.
+    mag_pipe: object
+    time_pipe: object
+    # CompiledModels, ArtifactModels or None; scores single rows and batches.
+    compiled: object
+    loaded_at: float
+    load_seconds: float
+    # "pipeline", "compiled" or "artifact"
+    inference_mode: str
+
+
+class ModelRegistry:
+    """
+    Holds the active model bundle. A new version is loaded and warmed up next to
+    the active one and swapped in with a single reference assignment, so calls
+    that already read ``active`` finish on the bundle they started with. If the
+    new files fail to load or warm up, the active bundle stays in place.
+    """
+
+    def __init__(
+        self,
+        feature_columns: List[str],
+        model_dir: str = MODEL_DIR,
+        use_compiled: bool = True,
+        use_artifact: bool = False,
+        on_swap: Optional[Callable[[ModelBundle, Optional[ModelBundle]], None]] = None,
+    ):
+        self.feature_columns = feature_columns
+        self.model_dir = model_dir
+        self.use_compiled = use_compiled
+        self.use_artifact = use_artifact
+        self.on_swap = on_swap
+        self.active: Optional[ModelBundle] = None
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+        self._reload_lock = threading.Lock()
+        self._seen_fingerprint = None
+        self._pending_fingerprint = None
+        self._watcher = None
+        self._load_finished = False
+
+    @property
+    def paths(self) -> List[str]:
+        return [
+            os.path.join(self.model_dir, MAG_MODEL_FILE),
+            os.path.join(self.model_dir, TIME_MODEL_FILE),
+        ]
+
+    @property
+    def artifact_path(self) -> str:
+        return os.path.join(self.model_dir, ARTIFACT_FILE)
+
+    def _fingerprint(self):
+        stats = []
+        for path in self.paths + [self.artifact_path]:
+            try:
+                stat = os.stat(path)
+                stats.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                stats.append(None)
+        return tuple(stats) if any(stats) else None
+
+    def _choose_source(self):
+        """Returns (version, use_artifact); the artifact is skipped if it is older than the pickles."""
+        has_pickles = all(os.path.exists(path) for path in self.paths)
+        version = files_version(self.paths) if has_pickles else None
+        if self.use_artifact and os.path.exists(self.artifact_path):
+            artifact_version = read_artifact_metadata(self.artifact_path)["source_version"]
+            if version is None or artifact_version == version:
+                return artifact_version, True
+            print("Model artifact'ı pickle dosyalarından eski, pickle dosyaları kullanılıyor.")
+        if version is None:
+            raise FileNotFoundError("Model files not found")
+        return version, False
+
+    def _warm_up(self, mag_pipe, time_pipe, compiled) -> None:
+        probe = parity_probe()[:1]
+        outputs = []
+        if mag_pipe is not None:
+            import pandas as pd
+
+            probe_df = pd.DataFrame(probe, columns=self.feature_columns)
+            outputs.extend([mag_pipe.predict(probe_df)[0], time_pipe.predict(probe_df)[0]])
+        if compiled is not None:
+            outputs.extend(compiled.predict(*probe[0]))
+        if not np.all(np.isfinite(outputs)):
+            raise ValueError("warm-up prediction is not finite")
+
+    def get(self) -> Optional[ModelBundle]:
+        """
+        The active bundle, loading the model files first if no load has finished
+        yet; a caller that arrives during the warm-up waits for it.
+        """
+        bundle = self.active
+        if bundle is None and not self._load_finished:
+            self.load()
+            bundle = self.active
+        return bundle
+
+    def start_warmup(self) -> threading.Thread:
+        """Loads the models in the background so that the first request does not pay for it."""
+        thread = threading.Thread(target=self.get, daemon=True, name="model-warmup")
+        thread.start()
+        return thread
+
+    def load(self, force: bool = False) -> Dict:
+        """Loads the model files if they changed (or when forced) and swaps them in."""
+        with self._reload_lock:
+            try:
+                return self._load_locked(force)
+            finally:
+                self._load_finished = True
+
+    def _load_locked(self, force: bool) -> Dict:
+        fingerprint = self._fingerprint()
+        if fingerprint is None:
+            self.last_error = "Model files not found"
+            print("Model dosyaları bulunamadı.")
+            return {
+                "success": False,
+                "error": self.last_error,
+                "error_code": "MODEL_FILES_NOT_FOUND",
+            }
+
+        active = self.active
+        started = time.perf_counter()
+        try:
+            version, from_artifact = self._choose_source()
+            inference_mode = "artifact" if from_artifact else None
+            if (
+                not force
+                and active is not None
+                and active.version == version
+                and (active.inference_mode == "artifact") == from_artifact
+            ):
+                self._seen_fingerprint = fingerprint
+                return {"success": True, "changed": False, "version": version}
+
+            if from_artifact:
+                mag_pipe = time_pipe = None
+                compiled = load_artifact(self.artifact_path)
+            else:
+                import joblib
+
+                mag_pipe = joblib.load(self.paths[0])
+                time_pipe = joblib.load(self.paths[1])
+                compiled = (
+                    compile_pipelines(mag_pipe, time_pipe, self.feature_columns)
+                    if self.use_compiled
+                    else None
+                )
+                inference_mode = "compiled" if compiled is not None else "pipeline"
+            self._warm_up(mag_pipe, time_pipe, compiled)
+        except Exception as e:
+            # Not retried by the watcher until the files change again.
+            self._seen_fingerprint = fingerprint
+            self.last_error = str(e)
+            print(f"Yeni model yüklenemedi, aktif model korunuyor: {e}")
+            return {
+                "success": False,
+                "error": f"Model reload failed: {e}",
+                "error_code": "MODEL_RELOAD_FAILED",
+            }
+
+        bundle = ModelBundle(
+            version,
+            mag_pipe,
+            time_pipe,
+            compiled,
+            time.time(),
+            time.perf_counter() - started,
+            inference_mode,
+        )
+        self.active = bundle
+        self._seen_fingerprint = fingerprint
+        self.last_error = None
+        if active is not None:
+            self.reloads += 1
+        if self.on_swap is not None:
+            self.on_swap(bundle, active)
+        print(
+            f"Model sürümü {version} yüklendi ({inference_mode}, {bundle.load_seconds:.2f} sn)"
+        )
+        return {
+            "success": True,
+            "changed": True,
+            "version": version,
+            "previous_version": active.version if active is not None else None,
+            "load_seconds": bundle.load_seconds,
+        }
+
+    def check_for_changes(self) -> Optional[Dict]:
+        """
+        Reloads once the model files changed and then stayed the same for one
+        check, so a copy that is still being written is not picked up.
+        """
+        fingerprint = self._fingerprint()
+        if fingerprint is None or fingerprint == self._seen_fingerprint:
+            self._pending_fingerprint = None
+            return None
+        if fingerprint != self._pending_fingerprint:
+            self._pending_fingerprint = fingerprint
+            return None
+        self._pending_fingerprint = None
+        return self.load()
+
+    def start_watcher(self, interval: float = WATCH_INTERVAL_SECONDS) -> None:
+        def watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.check_for_changes()
+                except Exception as e:
+                    print(f"Model klasörü izlenemedi: {e}")
+
+        self._watcher = threading.Thread(target=watch, daemon=True, name="model-watcher")
+        self._watcher.start()
+
+    @property
+    def state(self) -> str:
+        """"ready", "loading" until the first load finished, else "unavailable" (see last_error)."""
+        if self.active is not None:
+            return "ready"
+        return "unavailable" if self._load_finished else "loading"
+
+    def status(self) -> Dict:
+        bundle = self.active
+        return {
+            "model_state": self.state,
+            "model_version": bundle.version if bundle is not None else None,
+            "model_loaded_at": (
+                datetime.fromtimestamp(bundle.loaded_at, timezone.utc).isoformat()
+                if bundle is not None
+                else None
+            ),
+            "model_load_seconds": (
+                round(bundle.load_seconds, 3) if bundle is not None else None
+            ),
+            "model_reloads": self.reloads,
+            "model_last_error": self.last_error,
+        }
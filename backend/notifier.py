@@ -0,0 +1,212 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+FCM_MULTICAST_LIMIT = 500
+
+# FirebaseError.code values worth retrying.
+RETRYABLE_CODES = {
+    "UNAVAILABLE",
+    "INTERNAL",
+    "RESOURCE_EXHAUSTED",
+    "DEADLINE_EXCEEDED",
+    "UNKNOWN",
+}
+
+
+class LazyFirebaseMessaging:
+    """
+    Stands in for ``firebase_admin.messaging``: the Firebase SDK is imported and
+    the default app initialized from ``credential_path`` on first attribute
+    access instead of at startup.
+    """
+
+    def __init__(
+        self,
+        credential_path: str,
+        on_initialized: Optional[Callable[[float], None]] = None,
+    ):
+        self.credential_path = credential_path
+        self.on_initialized = on_initialized
+        self._messaging = None
+        self._lock = threading.Lock()
+
+    def initialize(self):
+        if self._messaging is None:
+            with self._lock:
+                if self._messaging is None:
+                    started = time.perf_counter()
+                    import firebase_admin
+                    from firebase_admin import credentials, messaging
+
+                    try:
+                        firebase_admin.get_app()
+                    except ValueError:
+                        firebase_admin.initialize_app(
+                            credentials.Certificate(self.credential_path)
+                        )
+                    self._messaging = messaging
+                    if self.on_initialized is not None:
+                        self.on_initialized(time.perf_counter() - started)
+        return self._messaging
+
+    def __getattr__(self, name):
+        return getattr(self.initialize(), name)
+
+
+class NotificationDispatcher:
+    """
+    Sends FCM notifications in multicast batches on a bounded worker pool.
+
+    ``messaging_module`` is ``firebase_admin.messaging`` or any object exposing
+    ``Notification``, ``MulticastMessage`` and ``send_each_for_multicast``.
+    Tokens that FCM reports as unregistered are passed to ``on_invalid_tokens``.
+    """
+
+    def __init__(
+        self,
+        messaging_module=None,
+        max_workers: int = 4,
+        batch_size: int = FCM_MULTICAST_LIMIT,
+        max_retries: int = 3,
+        backoff_seconds: float = 1.0,
+        on_invalid_tokens: Optional[Callable[[List[str]], None]] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if messaging_module is None:
+            from firebase_admin import messaging as messaging_module
+
+        self.messaging = messaging_module
+        self.batch_size = min(batch_size, FCM_MULTICAST_LIMIT)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.on_invalid_tokens = on_invalid_tokens
+        self._sleep = sleep
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="fcm-dispatch"
+        )
+        self._lock = threading.Lock()
+        self._batch_counter = 0
+        self.recent_reports = deque(maxlen=100)
+        self.stats = {
+            "batches": 0,
+            "sent": 0,
+            "failed": 0,
+            "pruned": 0,
+            "retries": 0,
+        }
+
+    def dispatch(self, tokens: Iterable[str], title: str, body: str) -> List:
+        """Queues the notification for every token and returns one future per batch."""
+        tokens = list(tokens)
+        futures = []
+        for start in range(0, len(tokens), self.batch_size):
+            with self._lock:
+                self._batch_counter += 1
+                batch_id = self._batch_counter
+            futures.append(
+                self._executor.submit(
+                    self._send_batch,
+                    batch_id,
+                    tokens[start : start + self.batch_size],
+                    title,
+                    body,
+                )
+            )
+        return futures
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def _is_unregistered(self, exc) -> bool:
+        unregistered_types = tuple(
+            error_type
+            for error_type in (
+                getattr(self.messaging, "UnregisteredError", None),
+                getattr(self.messaging, "SenderIdMismatchError", None),
+            )
+            if isinstance(error_type, type)
+        )
+        return bool(unregistered_types) and isinstance(exc, unregistered_types)
+
+    @staticmethod
+    def _is_retryable(exc) -> bool:
+        code = getattr(exc, "code", None)
+        # Errors without a Firebase code are transport failures (timeouts, resets).
+        return code is None or code in RETRYABLE_CODES
+
+    def _send_batch(self, batch_id: int, tokens: List[str], title: str, body: str) -> Dict:
+        started = time.perf_counter()
+        pending = tokens
+        sent = 0
+        failed = 0
+        invalid = []
+        retries = 0
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                retries += 1
+                self._sleep(self.backoff_seconds * (2 ** (attempt - 1)))
+
+            try:
+                # Inside the try: with LazyFirebaseMessaging this is where Firebase
+                # initializes, and nothing reads the future this runs in.
+                message = self.messaging.MulticastMessage(
+                    tokens=pending,
+                    notification=self.messaging.Notification(title=title, body=body),
+                )
+                response = self.messaging.send_each_for_multicast(message)
+            except Exception as e:
+                if self._is_retryable(e) and attempt < self.max_retries:
+                    continue
+                print(f"FCM batch {batch_id} gönderilemedi: {e}")
+                failed += len(pending)
+                pending = []
+                break
+
+            retry_tokens = []
+            for token, send_response in zip(pending, response.responses):
+                if send_response.success:
+                    sent += 1
+                elif self._is_unregistered(send_response.exception):
+                    invalid.append(token)
+                elif self._is_retryable(send_response.exception):
+                    retry_tokens.append(token)
+                else:
+                    failed += 1
+
+            pending = retry_tokens
+            if not pending:
+                break
+
+        failed += len(pending)
+        if invalid and self.on_invalid_tokens is not None:
+            try:
+                self.on_invalid_tokens(invalid)
+            except Exception as e:
+                print(f"Geçersiz FCM token'ları silinemedi: {e}")
+
+        report = {
+            "batch_id": batch_id,
+            "tokens": len(tokens),
+            "sent": sent,
+            "failed": failed,
+            "pruned": len(invalid),
+            "retries": retries,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        with self._lock:
+            self.stats["batches"] += 1
+            self.stats["sent"] += sent
+            self.stats["failed"] += failed
+            self.stats["pruned"] += len(invalid)
+            self.stats["retries"] += retries
+            self.recent_reports.append(report)
+
+        print(
+            f"FCM batch {batch_id}: {len(tokens)} token, {sent} başarılı, {failed} hatalı, "
+            f"{len(invalid)} silindi, {report['latency_ms']} ms"
+        )
+        return report
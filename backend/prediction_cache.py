@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_TTL_SECONDS = 3600
+
+# Catalog precision of (magnitude, depth, latitude, longitude): 0.1, 0.1 km, 1e-4 degrees.
+QUANTIZATION_SCALES = np.array([10.0, 10.0, 1e4, 1e4])
+
+Quantized = Tuple[int, int, int, int]
+# (model version, *Quantized): a new model version never sees the old entries.
+Key = Tuple
+Outputs = Tuple[float, float]
+
+
+def quantize(
+    mainshock_magnitude: float,
+    mainshock_depth: float,
+    mainshock_latitude: float,
+    mainshock_longitude: float,
+) -> Quantized:
+    return (
+        round(mainshock_magnitude * 10.0),
+        round(mainshock_depth * 10.0),
+        round(mainshock_latitude * 1e4),
+        round(mainshock_longitude * 1e4),
+    )
+
+
+def quantize_rows(features: np.ndarray) -> np.ndarray:
+    """Row-wise quantize(); rounds half to even exactly like the scalar version."""
+    return np.rint(np.asarray(features, dtype=np.float64) * QUANTIZATION_SCALES).astype(np.int64)
+
+
+def dequantize(quantized: Quantized) -> Tuple[float, float, float, float]:
+    """The model inputs a key stands for; inputs already at catalog precision come back unchanged."""
+    return tuple(
+        value / scale for value, scale in zip(quantized, QUANTIZATION_SCALES.tolist())
+    )
+
+
+def dequantize_rows(keys: np.ndarray) -> np.ndarray:
+    return keys / QUANTIZATION_SCALES
+
+
+class PredictionCache:
+    """
+    LRU cache with a TTL for raw model outputs (predicted magnitude, log time),
+    keyed on the model version and quantized mainshock parameters. Results are built from the inputs
+    of each request, so only the two model outputs are shared.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        clock=time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Key, Tuple[Outputs, float]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get_locked(self, key: Key, now: float) -> Optional[Outputs]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            outputs, expires_at = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return outputs
+            del self._entries[key]
+            self._expirations += 1
+        self._misses += 1
+        return None
+
+    def _put_locked(self, key: Key, outputs: Outputs, now: float) -> None:
+        self._entries[key] = (outputs, now + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def get(self, key: Key) -> Optional[Outputs]:
+        with self._lock:
+            return self._get_locked(key, self.clock())
+
+    def put(self, key: Key, outputs: Outputs) -> None:
+        with self._lock:
+            self._put_locked(key, outputs, self.clock())
+
+    def get_many(self, keys: Iterable[Key]) -> List[Optional[Outputs]]:
+        with self._lock:
+            now = self.clock()
+            return [self._get_locked(key, now) for key in keys]
+
+    def put_many(self, items: Iterable[Tuple[Key, Outputs]]) -> None:
+        with self._lock:
+            now = self.clock()
+            for key, outputs in items:
+                self._put_locked(key, outputs, now)
+
+    def clear(self) -> None:
+        """Drops every entry, e.g. after the models were reloaded; counters are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else None,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+            }
@@ -0,0 +1,70 @@
+from bisect import bisect_right
+from typing import Iterable, List, Optional
+
+from geo import geohash_encode, geohash_neighbourhood
+
+# Clients that never sent "subscribe" stay here and keep receiving every event.
+ALL_ROOM = "all"
+
+# A subscription joins the highest tier at or below its min_magnitude; an event is
+# sent to every tier at or below its magnitude. The mobile client drops the events
+# between the tier and its own min_magnitude.
+MAGNITUDE_TIERS = (0.0, 2.0, 3.0, 4.0, 4.5, 5.0, 5.5, 6.0, 7.0)
+
+# Precision 3 cells are 1.40625° x 1.40625°: ~156 km north-south and, at Turkish
+# latitudes (36-42°N), ~116-127 km east-west. A location subscription joins its cell
+# plus the eight neighbours, so it covers at least ~115 km east-west and ~155 km
+# north-south around it; farther events may or may not arrive.
+GEOHASH_PRECISION = 3
+
+
+def normalize_city(name: Optional[str]) -> Optional[str]:
+    return name.strip().casefold() if name and name.strip() else None
+
+
+def magnitude_tier(min_magnitude: Optional[float]) -> float:
+    if min_magnitude is None:
+        return MAGNITUDE_TIERS[0]
+    index = bisect_right(MAGNITUDE_TIERS, min_magnitude) - 1
+    return MAGNITUDE_TIERS[max(index, 0)]
+
+
+def _room(kind: str, key: str, tier: float) -> str:
+    return f"{kind}:{key}:m{tier:g}"
+
+
+def subscription_rooms(
+    cities: Iterable[str] = (),
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    min_magnitude: Optional[float] = None,
+) -> List[str]:
+    """Rooms a client joins for the given cities and/or location; empty means ALL_ROOM."""
+    tier = magnitude_tier(min_magnitude)
+    rooms = []
+    for city in cities:
+        city = normalize_city(city)
+        if city is not None:
+            rooms.append(_room("city", city, tier))
+    if latitude is not None and longitude is not None:
+        for cell in geohash_neighbourhood(latitude, longitude, GEOHASH_PRECISION):
+            rooms.append(_room("geo", cell, tier))
+    return list(dict.fromkeys(rooms))
+
+
+def event_rooms(
+    magnitude: float,
+    city: Optional[str],
+    latitude: Optional[float],
+    longitude: Optional[float],
+) -> List[str]:
+    """Every room that should receive an event."""
+    tiers = MAGNITUDE_TIERS[: max(bisect_right(MAGNITUDE_TIERS, magnitude), 1)]
+    rooms = [ALL_ROOM]
+    city = normalize_city(city)
+    if city is not None:
+        rooms.extend(_room("city", city, tier) for tier in tiers)
+    if latitude is not None and longitude is not None:
+        cell = geohash_encode(latitude, longitude, GEOHASH_PRECISION)
+        rooms.extend(_room("geo", cell, tier) for tier in tiers)
+    return rooms
@@ -0,0 +1,199 @@
+import heapq
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from geo import GridIndex
+from sequences import MAINSHOCK_MIN_MAG, RADIUS_KM, TIME_WINDOW_DAYS
+
+SECONDS_PER_DAY = 86_400
+
+
+class SequenceEvent(NamedTuple):
+    id: str
+    # Unix seconds.
+    time: float
+    magnitude: float
+    latitude: float
+    longitude: float
+    depth: float
+    closest_city: Optional[str] = None
+
+
+def _isoformat(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+class AftershockSequence:
+    """A mainshock and the running totals of the aftershocks assigned to it."""
+
+    __slots__ = (
+        "mainshock",
+        "expires_at",
+        "aftershock_count",
+        "first_aftershock",
+        "largest_aftershock",
+        "last_event",
+    )
+
+    def __init__(self, mainshock: SequenceEvent, expires_at: float):
+        self.mainshock = mainshock
+        self.expires_at = expires_at
+        self.aftershock_count = 0
+        self.first_aftershock: Optional[SequenceEvent] = None
+        self.largest_aftershock: Optional[SequenceEvent] = None
+        self.last_event = mainshock
+
+    @property
+    def id(self) -> str:
+        return self.mainshock.id
+
+    def add(self, event: SequenceEvent) -> None:
+        self.aftershock_count += 1
+        if self.first_aftershock is None or event.time < self.first_aftershock.time:
+            self.first_aftershock = event
+        if self.largest_aftershock is None or event.magnitude > self.largest_aftershock.magnitude:
+            self.largest_aftershock = event
+        if event.time >= self.last_event.time:
+            self.last_event = event
+
+    def _aftershock_dict(self, event: Optional[SequenceEvent]) -> Optional[Dict]:
+        if event is None:
+            return None
+        return {
+            "id": event.id,
+            "magnitude": event.magnitude,
+            "time": _isoformat(event.time),
+            "hours_after_mainshock": round((event.time - self.mainshock.time) / 3600.0, 3),
+        }
+
+    def to_dict(self, status: str) -> Dict:
+        mainshock = self.mainshock
+        return {
+            "sequence_id": self.id,
+            "status": status,
+            "mainshock": {
+                "id": mainshock.id,
+                "magnitude": mainshock.magnitude,
+                "depth": mainshock.depth,
+                "latitude": mainshock.latitude,
+                "longitude": mainshock.longitude,
+                "closest_city": mainshock.closest_city,
+                "time": _isoformat(mainshock.time),
+            },
+            "aftershock_count": self.aftershock_count,
+            "first_aftershock": self._aftershock_dict(self.first_aftershock),
+            "largest_aftershock": self._aftershock_dict(self.largest_aftershock),
+            "last_event_id": self.last_event.id,
+            "expires_at": _isoformat(self.expires_at),
+        }
+
+
+class SequenceTracker:
+    """
+    Online counterpart of identify_mainshock_aftershock_sequences: every event of
+    at least mainshock_min_mag opens a sequence that stays active for
+    time_window_days, and later, smaller events within radius_km of an active
+    mainshock are counted as its aftershocks.
+
+    Active mainshocks are kept as circles in a GridIndex, so assigning an event
+    is one cell lookup, and in a heap ordered by expiry, so dropping finished
+    sequences costs O(log n) each. Time advances with the newest event seen,
+    which keeps replays of old catalogs consistent with live feeds.
+    """
+
+    def __init__(
+        self,
+        mainshock_min_mag: float = MAINSHOCK_MIN_MAG,
+        radius_km: float = RADIUS_KM,
+        time_window_days: float = TIME_WINDOW_DAYS,
+    ):
+        self.mainshock_min_mag = mainshock_min_mag
+        self.radius_km = radius_km
+        self.window_seconds = time_window_days * SECONDS_PER_DAY
+        self._index = GridIndex()
+        self._sequences: Dict[str, AftershockSequence] = {}
+        self._expiry = []
+        self._lock = threading.Lock()
+        self._now = float("-inf")
+
+    def __len__(self) -> int:
+        return len(self._sequences)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._index = GridIndex()
+            self._sequences = {}
+            self._expiry = []
+            self._now = float("-inf")
+
+    def _expire_locked(self) -> None:
+        while self._expiry and self._expiry[0][0] < self._now:
+            _, sequence_id = heapq.heappop(self._expiry)
+            self._sequences.pop(sequence_id, None)
+            self._index.remove(sequence_id)
+
+    def _match_locked(self, event: SequenceEvent) -> Optional[AftershockSequence]:
+        """The largest (then most recent) active mainshock the event is an aftershock of."""
+        best = None
+        for sequence_id in self._index.query(event.latitude, event.longitude):
+            sequence = self._sequences[sequence_id]
+            mainshock = sequence.mainshock
+            if not (
+                mainshock.time < event.time <= sequence.expires_at
+                and event.magnitude < mainshock.magnitude
+            ):
+                continue
+            if best is None or (mainshock.magnitude, mainshock.time) > (
+                best.mainshock.magnitude,
+                best.mainshock.time,
+            ):
+                best = sequence
+        return best
+
+    def _observe_locked(self, event: SequenceEvent, changed: Dict[str, str]) -> Optional[str]:
+        self._now = max(self._now, event.time)
+        self._expire_locked()
+        if event.id in self._sequences:
+            return event.id
+
+        sequence = self._match_locked(event)
+        if sequence is not None:
+            sequence.add(event)
+            changed.setdefault(sequence.id, "updated")
+            return sequence.id
+
+        if event.magnitude < self.mainshock_min_mag:
+            return None
+        expires_at = event.time + self.window_seconds
+        if expires_at < self._now:
+            return None
+        self._sequences[event.id] = AftershockSequence(event, expires_at)
+        self._index.insert(event.id, event.latitude, event.longitude, self.radius_km)
+        heapq.heappush(self._expiry, (expires_at, event.id))
+        changed[event.id] = "started"
+        return event.id
+
+    def observe(self, events: Iterable[SequenceEvent]) -> Tuple[List[Optional[str]], List[Dict]]:
+        """
+        Assigns events given oldest first. Returns the sequence id of each event
+        (None if it belongs to no sequence) and one update per sequence that was
+        started or changed, in its state after the last of the events.
+        """
+        changed: Dict[str, str] = {}
+        with self._lock:
+            sequence_ids = [self._observe_locked(event, changed) for event in events]
+            updates = [
+                self._sequences[sequence_id].to_dict(status)
+                for sequence_id, status in changed.items()
+                if sequence_id in self._sequences
+            ]
+        return sequence_ids, updates
+
+    def active(self) -> List[Dict]:
+        """Active sequences, most recent mainshock first."""
+        with self._lock:
+            sequences = sorted(
+                self._sequences.values(), key=lambda sequence: sequence.mainshock.time, reverse=True
+            )
+            return [sequence.to_dict("active") for sequence in sequences]
@@ -0,0 +1,121 @@
+import numpy as np
+
+from geo import haversine_np
+
+NS_PER_DAY = 86_400 * 1_000_000_000
+MAINSHOCK_MIN_MAG = 5.5
+RADIUS_KM = 150
+TIME_WINDOW_DAYS = 30
+# pandas is imported on use: the live SequenceTracker only needs the defaults above.
+
+
+def _time_ns(times) -> np.ndarray:
+    """Event times (a pandas Series) as int64 nanoseconds (UTC for tz-aware columns)."""
+    import pandas as pd
+
+    return pd.DatetimeIndex(times).as_unit("ns").asi8
+
+
+def identify_mainshock_aftershock_sequences(
+    df,
+    mainshock_min_mag=MAINSHOCK_MIN_MAG,
+    radius_km=RADIUS_KM,
+    time_window_days=TIME_WINDOW_DAYS,
+):
+    """
+    Ana şokları ve onlara bağlı artçı şok dizilerini tanımlar.
+    Her ana şok için, zaman ve mekan penceresindeki İLK artçıyı hedefler.
+
+    Katalog zamana göre sıralanır; her ana şokun zaman penceresi searchsorted
+    ile bulunur ve mesafeler yalnızca bu pencere için vektörel hesaplanır.
+    """
+    import pandas as pd
+
+    if df is None or df.empty:
+        print("Deprem verisi boş veya yüklenememiş.")
+        return pd.DataFrame()
+
+    time_ns = _time_ns(df["time"])
+    order = np.argsort(time_ns, kind="stable")
+    sorted_time = time_ns[order]
+    sorted_lat = df["latitude"].to_numpy(dtype=np.float64)[order]
+    sorted_lon = df["longitude"].to_numpy(dtype=np.float64)[order]
+    sorted_mag = df["mag"].to_numpy(dtype=np.float64)[order]
+    sorted_labels = df.index.to_numpy()[order]
+
+    mags = df["mag"].to_numpy(dtype=np.float64)
+    mainshock_rows = np.flatnonzero(mags >= mainshock_min_mag)
+    print(f"Potansiyel ana şok sayısı (M>={mainshock_min_mag}): {len(mainshock_rows)}")
+
+    labels = df.index.to_numpy()
+    lats = df["latitude"].to_numpy(dtype=np.float64)
+    lons = df["longitude"].to_numpy(dtype=np.float64)
+    depths = df["depth"].to_numpy(dtype=np.float64)
+    window_ns = int(time_window_days * NS_PER_DAY)
+
+    columns = {
+        "mainshock_mag": [],
+        "mainshock_depth": [],
+        "mainshock_lat": [],
+        "mainshock_lon": [],
+        "aftershock_mag": [],
+        "time_to_aftershock_hours": [],
+        "mainshock_id": [],
+        "aftershock_id": [],
+    }
+    processed_event_indices = set()
+
+    for row in mainshock_rows:
+        idx = labels[row]
+        if idx in processed_event_indices:
+            continue
+
+        mainshock_time = time_ns[row]
+        mainshock_mag = mags[row]
+        mainshock_lat = lats[row]
+        mainshock_lon = lons[row]
+
+        start = np.searchsorted(sorted_time, mainshock_time, side="right")
+        end = np.searchsorted(sorted_time, mainshock_time + window_ns, side="right")
+        if start >= end:
+            continue
+
+        candidates = start + np.flatnonzero(
+            (sorted_mag[start:end] < mainshock_mag) & (sorted_labels[start:end] != idx)
+        )
+        if candidates.size == 0:
+            continue
+
+        distances = haversine_np(
+            mainshock_lat, mainshock_lon, sorted_lat[candidates], sorted_lon[candidates]
+        )
+        within_radius = np.flatnonzero(distances <= radius_km)
+        if within_radius.size == 0:
+            continue
+
+        first = candidates[within_radius[0]]
+        aftershock_idx = sorted_labels[first]
+        if aftershock_idx in processed_event_indices:
+            continue
+
+        time_to_first_aftershock_hours = (
+            pd.Timedelta(int(sorted_time[first] - mainshock_time), unit="ns").total_seconds()
+            / 3600.0
+        )
+
+        columns["mainshock_mag"].append(mainshock_mag)
+        columns["mainshock_depth"].append(depths[row])
+        columns["mainshock_lat"].append(mainshock_lat)
+        columns["mainshock_lon"].append(mainshock_lon)
+        columns["aftershock_mag"].append(sorted_mag[first])
+        columns["time_to_aftershock_hours"].append(time_to_first_aftershock_hours)
+        columns["mainshock_id"].append(idx)
+        columns["aftershock_id"].append(aftershock_idx)
+        processed_event_indices.add(idx)
+        processed_event_indices.add(aftershock_idx)
+
+    feature_df = pd.DataFrame(columns) if columns["mainshock_id"] else pd.DataFrame()
+    print(f"\nOluşturulan eğitim örneği sayısı: {len(feature_df)}")
+    if not feature_df.empty:
+        print("Örnek eğitim verisi:\n", feature_df.head())
+    return feature_df
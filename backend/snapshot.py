@@ -0,0 +1,186 @@
+import json
+import threading
+from collections import deque
+from typing import Dict, NamedTuple, Optional, Sequence
+
+DEFAULT_HISTORY = 256
+
+
+class RawJSON:
+    """An already serialized JSON value that SnapshotJSON splices into packets as-is."""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def __getstate__(self):
+        return self.text
+
+    def __setstate__(self, state):
+        self.text = state
+
+
+class _ContainsRawJSON(Exception):
+    pass
+
+
+def _reject_raw(value):
+    if isinstance(value, RawJSON):
+        raise _ContainsRawJSON
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _splice(obj, kwargs) -> str:
+    """json.dumps that writes RawJSON values (at any depth) verbatim."""
+    if isinstance(obj, RawJSON):
+        return obj.text
+    item_separator, key_separator = kwargs.get("separators", (", ", ": "))
+    if isinstance(obj, (list, tuple)):
+        return "[" + item_separator.join(_splice(item, kwargs) for item in obj) + "]"
+    if isinstance(obj, dict):
+        return (
+            "{"
+            + item_separator.join(
+                json.dumps(str(key)) + key_separator + _splice(value, kwargs)
+                for key, value in obj.items()
+            )
+            + "}"
+        )
+    return json.dumps(obj, **kwargs)
+
+
+class SnapshotJSON:
+    """
+    json module for SocketIO(json=...): RawJSON values are inserted verbatim
+    instead of being serialized again for every client. Besides the emit
+    arguments this covers the message dicts the Redis manager publishes.
+    """
+
+    loads = staticmethod(json.loads)
+
+    @staticmethod
+    def dumps(obj, **kwargs):
+        if "default" in kwargs:
+            return _splice(obj, kwargs)
+        try:
+            return json.dumps(obj, default=_reject_raw, **kwargs)
+        except _ContainsRawJSON:
+            return _splice(obj, kwargs)
+
+
+def _serialize(value) -> RawJSON:
+    return RawJSON(json.dumps(value, separators=(",", ":")))
+
+
+class Snapshot(NamedTuple):
+    version: int
+    earthquake_count: int
+    prediction_count: int
+    earthquakes: RawJSON
+    predictions: RawJSON
+
+
+class _Change(NamedTuple):
+    version: int
+    earthquakes: Sequence[Dict]
+    predictions: Sequence[Dict]
+
+
+class SnapshotCache:
+    """
+    Versioned, pre-serialized copy of the initial earthquake/prediction lists.
+
+    Every publish bumps the version and stores what was added, so a client that
+    reconnects with a recent version gets only the items it missed.
+    """
+
+    def __init__(self, history: int = DEFAULT_HISTORY):
+        self._lock = threading.Lock()
+        self._changes = deque(maxlen=history)
+        self._deltas = {}
+        self._snapshot = Snapshot(0, 0, 0, _serialize([]), _serialize([]))
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    def current(self) -> Snapshot:
+        return self._snapshot
+
+    def rebase(self, version: int) -> None:
+        """
+        Continues numbering from version with no history, e.g. after taking over from
+        another process, so clients holding older versions get a full snapshot.
+        """
+        with self._lock:
+            self._changes.clear()
+            self._deltas = {}
+            self._snapshot = self._snapshot._replace(version=version)
+
+    def publish(
+        self,
+        earthquakes: Sequence[Dict],
+        predictions: Sequence[Dict],
+        added_earthquakes: Sequence[Dict] = (),
+        added_predictions: Sequence[Dict] = (),
+    ) -> Snapshot:
+        """Serializes the new state once; added_* are newest first, like the lists."""
+        earthquakes_json = _serialize(earthquakes)
+        predictions_json = _serialize(predictions)
+        with self._lock:
+            version = self._snapshot.version + 1
+            self._changes.append(
+                _Change(version, tuple(added_earthquakes), tuple(added_predictions))
+            )
+            self._deltas = {}
+            self._snapshot = Snapshot(
+                version,
+                len(earthquakes),
+                len(predictions),
+                earthquakes_json,
+                predictions_json,
+            )
+            return self._snapshot
+
+    def delta(self, since_version) -> Optional[RawJSON]:
+        """
+        Pre-serialized {"version", "earthquakes", "predictions"} with the items added
+        after since_version, or None when that version is unknown or too old.
+        """
+        if not isinstance(since_version, int) or isinstance(since_version, bool):
+            return None
+
+        with self._lock:
+            current = self._snapshot.version
+            if since_version > current:
+                return None
+            cached = self._deltas.get(since_version)
+            if cached is not None:
+                return cached
+
+            oldest = self._changes[0].version if self._changes else current + 1
+            if since_version != current and since_version < oldest - 1:
+                return None
+
+            earthquakes = []
+            predictions = []
+            for change in reversed(self._changes):
+                if change.version <= since_version:
+                    break
+                earthquakes.extend(change.earthquakes)
+                predictions.extend(change.predictions)
+
+            if earthquakes and len(earthquakes) >= self._snapshot.earthquake_count:
+                # The client missed everything; the full snapshot is no larger.
+                return None
+
+            delta = _serialize(
+                {
+                    "version": current,
+                    "earthquakes": earthquakes,
+                    "predictions": predictions,
+                }
+            )
+            self._deltas[since_version] = delta
+            return delta
@@ -0,0 +1,63 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict
+
+# Set AFTERSHOCK_LAZY_INIT=0 to load the models and initialize Firebase during
+# startup instead of on first use / in a background warm-up.
+LAZY_INIT = os.environ.get("AFTERSHOCK_LAZY_INIT", "1") != "0"
+
+
+class StartupTimer:
+    """Durations of the startup phases, including the ones deferred to first use."""
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        self._lock = threading.Lock()
+        self._phases: "OrderedDict[str, float]" = OrderedDict()
+        self.ready_seconds = None
+
+    @contextmanager
+    def phase(self, name: str):
+        started = self.clock()
+        try:
+            yield
+        finally:
+            self.record(name, self.clock() - started)
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._phases[name] = self._phases.get(name, 0.0) + seconds
+
+    def record_since_start(self, name: str) -> None:
+        """Records the time since start that no other phase accounts for yet."""
+        elapsed = self.clock() - self.started
+        self.record(name, max(elapsed - sum(self.phases().values()), 0.0))
+
+    def mark_ready(self) -> None:
+        """Called once the server can accept connections; prints the breakdown so far."""
+        self.ready_seconds = self.clock() - self.started
+        print(
+            f"Başlangıç {self.ready_seconds:.2f} sn: "
+            + ", ".join(f"{name} {seconds:.2f} sn" for name, seconds in self.phases().items())
+        )
+
+    def phases(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._phases)
+
+    def summary(self) -> Dict:
+        return {
+            "lazy_init": LAZY_INIT,
+            "ready_seconds": (
+                round(self.ready_seconds, 3) if self.ready_seconds is not None else None
+            ),
+            "phases": {name: round(seconds, 3) for name, seconds in self.phases().items()},
+        }
+
+
+# Process-wide; created when startup.py is first imported, which app.py does first.
+startup_timer = StartupTimer()
@@ -0,0 +1,59 @@
+import threading
+from collections import deque
+from typing import Dict, Iterable, NamedTuple, Tuple
+
+DEFAULT_MAX_ITEMS = 50
+
+
+class StateSnapshot(NamedTuple):
+    # Both newest first.
+    earthquakes: Tuple[Dict, ...]
+    predictions: Tuple[Dict, ...]
+
+
+class LiveState:
+    """
+    Recent earthquakes and predictions shared by the poller and the handlers.
+
+    Writers push into bounded deques under a lock and publish an immutable
+    tuple snapshot of both lists; readers take the current snapshot without
+    locking and always see the two lists from the same write.
+    """
+
+    def __init__(self, max_items: int = DEFAULT_MAX_ITEMS):
+        self._lock = threading.Lock()
+        self._earthquakes = deque(maxlen=max_items)
+        self._predictions = deque(maxlen=max_items)
+        self._snapshot = StateSnapshot((), ())
+
+    def snapshot(self) -> StateSnapshot:
+        return self._snapshot
+
+    @property
+    def earthquakes(self) -> Tuple[Dict, ...]:
+        return self._snapshot.earthquakes
+
+    @property
+    def predictions(self) -> Tuple[Dict, ...]:
+        return self._snapshot.predictions
+
+    def _publish_locked(self) -> StateSnapshot:
+        self._snapshot = StateSnapshot(tuple(self._earthquakes), tuple(self._predictions))
+        return self._snapshot
+
+    def push(
+        self, earthquakes: Iterable[Dict] = (), predictions: Iterable[Dict] = ()
+    ) -> StateSnapshot:
+        """Adds items given oldest first to the front; the oldest fall off past max_items."""
+        with self._lock:
+            self._earthquakes.extendleft(earthquakes)
+            self._predictions.extendleft(predictions)
+            return self._publish_locked()
+
+    def reset(self, predictions: Iterable[Dict] = ()) -> StateSnapshot:
+        """Drops the earthquakes and replaces the predictions with a list given newest first."""
+        with self._lock:
+            self._earthquakes.clear()
+            self._predictions.clear()
+            self._predictions.extend(predictions)
+            return self._publish_locked()
@@ -0,0 +1,10 @@
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The backend modules are imported flat, as the server runs them from backend/.
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+# Tests load the model once; no background thread watching the model directory.
+os.environ.setdefault("AFTERSHOCK_MODEL_WATCH", "0")
@@ -0,0 +1,69 @@
+import pytest
+
+pytest.importorskip("flask_socketio")
+
+from token_store import TokenStore  # noqa: E402
+
+
+@pytest.fixture()
+def client(tmp_path, monkeypatch):
+    import app
+
+    monkeypatch.setattr(app, "token_store", TokenStore(str(tmp_path / "tokens.sqlite3")))
+    return app.app.test_client()
+
+
+def register(client, body):
+    # Flask's JSON parser accepts NaN and Infinity, so send them as raw text.
+    return client.post(
+        "/register-token", data=body, headers={"Content-Type": "application/json"}
+    )
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        '{"token": "t", "latitude": 38.0, "longitude": 30.0, "radius_km": NaN}',
+        '{"token": "t", "latitude": NaN, "longitude": 30.0}',
+        '{"token": "t", "latitude": 38.0, "longitude": Infinity}',
+        '{"token": "t", "min_magnitude": NaN}',
+        '{"token": "t", "min_magnitude": -Infinity}',
+    ],
+)
+def test_register_token_rejects_non_finite_numbers(client, body):
+    import app
+
+    response = register(client, body)
+    assert response.status_code == 400
+    assert len(app.token_store) == 0
+
+
+def test_register_token_accepts_location(client):
+    import app
+
+    response = register(
+        client, '{"token": "t", "latitude": 38.0, "longitude": 30.0, "radius_km": 50}'
+    )
+    assert response.status_code == 200
+    assert app.token_store.tokens_for_event(4.0, None, 38.1, 30.1) == ["t"]
+
+
+@pytest.mark.parametrize(
+    "body",
+    ['{"token": ["x"]}', '{"token": {}}', '{"token": 123}', '{"token": ""}', "{}", '["t"]'],
+)
+def test_register_token_requires_string_token(client, body):
+    import app
+
+    response = register(client, body)
+    assert response.status_code == 400
+    assert len(app.token_store) == 0
+
+
+@pytest.mark.parametrize(
+    "args", ["limit=abc", "offset=1.5", "limit=0", "offset=-1", "order=up"]
+)
+def test_catalog_query_rejects_bad_paging(client, args):
+    response = client.get(f"/catalog/query?{args}")
+    assert response.status_code == 400
+    assert response.get_json()["error_code"] == "INVALID_QUERY"
@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+from catalog_index import CatalogIndex
+
+
+def synthetic_index(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    seconds = np.sort(rng.integers(1_600_000_000, 1_700_000_000, n))
+    arrays = {
+        "time": seconds * 1_000_000,
+        "time_unit": "us",
+        "latitude": rng.uniform(36.0, 42.0, n),
+        "longitude": rng.uniform(26.0, 45.0, n),
+        "depth": rng.uniform(1.0, 30.0, n),
+        "mag": rng.uniform(2.0, 7.0, n),
+    }
+    return CatalogIndex(arrays), arrays
+
+
+def test_end_after_last_event_returns_each_row_once():
+    index, arrays = synthetic_index()
+    rows = index.query(end=datetime(2100, 1, 1, tzinfo=timezone.utc))
+    assert rows.size == len(arrays["time"])
+    assert np.array_equal(rows, np.arange(len(arrays["time"])))
+
+
+def test_time_and_bbox_queries_match_brute_force():
+    index, arrays = synthetic_index()
+    seconds = arrays["time"] // 1_000_000
+    start = datetime.fromtimestamp(1_650_000_000, timezone.utc)
+    for end in (
+        datetime.fromtimestamp(1_680_000_000, timezone.utc),
+        datetime(2100, 1, 1, tzinfo=timezone.utc),
+    ):
+        rows = index.query(bbox=(37.0, 40.0, 30.0, 40.0), start=start, end=end)
+        expected = np.flatnonzero(
+            (arrays["latitude"] >= 37.0)
+            & (arrays["latitude"] <= 40.0)
+            & (arrays["longitude"] >= 30.0)
+            & (arrays["longitude"] <= 40.0)
+            & (seconds >= start.timestamp())
+            & (seconds <= end.timestamp())
+        )
+        assert np.array_equal(rows, expected)
+
+
+def test_pages_match_slices_of_the_sorted_query():
+    index, _ = synthetic_index()
+    rows = index.query(bbox=(37.0, 41.0, 28.0, 40.0))
+    for descending in (False, True):
+        ordered = rows[::-1] if descending else rows
+        for offset, limit in ((0, 10), (5, 7), (rows.size - 3, 10), (rows.size, 5), (0, 10_000)):
+            page, total = index.query_page(offset, limit, descending, bbox=(37.0, 41.0, 28.0, 40.0))
+            assert total == rows.size
+            assert np.array_equal(page, ordered[offset : offset + limit])
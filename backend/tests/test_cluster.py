@@ -0,0 +1,25 @@
+import pytest
+
+from cluster import LocalSnapshotStore, RedisSnapshotStore
+from snapshot import SnapshotCache
+
+
+def test_redis_store_keeps_feed_state_with_snapshot():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    client = fakeredis.FakeRedis()
+    leader = RedisSnapshotStore(client, SnapshotCache())
+    assert leader.feed_state() is None
+
+    snapshot = leader.cache.publish([{"id": "eq-2"}, {"id": "eq-1"}], [])
+    leader.publish(snapshot, {"fakeapi": ["eq-2", "eq-1"]})
+
+    follower = RedisSnapshotStore(client, SnapshotCache())
+    assert follower.current().version == snapshot.version
+    assert follower.feed_state() == {"fakeapi": ["eq-2", "eq-1"]}
+
+
+def test_local_store_has_no_feed_state():
+    store = LocalSnapshotStore(SnapshotCache())
+    store.publish(store.cache.publish([], []), {"fakeapi": ["eq-1"]})
+    assert store.feed_state() is None
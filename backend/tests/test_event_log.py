@@ -0,0 +1,59 @@
+import csv
+
+from event_log import EventLog
+
+
+def feed_event(event_id, source):
+    return {
+        "_id": event_id,
+        "title": "Test",
+        "date_time": "2025-01-01 12:00:00",
+        "mag": 4.1,
+        "depth": 10.0,
+        "geojson": {"coordinates": [30.0, 38.0]},
+        "source": source,
+    }
+
+
+def test_only_real_sources_are_logged(tmp_path):
+    path = tmp_path / "events.csv"
+    log = EventLog(str(path))
+    written = log.append(
+        [feed_event("a", "kandilli"), feed_event("b", "fakeapi"), feed_event("c", "usgs")]
+    )
+    assert written == 2
+    with open(path, newline="", encoding="utf-8") as f:
+        assert [row["id"] for row in csv.DictReader(f)] == ["a", "c"]
+
+
+def test_reload_sees_events_logged_by_another_process(tmp_path):
+    path = str(tmp_path / "events.csv")
+    follower = EventLog(path)
+    EventLog(path).append([feed_event("a", "kandilli")])
+    follower.reload()
+    assert follower.append([feed_event("a", "kandilli")]) == 0
+
+
+def test_retrain_reads_a_log_with_repeated_events(tmp_path):
+    import pytest
+
+    pytest.importorskip("pandas")
+    from datetime import datetime, timezone
+
+    from retrain import closed_sequence_features, load_event_log
+
+    path = str(tmp_path / "events.csv")
+    events = [
+        dict(feed_event("main", "kandilli"), mag=6.0),
+        dict(feed_event("after", "kandilli"), date_time="2025-01-01 13:00:00"),
+    ]
+    EventLog(path).append(events)
+    # A second leader that never read the log appends the same window again.
+    second = EventLog(path)
+    second._ids.clear()
+    second.append(events)
+
+    log = load_event_log(path)
+    assert list(log.index) == ["main", "after"]
+    features = closed_sequence_features(log, None, datetime(2025, 3, 1, tzinfo=timezone.utc))
+    assert list(features["aftershock_id"]) == ["after"]
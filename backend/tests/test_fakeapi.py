@@ -0,0 +1,29 @@
+import pytest
+
+pytest.importorskip("flasgger")
+
+import fakeapi  # noqa: E402
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"count": True},
+        {"count": 5, "lat": "38", "lng": 30},
+        {"count": 5, "min_mag": True},
+        {"count": 5, "min_mag": 6, "max_mag": 3},
+        {"count": 5, "radius_km": -1},
+        {"count": 5, "lat": 95, "lng": 30},
+    ],
+)
+def test_burst_rejects_invalid_input(body):
+    response = fakeapi.app.test_client().post("/deprem/kandilli/burst", json=body)
+    assert response.status_code == 400
+
+
+def test_burst_adds_events():
+    response = fakeapi.app.test_client().post(
+        "/deprem/kandilli/burst", json={"count": 3, "lat": 38.0, "lng": 30.0, "mainshock_mag": 6.1}
+    )
+    assert response.status_code == 201
+    assert response.get_json()["count"] == 3
@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+import pytest
+
+joblib = pytest.importorskip("joblib")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("lightgbm")
+
+from fast_inference import PARITY_TOLERANCE, compile_pipelines  # noqa: E402
+from features import FEATURE_COLUMNS  # noqa: E402
+from model_registry import MAG_MODEL_FILE, MODEL_DIR, TIME_MODEL_FILE  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def pipelines():
+    return (
+        joblib.load(os.path.join(MODEL_DIR, MAG_MODEL_FILE)),
+        joblib.load(os.path.join(MODEL_DIR, TIME_MODEL_FILE)),
+    )
+
+
+def test_compiled_models_match_pipelines(pipelines):
+    mag_pipe, time_pipe = pipelines
+    compiled = compile_pipelines(mag_pipe, time_pipe, FEATURE_COLUMNS)
+    assert compiled is not None
+
+    rng = np.random.default_rng(7)
+    rows = np.column_stack(
+        [
+            rng.uniform(0, 10, 200),
+            rng.uniform(0, 700, 200),
+            rng.uniform(-90, 90, 200),
+            rng.uniform(-180, 180, 200),
+        ]
+    )
+    frame = pd.DataFrame(rows, columns=FEATURE_COLUMNS)
+    expected_mag = mag_pipe.predict(frame)
+    expected_time = time_pipe.predict(frame)
+
+    batch_mag, batch_time = compiled.predict_rows(rows)
+    np.testing.assert_allclose(batch_mag, expected_mag, rtol=0, atol=PARITY_TOLERANCE)
+    np.testing.assert_allclose(batch_time, expected_time, rtol=0, atol=PARITY_TOLERANCE)
+    for row, mag, time in zip(rows, expected_mag, expected_time):
+        predicted_mag, predicted_time = compiled.predict(*row)
+        assert abs(predicted_mag - mag) <= PARITY_TOLERANCE
+        assert abs(predicted_time - time) <= PARITY_TOLERANCE
+
+
+def test_pipeline_that_cannot_be_compiled_falls_back(pipelines):
+    _, time_pipe = pipelines
+    assert compile_pipelines(object(), time_pipe, FEATURE_COLUMNS) is None
@@ -0,0 +1,28 @@
+import fetcher
+from fetcher import BASE_INTERVAL, MAX_INTERVAL, MIN_INTERVAL, FeedFetcher
+
+
+def quiet(feed, polls, failed=False):
+    for _ in range(polls):
+        interval = feed.record_poll([], failed)
+    return interval
+
+
+def test_failed_polls_back_off_without_counting_as_quiet():
+    feed = FeedFetcher("http://127.0.0.1:1/live")
+    assert quiet(feed, 3) == BASE_INTERVAL
+
+    intervals = [feed.record_poll([], failed=True) for _ in range(10)]
+    assert intervals == sorted(intervals) and intervals[0] > BASE_INTERVAL
+    assert intervals[-1] == MAX_INTERVAL
+
+    # Recovering starts over: the failures did not count towards relaxing.
+    assert quiet(feed, 1) == BASE_INTERVAL
+    assert quiet(feed, fetcher.QUIET_POLLS_BEFORE_RELAX - 1) == BASE_INTERVAL
+    assert quiet(feed, 1) > BASE_INTERVAL
+
+
+def test_failed_poll_keeps_alert_interval():
+    feed = FeedFetcher("http://127.0.0.1:1/live")
+    assert feed.record_poll([{"mag": 6.0}]) == MIN_INTERVAL
+    assert feed.record_poll([], failed=True) == MIN_INTERVAL
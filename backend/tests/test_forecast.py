@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from forecast import (
+    CatalogSequences,
+    OmoriForecaster,
+    OmoriParams,
+    fit_b_value,
+    write_params,
+)
+
+TRUE = OmoriParams(a=-1.8, alpha=1.0, b=1.0, c=0.05, p=1.1, mc=4.0)
+
+
+def simulate(params, n_sequences=400, duration=30.0, seed=0):
+    """Aftershock sequences drawn from the Omori-Utsu model itself."""
+    rng = np.random.default_rng(seed)
+    forecaster = OmoriForecaster(params)
+    mainshock_mags = np.round(rng.uniform(5.5, 7.0, n_sequences), 1)
+    one_minus_p = 1.0 - params.p
+    sequence_index, days, mags = [], [], []
+    for i, mainshock_mag in enumerate(mainshock_mags):
+        count = rng.poisson(forecaster.expected_counts(mainshock_mag, 0.0, duration))
+        total = ((duration + params.c) ** one_minus_p - params.c**one_minus_p) / one_minus_p
+        u = rng.random(count)
+        # Inverse of the normalized Omori integral.
+        days.append(
+            (params.c**one_minus_p + u * total * one_minus_p) ** (1 / one_minus_p) - params.c
+        )
+        mags.append(np.round(params.mc - 0.05 - np.log10(1 - rng.random(count)) / params.b, 1))
+        sequence_index.append(np.full(count, i))
+    return CatalogSequences(
+        mainshock_mags,
+        np.full(n_sequences, duration),
+        np.concatenate(sequence_index),
+        np.concatenate(days),
+        np.concatenate(mags),
+    )
+
+
+def test_fit_recovers_the_parameters_of_simulated_sequences():
+    pytest.importorskip("scipy")
+    from forecast import fit_omori_utsu
+
+    fit = fit_omori_utsu(simulate(TRUE))
+    params = fit["params"]
+    assert fit["converged"]
+    assert params.p == pytest.approx(TRUE.p, abs=0.1)
+    assert params.alpha == pytest.approx(TRUE.alpha, abs=0.15)
+    assert params.a == pytest.approx(TRUE.a, abs=0.3)
+    assert params.b == pytest.approx(TRUE.b, abs=0.1)
+    assert 0.01 < params.c < 0.25
+
+
+def test_b_value_of_gutenberg_richter_magnitudes():
+    rng = np.random.default_rng(1)
+    # Continuous magnitudes from mc - bin / 2, reported to 0.1 as catalogs do.
+    mags = np.round(3.95 - np.log10(1 - rng.random(20_000)), 1)
+    assert fit_b_value(mags, 4.0) == pytest.approx(1.0, abs=0.05)
+
+
+def test_forecast_counts_add_up_and_shrink_with_time():
+    forecaster = OmoriForecaster(TRUE)
+    day, week = forecaster.expected_counts(6.5, 0.0, [1.0, 7.0])
+    later_week = forecaster.expected_counts(6.5, 1.0, 7.0)
+    assert week == pytest.approx(day + later_week)
+    assert forecaster.expected_counts(7.5, 0.0, 1.0) == pytest.approx(10 * day)
+    assert forecaster.expected_counts(6.5, 0.0, 1.0, min_magnitude=5.0) == pytest.approx(day / 10)
+
+    first, later = forecaster.forecast(6.5, 0.0, [24]), forecaster.forecast(6.5, 72.0, [24])
+    assert first[0]["expected_count"] > later[0]["expected_count"]
+    assert first[0]["probability"] == round(-np.expm1(-first[0]["expected_count"]), 4)
+
+
+def test_written_params_load_back(tmp_path):
+    sequences = simulate(TRUE, n_sequences=5)
+    fit = {"params": TRUE, "log_likelihood": -1.0, "converged": True}
+    path = str(tmp_path / "omori_params.json")
+    data = write_params(path, fit, sequences, {"completeness": TRUE.mc})
+    loaded = OmoriForecaster.load(path)
+    assert loaded.params == TRUE
+    assert loaded.metadata["fitted_at"] == data["fitted_at"]
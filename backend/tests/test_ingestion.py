@@ -0,0 +1,98 @@
+import pytest
+
+from ingestion import IngestionPipeline
+
+
+class ListSource:
+    """A Kandilli-style source serving whatever feed the test sets (newest first)."""
+
+    name = "fakeapi"
+
+    def __init__(self):
+        self.feed = []
+
+    def poll(self):
+        return list(self.feed)
+
+    def event_time(self, eq):
+        from datetime import datetime, timezone
+
+        return datetime.fromtimestamp(eq["time"], timezone.utc)
+
+    def record_poll(self, new_events, failed=False):
+        return 1.0
+
+
+def event(n):
+    # 1 km apart in latitude so no two events look like duplicates of each other.
+    return {"_id": f"eq-{n}", "time": 1_700_000_000 + 60 * n, "mag": 3.0,
+            "geojson": {"coordinates": [30.0, 38.0 + n / 100]}}
+
+
+def ids(events):
+    return [eq["_id"] for eq in events]
+
+
+def test_fresh_start_processes_newest_event():
+    source = ListSource()
+    source.feed = [event(3), event(2), event(1)]
+    result = IngestionPipeline([source]).poll()
+    assert ids(result.initial) == ["eq-2", "eq-1"]
+    assert ids(result.new) == ["eq-3"]
+
+
+def test_takeover_does_not_process_events_again():
+    source = ListSource()
+    source.feed = [event(3), event(2), event(1)]
+    leader = IngestionPipeline([source])
+    leader.poll()
+    source.feed = [event(4)] + source.feed
+    assert ids(leader.poll().new) == ["eq-4"]
+
+    source.feed = [event(6), event(5)] + source.feed
+    successor = IngestionPipeline([source])
+    successor.restore(leader.feed_state())
+    result = successor.poll()
+    assert ids(result.initial) == ["eq-4", "eq-3", "eq-2", "eq-1"]
+    assert ids(result.new) == ["eq-5", "eq-6"]
+
+
+def test_reelected_leader_skips_what_the_other_leader_handled():
+    source = ListSource()
+    source.feed = [event(2), event(1)]
+    first = IngestionPipeline([source])
+    first.poll()
+
+    second = IngestionPipeline([source])
+    second.restore(first.feed_state())
+    second.poll()
+    source.feed = [event(4), event(3)] + source.feed
+    assert ids(second.poll().new) == ["eq-3", "eq-4"]
+
+    source.feed = [event(5)] + source.feed
+    first.restore(second.feed_state())
+    result = first.poll()
+    assert ids(result.new) == ["eq-5"]
+    assert ids(result.initial) == ["eq-4", "eq-3", "eq-2", "eq-1"]
+
+
+def test_pipeline_without_sources_is_rejected():
+    with pytest.raises(ValueError):
+        IngestionPipeline([])
+
+
+def test_failed_source_is_reported_to_record_poll():
+    class FailingSource(ListSource):
+        def poll(self):
+            raise ConnectionError("feed down")
+
+        def record_poll(self, new_events, failed=False):
+            self.failed = failed
+            return 1.0
+
+    source = FailingSource()
+    pipeline = IngestionPipeline([source])
+    pipeline.poll()
+    pipeline.record_poll([])
+    assert source.failed
+    assert pipeline.stats["fakeapi"]["errors"] == 1
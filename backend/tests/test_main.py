@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("lightgbm")
+
+import main  # noqa: E402
+
+
+def inputs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {"magnitude": mag, "depth": depth, "latitude": lat, "longitude": lon}
+        for mag, depth, lat, lon in zip(
+            np.round(rng.uniform(5.5, 7.8, n), 1).tolist(),
+            np.round(rng.uniform(2.0, 40.0, n), 1).tolist(),
+            rng.uniform(36.0, 42.0, n).tolist(),
+            rng.uniform(26.0, 45.0, n).tolist(),
+        )
+    ]
+
+
+def test_batch_predictions_match_single_predictions(monkeypatch):
+    # Without the cache, so the single calls are not answered from the batch's entries.
+    monkeypatch.setattr(main, "prediction_cache", None)
+    earthquakes = inputs(50) + [
+        {"magnitude": 11, "depth": 10, "latitude": 38, "longitude": 30},
+        {"magnitude": 6, "depth": 10, "latitude": 95, "longitude": 30},
+        {"magnitude": "6", "depth": 10, "latitude": 38, "longitude": 30},
+        {"magnitude": 6, "depth": 10},
+        "not a dict",
+    ]
+    batch = main.batch_predict_aftershocks(earthquakes)
+    assert batch["success"] and batch["total_predictions"] == len(earthquakes)
+
+    for i, (eq, prediction) in enumerate(zip(earthquakes, batch["predictions"])):
+        assert prediction.pop("index") == i
+        if not isinstance(eq, dict) or not all(field in eq for field in main.REQUIRED_FIELDS):
+            assert prediction["success"] is False
+            continue
+        single = main.predict_aftershock(
+            eq["magnitude"], eq["depth"], eq["latitude"], eq["longitude"]
+        )
+        assert prediction == single
@@ -0,0 +1,44 @@
+import os
+
+import numpy as np
+import pytest
+
+joblib = pytest.importorskip("joblib")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("lightgbm")
+
+from fast_inference import PARITY_TOLERANCE  # noqa: E402
+from features import FEATURE_COLUMNS  # noqa: E402
+from model_artifact import export_artifact, load_artifact, read_artifact_metadata  # noqa: E402
+from model_registry import MAG_MODEL_FILE, MODEL_DIR, TIME_MODEL_FILE  # noqa: E402
+
+
+def test_exported_artifact_scores_like_the_pipelines(tmp_path):
+    mag_pipe = joblib.load(os.path.join(MODEL_DIR, MAG_MODEL_FILE))
+    time_pipe = joblib.load(os.path.join(MODEL_DIR, TIME_MODEL_FILE))
+    path = str(tmp_path / "model.bin")
+    export_artifact(mag_pipe, time_pipe, path, "abc123", FEATURE_COLUMNS)
+
+    metadata = read_artifact_metadata(path)
+    assert metadata["source_version"] == "abc123"
+    assert metadata["feature_columns"] == FEATURE_COLUMNS
+
+    rng = np.random.default_rng(3)
+    rows = np.column_stack(
+        [
+            rng.uniform(0, 10, 300),
+            rng.uniform(0, 700, 300),
+            rng.uniform(-90, 90, 300),
+            rng.uniform(-180, 180, 300),
+        ]
+    )
+    # NaN takes each split's missing-value branch, as in LightGBM.
+    rows[:5, 1] = np.nan
+    frame = pd.DataFrame(rows, columns=FEATURE_COLUMNS)
+    models = load_artifact(path)
+    magnitudes, time_logs = models.predict_rows(rows)
+    np.testing.assert_allclose(magnitudes, mag_pipe.predict(frame), rtol=0, atol=PARITY_TOLERANCE)
+    np.testing.assert_allclose(time_logs, time_pipe.predict(frame), rtol=0, atol=PARITY_TOLERANCE)
+    assert models.predict(*rows[10]) == pytest.approx(
+        (magnitudes[10], time_logs[10]), abs=PARITY_TOLERANCE
+    )
@@ -0,0 +1,14 @@
+from features import FEATURE_COLUMNS
+from model_registry import MODEL_DIR, ModelRegistry
+
+
+def test_state_tells_warming_up_from_missing(tmp_path):
+    missing = ModelRegistry(FEATURE_COLUMNS, model_dir=str(tmp_path))
+    assert missing.status()["model_state"] == "loading"
+    assert missing.get() is None
+    assert missing.status()["model_state"] == "unavailable"
+
+    registry = ModelRegistry(FEATURE_COLUMNS, model_dir=MODEL_DIR)
+    assert registry.state == "loading"
+    assert registry.get() is not None
+    assert registry.status()["model_state"] == "ready"
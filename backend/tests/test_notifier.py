@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+
+from notifier import LazyFirebaseMessaging, NotificationDispatcher
+
+
+class UnregisteredError(Exception):
+    pass
+
+
+class FirebaseError(Exception):
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+class StubMessaging:
+    """The parts of firebase_admin.messaging the dispatcher uses; fails tokens as told."""
+
+    UnregisteredError = UnregisteredError
+
+    def __init__(self, errors=None):
+        # token -> exceptions to return on its successive sends
+        self.errors = errors or {}
+        self.batches = []
+
+    def Notification(self, title, body):
+        return SimpleNamespace(title=title, body=body)
+
+    def MulticastMessage(self, tokens, notification):
+        return SimpleNamespace(tokens=list(tokens), notification=notification)
+
+    def send_each_for_multicast(self, message):
+        self.batches.append(message.tokens)
+        responses = []
+        for token in message.tokens:
+            errors = self.errors.get(token) or []
+            exception = errors.pop(0) if errors else None
+            responses.append(SimpleNamespace(success=exception is None, exception=exception))
+        return SimpleNamespace(responses=responses)
+
+
+def dispatcher(messaging, **kwargs):
+    return NotificationDispatcher(messaging, sleep=lambda seconds: None, **kwargs)
+
+
+def test_tokens_are_sent_in_batches():
+    messaging = StubMessaging()
+    notifier = dispatcher(messaging, batch_size=2)
+    reports = [future.result() for future in notifier.dispatch(["a", "b", "c"], "T", "B")]
+    assert sorted(len(batch) for batch in messaging.batches) == [1, 2]
+    assert sum(report["sent"] for report in reports) == 3
+    assert notifier.stats["batches"] == 2
+
+
+def test_transient_errors_are_retried_and_unregistered_tokens_pruned():
+    messaging = StubMessaging(
+        {"retry": [FirebaseError("UNAVAILABLE")], "gone": [UnregisteredError()],
+         "bad": [FirebaseError("INVALID_ARGUMENT")]}
+    )
+    pruned = []
+    notifier = dispatcher(messaging, on_invalid_tokens=pruned.extend)
+    (future,) = notifier.dispatch(["ok", "retry", "gone", "bad"], "T", "B")
+    report = future.result()
+    assert messaging.batches == [["ok", "retry", "gone", "bad"], ["retry"]]
+    assert (report["sent"], report["failed"], report["pruned"], report["retries"]) == (2, 1, 1, 1)
+    assert pruned == ["gone"]
+
+
+def test_firebase_init_failure_is_counted_as_failed():
+    messaging = LazyFirebaseMessaging("missing-credentials.json")
+
+    def initialize():
+        raise FileNotFoundError("missing-credentials.json")
+
+    messaging.initialize = initialize
+    notifier = dispatcher(messaging, max_retries=1)
+    (future,) = notifier.dispatch(["a", "b"], "T", "B")
+    assert future.result()["failed"] == 2
+    assert notifier.stats["failed"] == 2
@@ -0,0 +1,55 @@
+import numpy as np
+
+from prediction_cache import PredictionCache, dequantize, dequantize_rows, quantize, quantize_rows
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_quantize_rounds_to_catalog_precision():
+    assert quantize(6.04, 10.06, 38.12344, 30.12346) == (60, 101, 381234, 301235)
+    assert quantize(6.04, 10.0, 38.0, 30.0) == quantize(5.96, 9.96, 37.99996, 30.00004)
+    assert dequantize(quantize(6.1, 7.3, 38.1234, 30.5678)) == (6.1, 7.3, 38.1234, 30.5678)
+
+
+def test_quantize_rows_matches_scalar_version():
+    rng = np.random.default_rng(0)
+    rows = np.column_stack(
+        [
+            rng.uniform(5, 8, 500),
+            rng.uniform(0, 50, 500),
+            rng.uniform(36, 42, 500),
+            rng.uniform(26, 45, 500),
+        ]
+    )
+    # Values exactly halfway between two keys, rounded half to even by both versions.
+    rows[:4] = [[6.25, 0.05, 38.00005, 30.00015]] * 4
+    keys = quantize_rows(rows)
+    assert [tuple(key) for key in keys.tolist()] == [quantize(*row) for row in rows.tolist()]
+    np.testing.assert_array_equal(dequantize_rows(keys), [dequantize(tuple(k)) for k in keys])
+
+
+def test_entries_expire_after_the_ttl():
+    clock = Clock()
+    cache = PredictionCache(ttl_seconds=10, clock=clock)
+    cache.put(("v1", 1), (4.0, 1.0))
+    clock.now = 9.9
+    assert cache.get(("v1", 1)) == (4.0, 1.0)
+    clock.now = 10.0
+    assert cache.get(("v1", 1)) is None
+    assert cache.stats["expirations"] == 1 and len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_entries=2, clock=Clock())
+    cache.put_many([(("v1", 1), (4.0, 1.0)), (("v1", 2), (4.5, 1.5))])
+    assert cache.get(("v1", 1)) == (4.0, 1.0)
+    cache.put(("v1", 3), (5.0, 2.0))
+    assert cache.get_many([("v1", 1), ("v1", 2), ("v1", 3)]) == [(4.0, 1.0), None, (5.0, 2.0)]
+    stats = cache.stats
+    assert (stats["evictions"], stats["hits"], stats["misses"], stats["size"]) == (1, 3, 1, 2)
@@ -0,0 +1,119 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+joblib = pytest.importorskip("joblib")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("lightgbm")
+
+from ingestion import parse_event_time  # noqa: E402
+from retrain import (  # noqa: E402
+    FEATURE_FILE_COLUMNS,
+    closed_sequence_features,
+    continue_pipeline,
+    retrain,
+)
+from train import MODEL_FILES  # noqa: E402
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+
+
+def feature_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "mainshock_mag": rng.uniform(5.5, 7.5, n),
+            "mainshock_depth": rng.uniform(2, 40, n),
+            "mainshock_lat": rng.uniform(36, 42, n),
+            "mainshock_lon": rng.uniform(26, 45, n),
+            "aftershock_mag": rng.uniform(3, 6, n),
+            "time_to_aftershock_hours": rng.uniform(0.1, 500, n),
+            "mainshock_id": np.arange(n),
+            "aftershock_id": np.arange(n) + 10_000,
+        }
+    )[FEATURE_FILE_COLUMNS]
+
+
+def continue_on(n):
+    from features import FEATURE_COLUMNS
+
+    pipeline = joblib.load(os.path.join(MODEL_DIR, MODEL_FILES["mag"]))
+    rows = feature_rows(n)
+    continued = continue_pipeline(
+        pipeline, rows[FEATURE_COLUMNS], rows["aftershock_mag"].to_numpy()
+    )
+    return pipeline, continued
+
+
+def test_continue_pipeline_adds_trees():
+    pipeline, continued = continue_on(60)
+    before = pipeline.named_steps["regressor"].booster_
+    after = continued.named_steps["regressor"].booster_
+    assert after.num_trees() > (before.best_iteration or before.num_trees())
+
+
+def test_continue_pipeline_reports_rows_too_few_for_a_tree():
+    _, continued = continue_on(14)
+    assert continued is None
+
+
+def test_retrain_keeps_rows_pending_when_no_tree_grows(tmp_path):
+    model_dir = tmp_path / "models"
+    shutil.copytree(MODEL_DIR, model_dir)
+    features_path = tmp_path / "live_features.csv"
+    feature_rows(14).to_csv(features_path, index=False)
+    state_path = tmp_path / "retrain_state.json"
+    state_path.write_text(
+        json.dumps(
+            {
+                "cutoff": "2025-01-01T00:00:00+00:00",
+                "feature_rows": 14,
+                "trained_rows": 0,
+                "model_version": None,
+            }
+        )
+    )
+    original = (model_dir / MODEL_FILES["mag"]).read_bytes()
+
+    result = retrain(
+        parse_event_time("2025-01-02T00:00:00+00:00"),
+        model_dir=str(model_dir),
+        event_log_path=str(tmp_path / "missing.csv"),
+        features_path=str(features_path),
+        state_path=str(state_path),
+        min_rows=5,
+    )
+    assert not result["trained"]
+    assert result["trained_rows"] == 0
+    assert (model_dir / MODEL_FILES["mag"]).read_bytes() == original
+
+
+def test_closed_sequences_match_a_full_run_across_chains_of_claims():
+    from datetime import timedelta
+
+    from sequences import identify_mainshock_aftershock_sequences
+
+    start = pd.Timestamp("2025-01-01", tz="UTC")
+    # A claims B, so B is no mainshock and C (more than a window after A) claims D.
+    # Scanning only one window before C would let B claim C instead.
+    events = pd.DataFrame(
+        {
+            "id": ["A", "B", "C", "D"],
+            "time": [start + timedelta(days=days) for days in (0, 20, 45, 50)],
+            "latitude": [38.0, 38.1, 38.2, 38.25],
+            "longitude": [30.0, 30.1, 30.2, 30.25],
+            "depth": [10.0] * 4,
+            "mag": [6.0, 5.9, 5.8, 3.0],
+        }
+    ).set_index("id")
+
+    full = identify_mainshock_aftershock_sequences(events)
+    assert list(zip(full["mainshock_id"], full["aftershock_id"])) == [("A", "B"), ("C", "D")]
+
+    closed = closed_sequence_features(
+        events, start + timedelta(days=70), start + timedelta(days=80)
+    )
+    assert list(zip(closed["mainshock_id"], closed["aftershock_id"])) == [("C", "D")]
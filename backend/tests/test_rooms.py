@@ -0,0 +1,45 @@
+import pytest
+
+from geo import geohash_encode, haversine
+from rooms import ALL_ROOM, event_rooms, magnitude_tier, subscription_rooms
+
+
+def receives(subscription, **event):
+    return bool(set(subscription_rooms(**subscription)) & set(event_rooms(**event)))
+
+
+def test_geohash_encode_known_value():
+    assert geohash_encode(42.605, -5.603, 5) == "ezs42"
+
+
+@pytest.mark.parametrize(
+    "min_magnitude, tier",
+    [(None, 0.0), (-1.0, 0.0), (1.5, 0.0), (4.5, 4.5), (4.8, 4.5), (7.9, 7.0)],
+)
+def test_subscription_joins_the_tier_at_or_below_its_minimum(min_magnitude, tier):
+    assert magnitude_tier(min_magnitude) == tier
+
+
+def test_every_event_reaches_the_all_room_and_no_filter_means_all():
+    assert subscription_rooms([]) == []
+    assert ALL_ROOM in event_rooms(2.0, None, None, None)
+
+
+def test_city_rooms_filter_by_city_and_tier():
+    subscription = {"cities": [" Malatya "], "min_magnitude": 4.8}
+    event = {"city": "malatya", "latitude": None, "longitude": None}
+    assert receives(subscription, magnitude=5.0, **event)
+    # Between the tier and min_magnitude: sent, and left to the client.
+    assert receives(subscription, magnitude=4.6, **event)
+    assert not receives(subscription, magnitude=4.4, **event)
+    assert not receives(subscription, magnitude=5.0, city="Ankara", latitude=None, longitude=None)
+
+
+def test_location_rooms_cover_the_neighbouring_cells():
+    subscription = {"cities": [], "latitude": 38.0, "longitude": 30.0}
+    # At least ~115 km east-west and ~155 km north-south (see GEOHASH_PRECISION).
+    for lat, lon in [(38.0, 30.0), (39.3, 30.0), (36.7, 30.0), (38.0, 31.2), (38.0, 28.8)]:
+        assert haversine(38.0, 30.0, lat, lon) < 150
+        assert receives(subscription, magnitude=3.0, city=None, latitude=lat, longitude=lon)
+    assert not receives(subscription, magnitude=3.0, city=None, latitude=38.0, longitude=35.0)
+    assert not receives(subscription, magnitude=3.0, city=None, latitude=None, longitude=None)
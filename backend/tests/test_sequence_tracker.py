@@ -0,0 +1,61 @@
+from sequence_tracker import SECONDS_PER_DAY, SequenceEvent, SequenceTracker
+
+T0 = 1_700_000_000.0
+
+
+def event(event_id, days, magnitude, latitude=38.0, longitude=30.0):
+    return SequenceEvent(
+        event_id, T0 + days * SECONDS_PER_DAY, magnitude, latitude, longitude, 10.0
+    )
+
+
+def test_aftershocks_are_counted_inside_the_window_and_radius():
+    tracker = SequenceTracker()
+    ids, updates = tracker.observe(
+        [
+            event("main", 0, 6.2),
+            event("a1", 0.1, 4.0, 38.2, 30.2),
+            event("far", 0.2, 4.5, 41.0, 30.0),
+            event("a2", 1, 5.0),
+            event("larger", 2, 6.5, 38.1, 30.1),
+        ]
+    )
+    # "larger" is no aftershock of "main" and opens its own sequence.
+    assert ids == ["main", "main", None, "main", "larger"]
+    by_id = {update["sequence_id"]: update for update in updates}
+    assert by_id["main"]["status"] == "started"
+    assert by_id["main"]["aftershock_count"] == 2
+    assert by_id["main"]["first_aftershock"]["id"] == "a1"
+    assert by_id["main"]["largest_aftershock"]["id"] == "a2"
+    assert by_id["larger"]["status"] == "started"
+
+    ids, updates = tracker.observe([event("a3", 3, 4.0)])
+    # The largest active mainshock claims the event.
+    assert ids == ["larger"]
+    assert [(u["sequence_id"], u["status"]) for u in updates] == [("larger", "updated")]
+
+
+def test_sequences_expire_after_the_window():
+    tracker = SequenceTracker(time_window_days=30)
+    tracker.observe([event("main", 0, 6.0)])
+    assert tracker.observe([event("late", 29, 4.0)])[0] == ["main"]
+    assert [s["sequence_id"] for s in tracker.active()] == ["main"]
+
+    ids, updates = tracker.observe([event("after", 31, 4.0)])
+    assert ids == [None] and updates == []
+    assert len(tracker) == 0
+
+
+def test_old_mainshocks_do_not_reopen_expired_windows():
+    tracker = SequenceTracker(time_window_days=30)
+    tracker.observe([event("new", 100, 3.0)])
+    assert tracker.observe([event("old", 10, 6.0)]) == ([None], [])
+    assert tracker.active() == []
+
+
+def test_clear_forgets_sequences_and_time():
+    tracker = SequenceTracker()
+    tracker.observe([event("main", 100, 6.0)])
+    tracker.clear()
+    assert len(tracker) == 0
+    assert tracker.observe([event("earlier", 0, 6.0)])[0] == ["earlier"]
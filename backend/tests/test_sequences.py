@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from geo import haversine  # noqa: E402
+from sequences import identify_mainshock_aftershock_sequences  # noqa: E402
+
+
+def reference_sequences(df, mainshock_min_mag=5.5, radius_km=150, time_window_days=30):
+    """The row-by-row version the training notebook used before sequences.py."""
+    samples = []
+    processed = set()
+    for idx, mainshock in df[df["mag"] >= mainshock_min_mag].iterrows():
+        if idx in processed:
+            continue
+        window = df[
+            (df["time"] > mainshock["time"])
+            & (df["time"] <= mainshock["time"] + timedelta(days=time_window_days))
+            & (df.index != idx)
+            & (df["mag"] < mainshock["mag"])
+        ]
+        distances = window.apply(
+            lambda row: haversine(
+                mainshock["latitude"], mainshock["longitude"], row["latitude"], row["longitude"]
+            ),
+            axis=1,
+        )
+        aftershocks = window[distances <= radius_km].sort_values("time", kind="stable")
+        if aftershocks.empty or aftershocks.index[0] in processed:
+            continue
+        first = aftershocks.iloc[0]
+        samples.append(
+            {
+                "mainshock_mag": mainshock["mag"],
+                "mainshock_depth": mainshock["depth"],
+                "mainshock_lat": mainshock["latitude"],
+                "mainshock_lon": mainshock["longitude"],
+                "aftershock_mag": first["mag"],
+                "time_to_aftershock_hours": (first["time"] - mainshock["time"]).total_seconds()
+                / 3600.0,
+                "mainshock_id": idx,
+                "aftershock_id": first.name,
+            }
+        )
+        processed.update((idx, first.name))
+    return pd.DataFrame(samples)
+
+
+def synthetic_catalog(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2020-01-01", tz="UTC")
+    return pd.DataFrame(
+        {
+            "time": start + pd.to_timedelta(np.sort(rng.uniform(0, 365, n)), unit="D"),
+            "latitude": rng.uniform(37.0, 40.0, n),
+            "longitude": rng.uniform(27.0, 33.0, n),
+            "depth": rng.uniform(2.0, 30.0, n),
+            "mag": np.round(rng.uniform(3.0, 6.8, n), 1),
+        }
+    )
+
+
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_matches_row_by_row_reference(shuffle):
+    catalog = synthetic_catalog()
+    if shuffle:
+        catalog = catalog.sample(frac=1, random_state=1)
+
+    expected = reference_sequences(catalog)
+    actual = identify_mainshock_aftershock_sequences(catalog)
+    assert len(expected) > 5
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def test_empty_catalog():
+    assert identify_mainshock_aftershock_sequences(pd.DataFrame()).empty
@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+from snapshot import RawJSON, SnapshotCache, SnapshotJSON
+
+
+def test_dumps_splices_top_level_raw_json():
+    text = SnapshotJSON.dumps(["initial_earthquakes", RawJSON('[{"id":"a"}]')])
+    assert json.loads(text) == ["initial_earthquakes", [{"id": "a"}]]
+
+
+def test_dumps_splices_nested_raw_json():
+    message = {"method": "emit", "data": ["snapshot_delta", RawJSON('{"version":3}')], "to": None}
+    text = SnapshotJSON.dumps(message, separators=(",", ":"))
+    assert json.loads(text) == {
+        "method": "emit",
+        "data": ["snapshot_delta", {"version": 3}],
+        "to": None,
+    }
+
+
+def test_dumps_without_raw_json_matches_json():
+    value = {"a": [1, 2.5, None], "b": "ç"}
+    assert SnapshotJSON.dumps(value) == json.dumps(value)
+
+
+def test_dumps_still_rejects_unknown_types():
+    with pytest.raises(TypeError):
+        SnapshotJSON.dumps({"a": object()})
+
+
+def test_redis_manager_publishes_snapshots():
+    fakeredis = pytest.importorskip("fakeredis")
+    socketio = pytest.importorskip("socketio")
+
+    server = fakeredis.FakeServer()
+    manager = socketio.RedisManager("redis://", json=SnapshotJSON)
+    manager.redis = fakeredis.FakeRedis(server=server)
+    manager.connected = True
+    listener = fakeredis.FakeRedis(server=server).pubsub(ignore_subscribe_messages=True)
+    listener.subscribe(manager.channel)
+
+    snapshot = SnapshotCache().publish([{"id": "a", "magnitude": 5.6}], [])
+    manager.emit("initial_earthquakes", snapshot.earthquakes, namespace="/", room="sid-1")
+
+    message = None
+    for _ in range(10):
+        message = listener.get_message(timeout=0.1)
+        if message is not None:
+            break
+    assert message is not None
+    published = SnapshotJSON.loads(message["data"])
+    assert published["event"] == "initial_earthquakes"
+    assert published["data"] == [[{"id": "a", "magnitude": 5.6}]]
+    assert published["room"] == "sid-1"
+
+
+def publish_one(cache, n, feed):
+    feed.insert(0, {"id": f"eq-{n}"})
+    return cache.publish(list(feed), [], [{"id": f"eq-{n}"}])
+
+
+def test_delta_has_what_was_added_since_the_version_newest_first():
+    cache = SnapshotCache(history=3)
+    feed = [{"id": f"old-{n}"} for n in range(10)]
+    for n in range(1, 6):
+        publish_one(cache, n, feed)
+
+    assert cache.version == 5
+    assert json.loads(cache.delta(5).text) == {"version": 5, "earthquakes": [], "predictions": []}
+    assert json.loads(cache.delta(3).text)["earthquakes"] == [{"id": "eq-5"}, {"id": "eq-4"}]
+    assert json.loads(cache.delta(2).text)["earthquakes"] == [
+        {"id": "eq-5"},
+        {"id": "eq-4"},
+        {"id": "eq-3"},
+    ]
+    # Older than the history, from the future, or not a version: full snapshot instead.
+    assert cache.delta(1) is None
+    assert cache.delta(6) is None
+    assert cache.delta(True) is None
+    assert cache.delta("3") is None
+
+
+def test_delta_is_dropped_when_it_would_not_be_smaller_than_the_snapshot():
+    cache = SnapshotCache()
+    feed = []
+    publish_one(cache, 1, feed)
+    publish_one(cache, 2, feed)
+    assert cache.delta(0) is None
+    assert json.loads(cache.delta(1).text)["earthquakes"] == [{"id": "eq-2"}]
+
+
+def test_rebase_forgets_the_history():
+    cache = SnapshotCache()
+    feed = [{"id": "old"}]
+    publish_one(cache, 1, feed)
+    cache.rebase(40)
+    assert cache.version == 40
+    assert cache.delta(0) is None
+    assert json.loads(cache.delta(40).text)["earthquakes"] == []
+    assert publish_one(cache, 2, feed).version == 41
+    assert json.loads(cache.delta(40).text)["earthquakes"] == [{"id": "eq-2"}]
@@ -0,0 +1,40 @@
+import pytest
+
+from token_store import RedisTokenStore, TokenStore
+
+
+def test_sqlite_store_shares_tokens_between_processes(tmp_path):
+    path = str(tmp_path / "tokens.sqlite3")
+    leader = TokenStore(path)
+    worker = TokenStore(path)
+    assert worker.register("t1", min_magnitude=4.0)
+    assert leader.reload_if_changed()
+    assert leader.tokens_for_event(5.0, "Malatya") == ["t1"]
+    leader.close()
+    worker.close()
+
+
+def test_redis_store_shares_tokens_between_nodes():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    server = fakeredis.FakeServer()
+    leader = RedisTokenStore(fakeredis.FakeRedis(server=server))
+    other_node = RedisTokenStore(fakeredis.FakeRedis(server=server))
+
+    assert other_node.register("t1", region="Malatya", latitude=38.35, longitude=38.31)
+    assert not other_node.reload_if_changed()
+    assert leader.reload_if_changed()
+    assert leader.tokens_for_event(6.0, "malatya", latitude=38.4, longitude=38.3) == ["t1"]
+
+    assert leader.remove_many(["t1"]) == 1
+    assert other_node.reload_if_changed()
+    assert "t1" not in other_node
+
+
+def test_non_finite_filters_are_rejected(tmp_path):
+    store = TokenStore(str(tmp_path / "tokens.sqlite3"))
+    with pytest.raises(ValueError):
+        store.register("t", latitude=38.0, longitude=30.0, radius_km=float("nan"))
+    with pytest.raises(ValueError):
+        store.register("t", min_magnitude=float("inf"))
+    assert len(store) == 0
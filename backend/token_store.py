@@ -0,0 +1,316 @@
+import json
+import math
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from geo import GridIndex
+
+DEFAULT_ALERT_RADIUS_KM = 150
+MAX_ALERT_RADIUS_KM = 1000
+TOKENS_KEY = "aftershock:fcm-tokens"
+
+
+class Subscription(NamedTuple):
+    token: str
+    platform: Optional[str] = None
+    region: Optional[str] = None
+    min_magnitude: Optional[float] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    radius_km: Optional[float] = None
+
+    @property
+    def has_location(self) -> bool:
+        return self.latitude is not None and self.longitude is not None
+
+    def matches(self, magnitude: float, normalized_region: Optional[str]) -> bool:
+        if self.min_magnitude is not None and magnitude < self.min_magnitude:
+            return False
+        if self.region is not None and normalized_region != self.region:
+            return False
+        return True
+
+
+def _normalize_region(region: Optional[str]) -> Optional[str]:
+    return region.strip().casefold() if region else None
+
+
+class BaseTokenStore(ABC):
+    """
+    FCM token registry; subclasses persist it.
+
+    All tokens are also kept in an in-memory dict for O(1) dedup; readers get an
+    immutable tuple snapshot that is rebuilt only after a write. Subscriptions
+    with a location live in a GridIndex and only receive events inside their
+    radius; the rest receive every event that matches their filters.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data_version = None
+        self._load_locked()
+
+    @abstractmethod
+    def _read_subscriptions(self) -> Iterable[Subscription]:
+        """Every stored subscription."""
+
+    @abstractmethod
+    def _read_data_version(self) -> int:
+        """A number that changes when another process writes to the storage."""
+
+    @abstractmethod
+    def _save(self, subscription: Subscription) -> None:
+        """Inserts or replaces the subscription of its token."""
+
+    @abstractmethod
+    def _delete(self, tokens: List[str]) -> None:
+        """Removes the given tokens."""
+
+    def _load_locked(self) -> None:
+        self._tokens: Dict[str, Subscription] = {}
+        self._geo_index = GridIndex()
+        self._snapshot: Optional[Tuple[Subscription, ...]] = None
+        self._global_snapshot: Optional[Tuple[Subscription, ...]] = None
+        for subscription in self._read_subscriptions():
+            self._index_locked(subscription)
+        self._data_version = self._read_data_version()
+
+    def reload_if_changed(self) -> bool:
+        """Picks up tokens written by other processes sharing the storage."""
+        with self._lock:
+            if self._read_data_version() == self._data_version:
+                return False
+            self._load_locked()
+            return True
+
+    def _index_locked(self, subscription: Subscription) -> None:
+        self._tokens[subscription.token] = subscription
+        if subscription.has_location:
+            self._geo_index.insert(
+                subscription.token,
+                subscription.latitude,
+                subscription.longitude,
+                subscription.radius_km,
+            )
+        else:
+            self._geo_index.remove(subscription.token)
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def __contains__(self, token: str) -> bool:
+        return token in self._tokens
+
+    def register(
+        self,
+        token: str,
+        platform: Optional[str] = None,
+        region: Optional[str] = None,
+        min_magnitude: Optional[float] = None,
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None,
+        radius_km: Optional[float] = None,
+    ) -> bool:
+        """Adds or updates a token; returns True if the token was not known before."""
+        has_location = latitude is not None and longitude is not None
+        if has_location and radius_km is None:
+            radius_km = DEFAULT_ALERT_RADIUS_KM
+        subscription = Subscription(
+            token,
+            platform,
+            _normalize_region(region),
+            float(min_magnitude) if min_magnitude is not None else None,
+            float(latitude) if has_location else None,
+            float(longitude) if has_location else None,
+            min(float(radius_km), MAX_ALERT_RADIUS_KM) if has_location else None,
+        )
+        # A NaN radius would cover every grid cell and a NaN magnitude match every event.
+        if not all(value is None or math.isfinite(value) for value in subscription[3:]):
+            raise ValueError("Subscription filters must be finite numbers")
+        with self._lock:
+            existing = self._tokens.get(token)
+            if existing == subscription:
+                return False
+
+            self._save(subscription)
+            self._index_locked(subscription)
+            self._snapshot = None
+            self._global_snapshot = None
+            return existing is None
+
+    def remove_many(self, tokens: Iterable[str]) -> int:
+        with self._lock:
+            removed = [token for token in set(tokens) if token in self._tokens]
+            if not removed:
+                return 0
+            self._delete(removed)
+            for token in removed:
+                del self._tokens[token]
+                self._geo_index.remove(token)
+            self._snapshot = None
+            self._global_snapshot = None
+            return len(removed)
+
+    def snapshot(self) -> Tuple[Subscription, ...]:
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = tuple(self._tokens.values())
+                snapshot = self._snapshot
+        return snapshot
+
+    def _global_subscriptions(self) -> Tuple[Subscription, ...]:
+        snapshot = self._global_snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._global_snapshot is None:
+                    self._global_snapshot = tuple(
+                        subscription
+                        for subscription in self._tokens.values()
+                        if not subscription.has_location
+                    )
+                snapshot = self._global_snapshot
+        return snapshot
+
+    def tokens_for_event(
+        self,
+        magnitude: float,
+        region: Optional[str],
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None,
+    ) -> List[str]:
+        normalized_region = _normalize_region(region)
+        tokens = [
+            subscription.token
+            for subscription in self._global_subscriptions()
+            if subscription.matches(magnitude, normalized_region)
+        ]
+        if latitude is None or longitude is None:
+            return tokens
+
+        for token in self._geo_index.query(latitude, longitude):
+            subscription = self._tokens.get(token)
+            if subscription is not None and subscription.matches(
+                magnitude, normalized_region
+            ):
+                tokens.append(token)
+        return tokens
+
+    def close(self) -> None:
+        pass
+
+
+class TokenStore(BaseTokenStore):
+    """Tokens in SQLite; the processes of one host share them through the database file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS fcm_tokens (
+                token TEXT PRIMARY KEY,
+                platform TEXT,
+                region TEXT,
+                min_magnitude REAL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        existing_columns = {
+            row[1] for row in self._conn.execute("PRAGMA table_info(fcm_tokens)")
+        }
+        for column in ("latitude", "longitude", "radius_km"):
+            if column not in existing_columns:
+                self._conn.execute(f"ALTER TABLE fcm_tokens ADD COLUMN {column} REAL")
+        self._conn.commit()
+        super().__init__()
+
+    def _read_subscriptions(self) -> Iterable[Subscription]:
+        for row in self._conn.execute(
+            """
+            SELECT token, platform, region, min_magnitude, latitude, longitude, radius_km
+            FROM fcm_tokens
+            """
+        ):
+            yield Subscription(*row)
+
+    def _read_data_version(self) -> int:
+        # Changes only when another connection commits to the database file.
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _save(self, subscription: Subscription) -> None:
+        with self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO fcm_tokens (
+                    token, platform, region, min_magnitude,
+                    latitude, longitude, radius_km, updated_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(token) DO UPDATE SET
+                    platform = excluded.platform,
+                    region = excluded.region,
+                    min_magnitude = excluded.min_magnitude,
+                    latitude = excluded.latitude,
+                    longitude = excluded.longitude,
+                    radius_km = excluded.radius_km,
+                    updated_at = excluded.updated_at
+                """,
+                (*subscription, time.time()),
+            )
+
+    def _delete(self, tokens: List[str]) -> None:
+        with self._conn:
+            self._conn.executemany(
+                "DELETE FROM fcm_tokens WHERE token = ?",
+                [(token,) for token in tokens],
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisTokenStore(BaseTokenStore):
+    """
+    Tokens in a Redis hash (token -> subscription) for deployments across
+    nodes, so a token registered on any node reaches the leader. Every write
+    bumps a version key that reload_if_changed compares.
+    """
+
+    def __init__(self, client, key: str = TOKENS_KEY):
+        self.client = client
+        self.key = key
+        self.version_key = f"{key}:version"
+        super().__init__()
+
+    def _read_subscriptions(self) -> Iterable[Subscription]:
+        for value in self.client.hvals(self.key):
+            yield Subscription(*json.loads(value))
+
+    def _read_data_version(self) -> int:
+        return int(self.client.get(self.version_key) or 0)
+
+    def _execute_and_bump(self, pipe) -> None:
+        pipe.incr(self.version_key)
+        version = pipe.execute()[-1]
+        # This process's own write needs no reload, unless another one wrote in between.
+        if version == self._data_version + 1:
+            self._data_version = version
+
+    def _save(self, subscription: Subscription) -> None:
+        pipe = self.client.pipeline()
+        pipe.hset(self.key, subscription.token, json.dumps(subscription))
+        self._execute_and_bump(pipe)
+
+    def _delete(self, tokens: List[str]) -> None:
+        pipe = self.client.pipeline()
+        pipe.hdel(self.key, *tokens)
+        self._execute_and_bump(pipe)
@@ -0,0 +1,319 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from model_registry import MAG_MODEL_FILE, MODEL_DIR, TIME_MODEL_FILE, files_version
+from sequences import MAINSHOCK_MIN_MAG, RADIUS_KM, TIME_WINDOW_DAYS
+
+FEATURE_CACHE_FILE = "features.npz"
+FEATURE_CACHE_VERSION = 1
+METRICS_FILE = "training_metrics.json"
+
+TARGETS = ("mag", "time")
+MODEL_FILES = {"mag": MAG_MODEL_FILE, "time": TIME_MODEL_FILE}
+
+# The hyperparameters of the training notebook; always evaluated as trial 0.
+BASE_PARAMS = {
+    "objective": "regression_l1",
+    "metric": "mae",
+    "learning_rate": 0.05,
+    "num_leaves": 31,
+    "max_depth": -1,
+    "min_child_samples": 20,
+    "subsample": 0.8,
+    "colsample_bytree": 0.8,
+    "reg_lambda": 0.0,
+}
+SEARCH_SPACE = {
+    "learning_rate": [0.01, 0.02, 0.05, 0.1],
+    "num_leaves": [4, 8, 15, 31],
+    "min_child_samples": [5, 10, 20, 30],
+    "colsample_bytree": [0.5, 0.75, 1.0],
+    "reg_lambda": [0.0, 0.1, 1.0, 10.0],
+}
+MAX_ESTIMATORS = 1000
+EARLY_STOPPING_ROUNDS = 10
+VALIDATION_SIZE = 0.2
+DEFAULT_FOLDS = 5
+DEFAULT_TRIALS = 20
+RANDOM_STATE = 42
+
+
+def _feature_cache_key(catalog_arrays: Dict) -> str:
+    digest = hashlib.sha1()
+    for column in ("time", "latitude", "longitude", "depth", "mag"):
+        digest.update(np.ascontiguousarray(catalog_arrays[column]).tobytes())
+    digest.update(
+        json.dumps(
+            [FEATURE_CACHE_VERSION, MAINSHOCK_MIN_MAG, RADIUS_KM, TIME_WINDOW_DAYS]
+        ).encode()
+    )
+    return digest.hexdigest()
+
+
+def load_features(use_cache: bool = True) -> Dict:
+    """
+    Training features and targets built from the catalog with
+    identify_mainshock_aftershock_sequences. They are cached next to the
+    catalog cache and rebuilt when the catalog or the sequence defaults change.
+    """
+    from catalog import CATALOG_FILES, default_cache_dir, load_catalog, load_catalog_arrays
+
+    cache_path = os.path.join(default_cache_dir(CATALOG_FILES), FEATURE_CACHE_FILE)
+    key = _feature_cache_key(load_catalog_arrays())
+    if use_cache and os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            if str(cached["key"]) == key:
+                features = {name: cached[name] for name in cached.files if name != "key"}
+                return {**features, "cache_hit": True}
+
+    from features import FEATURE_COLUMNS
+    from sequences import identify_mainshock_aftershock_sequences
+
+    feature_df = identify_mainshock_aftershock_sequences(load_catalog())
+    features = {
+        "X": feature_df[FEATURE_COLUMNS].to_numpy(dtype=np.float64),
+        "mag": feature_df["aftershock_mag"].to_numpy(dtype=np.float64),
+        "time": np.log1p(feature_df["time_to_aftershock_hours"].to_numpy(dtype=np.float64)),
+        "groups": feature_df["mainshock_id"].to_numpy(dtype=np.int64),
+    }
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, key=np.array(key), **features)
+    os.replace(tmp_path, cache_path)
+    return {**features, "cache_hit": False}
+
+
+def sample_trials(n_trials: int, seed: int = RANDOM_STATE) -> List[Dict]:
+    """BASE_PARAMS followed by n_trials - 1 distinct random draws from SEARCH_SPACE."""
+    rng = np.random.default_rng(seed)
+    trials = [dict(BASE_PARAMS)]
+    seen = {json.dumps(BASE_PARAMS, sort_keys=True)}
+    attempts = 0
+    while len(trials) < n_trials and attempts < 100 * n_trials:
+        attempts += 1
+        params = dict(BASE_PARAMS)
+        for name, values in SEARCH_SPACE.items():
+            params[name] = values[rng.integers(len(values))]
+        signature = json.dumps(params, sort_keys=True)
+        if signature not in seen:
+            seen.add(signature)
+            trials.append(params)
+    return trials
+
+
+def _regressor(params: Dict, n_estimators: int):
+    import lightgbm as lgb
+
+    # One thread per model; the process pool provides the parallelism.
+    return lgb.LGBMRegressor(
+        **params,
+        n_estimators=n_estimators,
+        random_state=RANDOM_STATE,
+        n_jobs=1,
+        verbose=-1,
+    )
+
+
+# Set in every worker process once by _init_worker, so trials only send their parameters.
+_worker_data: Optional[Dict] = None
+
+
+def _init_worker(features: Dict, folds: int) -> None:
+    global _worker_data
+    from sklearn.model_selection import GroupKFold
+
+    _worker_data = {
+        **features,
+        "splits": list(
+            GroupKFold(n_splits=folds).split(features["X"], groups=features["groups"])
+        ),
+    }
+
+
+def _fit_with_early_stopping(params: Dict, X, y, groups):
+    """Scaler and regressor fitted on X, stopped early on a held-out group split."""
+    import lightgbm as lgb
+    from sklearn.model_selection import GroupShuffleSplit
+    from sklearn.preprocessing import StandardScaler
+
+    splitter = GroupShuffleSplit(
+        n_splits=1, test_size=VALIDATION_SIZE, random_state=RANDOM_STATE
+    )
+    fit_idx, val_idx = next(splitter.split(X, groups=groups))
+    scaler = StandardScaler().fit(X[fit_idx])
+    model = _regressor(params, MAX_ESTIMATORS)
+    model.fit(
+        scaler.transform(X[fit_idx]),
+        y[fit_idx],
+        eval_set=[(scaler.transform(X[val_idx]), y[val_idx])],
+        eval_metric="mae",
+        callbacks=[lgb.early_stopping(stopping_rounds=EARLY_STOPPING_ROUNDS, verbose=False)],
+    )
+    return scaler, model
+
+
+def evaluate_trial(target: str, trial: int, params: Dict) -> Dict:
+    """Grouped k-fold CV of one parameter set; runs in a worker process."""
+    data = _worker_data
+    X, y, groups = data["X"], data[target], data["groups"]
+    started = time.perf_counter()
+    maes = []
+    rmses = []
+    hours_maes = []
+    iterations = []
+    for train_idx, test_idx in data["splits"]:
+        scaler, model = _fit_with_early_stopping(
+            params, X[train_idx], y[train_idx], groups[train_idx]
+        )
+        predicted = model.predict(scaler.transform(X[test_idx]))
+        errors = predicted - y[test_idx]
+        maes.append(float(np.mean(np.abs(errors))))
+        rmses.append(float(np.sqrt(np.mean(errors**2))))
+        if target == "time":
+            hours = np.maximum(np.expm1(predicted), 0)
+            hours_maes.append(float(np.mean(np.abs(hours - np.expm1(y[test_idx])))))
+        iterations.append(int(model.best_iteration_ or model.n_estimators))
+
+    result = {
+        "target": target,
+        "trial": trial,
+        "params": params,
+        "cv_mae": float(np.mean(maes)),
+        "cv_mae_std": float(np.std(maes)),
+        "cv_rmse": float(np.mean(rmses)),
+        "best_iterations": iterations,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    if hours_maes:
+        result["cv_mae_hours"] = float(np.mean(hours_maes))
+    return result
+
+
+def fit_final_pipeline(params: Dict, n_estimators: int, X, y):
+    """The Pipeline the server loads, refitted on all rows with the CV iteration count."""
+    import pandas as pd
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    from features import FEATURE_COLUMNS
+
+    X_df = pd.DataFrame(X, columns=FEATURE_COLUMNS)
+    scaler = StandardScaler().fit(X_df)
+    model = _regressor(params, n_estimators)
+    model.fit(scaler.transform(X_df), y)
+    return Pipeline([("scaler", scaler), ("regressor", model)])
+
+
+def save_pipeline(pipeline, path: str) -> None:
+    import joblib
+
+    # The model watcher must never see a half-written pickle.
+    tmp_path = path + ".tmp"
+    joblib.dump(pipeline, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def run_search(
+    features: Dict, n_trials: int, folds: int, workers: int, seed: int = RANDOM_STATE
+) -> Dict[str, List[Dict]]:
+    trials = sample_trials(n_trials, seed)
+    results = {target: [] for target in TARGETS}
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(features, folds)
+    ) as executor:
+        futures = [
+            executor.submit(evaluate_trial, target, trial, params)
+            for trial, params in enumerate(trials)
+            for target in TARGETS
+        ]
+        for future in futures:
+            result = future.result()
+            results[result["target"]].append(result)
+            print(
+                f"{result['target']} deneme {result['trial']}: "
+                f"MAE {result['cv_mae']:.4f} ± {result['cv_mae_std']:.4f}"
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Grouped k-fold CV and hyperparameter search for the aftershock models."
+    )
+    parser.add_argument("--trials", type=int, default=DEFAULT_TRIALS)
+    parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=RANDOM_STATE)
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument(
+        "--no-feature-cache", action="store_true", help="rebuild the feature matrix"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="only write the metrics, keep the models"
+    )
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    features = load_features(use_cache=not args.no_feature_cache)
+    cache_hit = features.pop("cache_hit")
+    print(
+        f"{len(features['X'])} eğitim örneği "
+        f"({'önbellekten' if cache_hit else 'katalogdan oluşturuldu'})"
+    )
+
+    results = run_search(features, args.trials, args.folds, args.workers, args.seed)
+
+    report = {
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "rows": int(len(features["X"])),
+        "groups": int(len(np.unique(features["groups"]))),
+        "folds": args.folds,
+        "trials": args.trials,
+        "workers": args.workers,
+        "seed": args.seed,
+        "feature_cache_hit": cache_hit,
+        "targets": {},
+    }
+    os.makedirs(args.model_dir, exist_ok=True)
+    for target in TARGETS:
+        best = min(results[target], key=lambda result: result["cv_mae"])
+        n_estimators = max(1, int(round(np.mean(best["best_iterations"]))))
+        report["targets"][target] = {
+            "best": {**best, "n_estimators": n_estimators},
+            "baseline_cv_mae": results[target][0]["cv_mae"],
+            "trials": results[target],
+        }
+        print(
+            f"{target} en iyi deneme {best['trial']}: MAE {best['cv_mae']:.4f} "
+            f"(notebook parametreleri {results[target][0]['cv_mae']:.4f}), "
+            f"{n_estimators} ağaç"
+        )
+        if not args.dry_run:
+            pipeline = fit_final_pipeline(
+                best["params"], n_estimators, features["X"], features[target]
+            )
+            save_pipeline(pipeline, os.path.join(args.model_dir, MODEL_FILES[target]))
+
+    if not args.dry_run:
+        report["model_version"] = files_version(
+            [os.path.join(args.model_dir, MODEL_FILES[target]) for target in TARGETS]
+        )
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    metrics_path = os.path.join(args.model_dir, METRICS_FILE)
+    with open(metrics_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"{metrics_path} yazıldı ({report['seconds']:.1f} sn)")
+    if not args.dry_run:
+        print("Model artifact'ı kullanılıyorsa `python model_artifact.py` ile yeniden oluştur.")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,8 @@ class WebSocketService {
     this.isConnected = false;
     this.reconnectAttempts = 0;
     this.maxReconnectAttempts = 5;
+    this.snapshotVersion = null;
+    this.subscription = null;
   }
 
   connect = (url) => {
@@ -18,12 +20,18 @@ class WebSocketService {
         reconnectionDelay: 1000,
         reconnectionAttempts: this.maxReconnectAttempts,
         timeout: 20000,
+        // Yeniden bağlanırken sunucu yalnızca kaçırılan depremleri gönderebilsin
+        auth: (cb) => cb(this.snapshotVersion !== null ? { snapshot_version: this.snapshotVersion } : {}),
       });
 
       this.socket.on('connect', () => {
         console.log('WebSocket bağlantısı kuruldu');
         this.isConnected = true;
         this.reconnectAttempts = 0;
+        // Odalar bağlantıya özeldir; yeniden bağlanınca aboneliği tekrar gönder
+        if (this.subscription) {
+          this.socket.emit('subscribe', this.subscription);
+        }
         this.emit('connection_status', { connected: true });
       });
 
@@ -51,7 +59,7 @@ class WebSocketService {
 
       this.socket.on('earthquake_update', (earthquake) => {
         console.log('Yeni deprem:', earthquake);
-        this.emit('earthquake_update', earthquake);
+        this.emitEarthquake(earthquake);
       });
 
       this.socket.on('prediction_result', (prediction) => {
@@ -59,6 +67,34 @@ class WebSocketService {
         this.emit('prediction_result', prediction);
       });
 
+      // Sunucu bir yoklamadaki yeni depremleri tek mesajda (eskiden yeniye) gönderir
+      this.socket.on('earthquake_updates', (earthquakes) => {
+        console.log('Yeni depremler:', earthquakes);
+        earthquakes.forEach(this.emitEarthquake);
+      });
+
+      this.socket.on('prediction_results', (predictions) => {
+        console.log('Deprem tahminleri:', predictions);
+        predictions.forEach((prediction) => this.emit('prediction_result', prediction));
+      });
+
+      // Artçı şok dizisi başladığında veya yeni bir artçı eklendiğinde gelir
+      this.socket.on('sequence_updates', (sequences) => {
+        console.log('Artçı şok dizileri:', sequences);
+        sequences.forEach((sequence) => this.emit('sequence_update', sequence));
+      });
+
+      // Sunucu son sürümden bu yana eklenenleri (yeniden eskiye) tek mesajda gönderir
+      this.socket.on('snapshot_delta', (delta) => {
+        console.log('Kaçırılan depremler alındı:', delta);
+        [...delta.earthquakes].reverse().forEach(this.emitEarthquake);
+        [...delta.predictions].reverse().forEach((prediction) => this.emit('prediction_result', prediction));
+      });
+
+      this.socket.on('snapshot_version', (version) => {
+        this.snapshotVersion = version;
+      });
+
       this.socket.on('error', (error) => {
         console.error('Socket hatası:', error);
         this.emit('socket_error', error);
@@ -70,6 +106,29 @@ class WebSocketService {
     }
   };
 
+  // { cities: ['Ankara'], latitude, longitude, min_magnitude } ile yalnızca ilgili depremleri al;
+  // boş abonelik (veya null) tüm depremlere geri döner
+  subscribe = (subscription) => {
+    this.subscription = subscription;
+    if (this.socket && this.isConnected) {
+      this.socket.emit('subscribe', subscription || {}, (response) => {
+        if (response && response.status !== 'ok') {
+          console.error('Abonelik hatası:', response.error);
+        }
+      });
+    }
+  };
+
+  // Sunucu odaları büyüklük kademelerine göre ayırır (örn. 4.5); aboneliğin
+  // min_magnitude değerinin (örn. 4.8) altında kalanları burada ele
+  emitEarthquake = (earthquake) => {
+    const minMagnitude = this.subscription && this.subscription.min_magnitude;
+    if (minMagnitude != null && earthquake.magnitude < minMagnitude) {
+      return;
+    }
+    this.emit('earthquake_update', earthquake);
+  };
+
   disconnect = () => {
     if (this.socket) {
       this.socket.disconnect();